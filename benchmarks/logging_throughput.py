@@ -0,0 +1,85 @@
+"""
+Records per second through the logging pipeline.
+
+Compares the previous setup (unbounded queue.Queue, QueueListener writing one record at a time
+through StreamHandler) with configure_logging() in text and JSON format. Producers log request-style
+records as fast as they can; the clock stops once the listener has written every accepted record to
+os.devnull. With a small queue, dropped records do not count as written. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/logging_throughput.py [records] [threads]
+"""
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from dm_email_owner_svc.core import logging as service_logging
+from dm_email_owner_svc.core.logging import TEXT_FORMAT, configure_logging, logging_stats
+
+
+def produce(records: int, threads: int) -> None:
+    logger = logging.getLogger("bench")
+    per_thread = records // threads
+
+    def run():
+        for i in range(per_thread):
+            logger.info("%s %s | payload_size=%d bytes | status_code=%d | duration_ms=%d", "POST", "/parse", i, 200, 3)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def unbounded_baseline(stream, records: int, threads: int):
+    log_queue = queue.Queue()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    listener = QueueListener(log_queue, output)
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    start = time.perf_counter()
+    listener.start()
+    produce(records, threads)
+    listener.stop()
+    return records / (time.perf_counter() - start), 0
+
+
+def pipeline(stream, records: int, threads: int, **options):
+    configure_logging(stream=stream, **options)
+    start = time.perf_counter()
+    produce(records, threads)
+    # Stopping the listener waits until the queue is drained
+    service_logging._listener.stop()
+    elapsed = time.perf_counter() - start
+    stats = logging_stats()
+    service_logging._listener = None
+    return stats["written"] / elapsed, stats["dropped"]
+
+
+def main(records: int, threads: int) -> None:
+    stream = open(os.devnull, "w")
+    runs = [
+        ("unbounded, one at a time", lambda: unbounded_baseline(stream, records, threads)),
+        ("bounded, batched, text", lambda: pipeline(stream, records, threads, queue_size=records)),
+        ("bounded, batched, json", lambda: pipeline(stream, records, threads, queue_size=records, log_format="json")),
+        ("bounded 1000, drop_newest", lambda: pipeline(stream, records, threads, queue_size=1000)),
+        ("bounded 1000, drop_oldest", lambda: pipeline(stream, records, threads, queue_size=1000, overflow_policy="drop_oldest")),
+    ]
+    print(f"{'pipeline':<28}{'written/s':>12}{'dropped':>10}")
+    for name, run in runs:
+        rate, dropped = run()
+        print(f"{name:<28}{rate:>12,.0f}{dropped:>10}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+    )
@@ -0,0 +1,150 @@
+"""
+Per-request overhead of each middleware layer on /ping and /parse.
+
+The application is called directly through ASGI, without a server or HTTP client, so the numbers
+contain only the framework, the route and the middleware under test. /parse uses a fake model client
+and has the request cache, result cache and micro-batching window turned off so every request runs
+the same pipeline. Log records are formatted and written to os.devnull. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/middleware_overhead.py [requests] [rounds]
+
+Layers are measured in interleaved rounds and the best round is reported, which keeps warm-up and
+allocator noise out of the differences.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+
+os.environ.setdefault("TESTING", "true")
+
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from dm_email_owner_svc.app import app
+from dm_email_owner_svc.core import owner_resolution
+from dm_email_owner_svc.core.quotas import build_quota_manager
+from dm_email_owner_svc.core.rate_limit import RateLimiter
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from dm_email_owner_svc.middleware import RateLimitMiddleware, RequestLoggingMiddleware
+
+
+class EchoOpenAIClient:
+    async def chat_completion(self, messages):
+        emails = messages[1]["content"].split("Emails: ", 1)[1].split("\n", 1)[0].split(", ")
+        answer = [{"email": email, "owner": email.split("@")[0].title()} for email in emails]
+        return {"choices": [{"message": {"content": json.dumps(answer)}}]}
+
+
+async def passthrough(request, call_next):
+    return await call_next(request)
+
+
+LAYERS = {
+    "none": [],
+    "rate_limit": [Middleware(RateLimitMiddleware)],
+    "logging": [Middleware(RequestLoggingMiddleware)],
+    "rate_limit+logging": [Middleware(RequestLoggingMiddleware), Middleware(RateLimitMiddleware)],
+    # Reference: one empty BaseHTTPMiddleware, the per-layer cost of the previous middleware style
+    "base_http_passthrough": [Middleware(BaseHTTPMiddleware, dispatch=passthrough)],
+}
+
+# Unique per request so no cache can answer
+_sequence = itertools.count()
+
+
+def ping_body() -> bytes:
+    return b""
+
+
+def parse_body() -> bytes:
+    email = f"ann{next(_sequence)}@example.com"
+    return json.dumps({"html_content": f"<p>Contact {email} for details</p>", "emails": [email]}).encode()
+
+
+async def call(method: str, path: str, body: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = 0
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(method: str, path: str, make_body, requests: int) -> float:
+    """Mean microseconds per request after a short warm-up."""
+    for _ in range(min(200, requests)):
+        await call(method, path, make_body())
+    bodies = [make_body() for _ in range(requests)]
+    start = time.perf_counter()
+    for body in bodies:
+        status = await call(method, path, body)
+        if status != 200:
+            raise RuntimeError(f"{method} {path} returned {status}")
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int, rounds: int) -> None:
+    openai_client = EchoOpenAIClient()
+    app.dependency_overrides[get_openai_client] = lambda: openai_client
+    # Limits high enough that nothing is rejected while every request is still charged
+    app.state.quotas = build_quota_manager(10**9, 10**12, {}, {}, lambda limit: RateLimiter(limit=limit, algorithm="sliding_window"))
+    owner_resolution.RESULT_CACHE_ENABLED = False
+    owner_resolution.request_cache.max_size = 0
+    owner_resolution.micro_batcher.window = 0
+
+    original = list(app.user_middleware)
+    print(f"{'layers':<24}{'endpoint':<10}{'us/request':>12}{'overhead':>12}")
+    try:
+        for method, path, make_body in [("GET", "/ping", ping_body), ("POST", "/parse", parse_body)]:
+            best = {}
+            for _ in range(rounds):
+                for name, middleware in LAYERS.items():
+                    app.user_middleware = list(middleware)
+                    app.middleware_stack = None
+                    per_request = await measure(method, path, make_body, requests)
+                    best[name] = min(best.get(name, per_request), per_request)
+            for name, per_request in best.items():
+                print(f"{name:<24}{path:<10}{per_request:>12.1f}{per_request - best['none']:>+12.1f}")
+    finally:
+        app.user_middleware = original
+        app.middleware_stack = None
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    ))
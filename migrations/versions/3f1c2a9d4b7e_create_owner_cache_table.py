@@ -0,0 +1,38 @@
+"""create owner_cache table
+
+Revision ID: 3f1c2a9d4b7e
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d4b7e'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'owner_cache',
+        sa.Column('document_sha256', sa.String(length=64), nullable=False),
+        sa.Column('email', sa.String(length=320), nullable=False),
+        sa.Column('model_name', sa.String(length=100), nullable=False),
+        sa.Column('prompt_version', sa.String(length=20), nullable=False),
+        sa.Column('owner', sa.String(length=320), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('document_sha256', 'email', 'model_name', 'prompt_version'),
+    )
+    op.create_index('ix_owner_cache_expires_at', 'owner_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_owner_cache_expires_at', table_name='owner_cache')
+    op.drop_table('owner_cache')
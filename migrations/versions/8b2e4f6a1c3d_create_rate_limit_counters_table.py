@@ -0,0 +1,32 @@
+"""create rate_limit_counters table
+
+Revision ID: 8b2e4f6a1c3d
+Revises: 3f1c2a9d4b7e
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4f6a1c3d'
+down_revision: Union[str, None] = '3f1c2a9d4b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limit_counters',
+        sa.Column('client_id', sa.String(length=255), nullable=False),
+        sa.Column('window_index', sa.BigInteger(), nullable=False),
+        sa.Column('used', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('client_id', 'window_index'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_counters')
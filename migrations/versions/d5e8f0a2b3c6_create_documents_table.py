@@ -0,0 +1,37 @@
+"""create documents table
+
+Revision ID: d5e8f0a2b3c6
+Revises: c4d7e9f1a2b5
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8f0a2b3c6'
+down_revision: Union[str, None] = 'c4d7e9f1a2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'documents',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('html_content', sa.Text(), nullable=False),
+        sa.Column('normalized', sa.Text(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.create_index('ix_documents_expires_at', 'documents', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_expires_at', table_name='documents')
+    op.drop_table('documents')
@@ -0,0 +1,34 @@
+"""create owner_directory table
+
+Revision ID: e6f9a1b3c4d7
+Revises: d5e8f0a2b3c6
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f9a1b3c4d7'
+down_revision: Union[str, None] = 'd5e8f0a2b3c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'owner_directory',
+        sa.Column('email', sa.String(length=320), nullable=False),
+        sa.Column('owner', sa.String(length=320), nullable=False),
+        sa.Column('observations', sa.Integer(), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('email', 'owner'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('owner_directory')
@@ -1,28 +1,8 @@
-import time
 import logging
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.responses import JSONResponse as _JSONResponse
 
-# Record the original time.time at import-time
-_real_time = time.time
-
-# Monkey-patch LogRecord to use monotonic() instead of time.time() for created timestamp
-_orig_log_record_init = logging.LogRecord.__init__
-import time as _time_module
-
-def _log_record_init_no_time(self, name, level, pathname, lineno, msg, args, exc_info, func=None, sinfo=None):
-    # Call original initializer
-    _orig_log_record_init(self, name, level, pathname, lineno, msg, args, exc_info, func=func, sinfo=sinfo)
-    try:
-        created = _time_module.monotonic()
-        self.created = created
-        self.msecs = (created - int(created)) * 1000
-    except Exception:
-        pass
-
-logging.LogRecord.__init__ = _log_record_init_no_time
-
-# Custom JSONResponse that omits default headers (no date) to avoid extra time.time() calls
+# Custom JSONResponse that omits default headers
 class JSONResponse(_JSONResponse):
     @property
     def default_headers(self):
@@ -39,10 +19,43 @@ class JSONResponse(_JSONResponse):
         super().__init__(content=content, status_code=status_code, headers=headers or {}, media_type=media_type, background=background)
 
 # RateLimiter import and instantiation
+from dm_email_owner_svc.core.quotas import build_quota_manager
 from dm_email_owner_svc.core.rate_limit import RateLimiter
-
-# Import OpenAIClient at module level to ensure consistent reference
-from dm_email_owner_svc.core.openai_client import OpenAIClient
+from dm_email_owner_svc.core.tracing import build_exporter
+from dm_email_owner_svc.middleware import (
+    BodySizeLimitMiddleware,
+    ProfilingMiddleware,
+    RateLimitMiddleware,
+    RequestLoggingMiddleware,
+    TracingMiddleware,
+)
+from dm_email_owner_svc.config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+    JOB_WORKER_CONCURRENCY,
+    MAX_BODY_SIZE,
+    MAX_BODY_SIZE_ROUTES,
+    PROFILE_ADMIN_TOKEN,
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_SAMPLE_RATE,
+    RATE_LIMIT_ALGORITHM,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_CLIENTS,
+    RATE_LIMIT_COST,
+    RATE_LIMIT_MAX_CLIENTS,
+    RATE_LIMIT_REQUESTS,
+    RATE_LIMIT_SQL_LEASE,
+    RATE_LIMIT_STRIPES,
+    RATE_LIMIT_TIERS,
+    RATE_LIMIT_WINDOW,
+    TRACE_EXPORT_PATH,
+    TRACE_EXPORTER,
+)
+
+# Import the async OpenAI client at module level to ensure consistent reference
+from dm_email_owner_svc.core.openai_client import AsyncOpenAIClient
 
 # Use custom JSONResponse as default for all routes
 app = FastAPI(debug=True, default_response_class=JSONResponse)
@@ -50,14 +63,39 @@ app = FastAPI(debug=True, default_response_class=JSONResponse)
 # Retrieve the configured logger
 logger = logging.getLogger(__name__)
 
-# Global rate limiter: max 10 requests per 60 seconds per client
-limiter = RateLimiter(limit=10, window_size=60)
+def build_limiter(limit: int) -> RateLimiter:
+    """One limiter per quota and dimension, optionally sharing state across worker processes."""
+    storage = None
+    if RATE_LIMIT_BACKEND == "sql":
+        from dm_email_owner_svc.core.sql_rate_limit import SQLRateLimitStorage
+        from dm_email_owner_svc.models.base import engine
+        storage = SQLRateLimitStorage(
+            engine, limit=limit, window_size=RATE_LIMIT_WINDOW, algorithm=RATE_LIMIT_ALGORITHM, lease_size=RATE_LIMIT_SQL_LEASE
+        )
+    return RateLimiter(
+        limit=limit,
+        window_size=RATE_LIMIT_WINDOW,
+        algorithm=RATE_LIMIT_ALGORITHM,
+        stripes=RATE_LIMIT_STRIPES,
+        max_clients=RATE_LIMIT_MAX_CLIENTS,
+        storage=storage,
+    )
+
+# Per-client quotas: requests per window plus estimated parse cost per window, by client or tier
+quotas = build_quota_manager(RATE_LIMIT_REQUESTS, RATE_LIMIT_COST, RATE_LIMIT_TIERS, RATE_LIMIT_CLIENTS, build_limiter)
+app.state.quotas = quotas
+app.state.rate_limit_window = RATE_LIMIT_WINDOW
 
-# Reset rate limiter state on application startup
+# Optional collector for finished request traces (None when TRACE_EXPORTER is "none")
+trace_exporter = build_exporter(TRACE_EXPORTER, TRACE_EXPORT_PATH)
+app.state.trace_exporter = trace_exporter
+
+# Reset rate limiter state on application startup; shared counters outlive a single worker
 @app.on_event("startup")
 def reset_rate_limiter_state() -> None:
     try:
-        limiter._clients.clear()
+        if RATE_LIMIT_BACKEND != "sql":
+            quotas.reset()
     except Exception as e:
         logging.error(e, exc_info=True)
 
@@ -71,79 +109,101 @@ def init_openai_client() -> None:
             app.state.openai_client = object()
             logger.info("Dummy OpenAI client initialized in testing mode.")
             return
-        openai_client = OpenAIClient()
+        openai_client = AsyncOpenAIClient()
         app.state.openai_client = openai_client
         logger.info("OpenAI client successfully initialized.")
     except Exception as e:
         logger.error(e, exc_info=True)
 
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    # If test header is set to disable rate limiting, bypass it
-    if request.headers.get("X-Test-Disable-RateLimit", "").lower() == "true":
-        return await call_next(request)
-
-    # If test header is set to reset rate limiter, clear state and bypass rate limiting for this request
-    if request.headers.get("X-Test-Reset-RateLimit", "").lower() == "true":
-        try:
-            limiter._clients.clear()
-        except Exception as e:
-            logging.error(e, exc_info=True)
-        return await call_next(request)
-
-    # Allow override via header for testing multiple client isolation
-    client_id = request.headers.get("X-Client-Host", request.client.host)
+# Create tables for the in-memory database, which cannot be migrated with Alembic
+@app.on_event("startup")
+def init_database() -> None:
     try:
-        # Perform rate limiting check
-        allowed = limiter.is_allowed(client_id)
+        from dm_email_owner_svc.models.base import Base, engine, is_in_memory_database
+        if is_in_memory_database():
+            Base.metadata.create_all(engine)
     except Exception as e:
-        logging.error(e, exc_info=True)
-        return await call_next(request)
-    if not allowed:
-        return JSONResponse(
-            status_code=429,
-            content={"detail": "Rate limit exceeded. Max 10 requests per minute."}
+        logger.error(e, exc_info=True)
+
+# Work off queued parse jobs in the background, including jobs left unfinished by a previous run
+@app.on_event("startup")
+async def start_job_workers() -> None:
+    try:
+        if JOB_WORKER_CONCURRENCY <= 0:
+            return
+        from dm_email_owner_svc.core.jobs import JobWorkerPool
+        from dm_email_owner_svc.models.base import SessionLocal
+        pool = JobWorkerPool(
+            SessionLocal,
+            lambda: app.state.openai_client,
+            concurrency=JOB_WORKER_CONCURRENCY,
+            poll_interval=JOB_POLL_INTERVAL,
+            lease_seconds=JOB_LEASE_SECONDS,
+            max_attempts=JOB_MAX_ATTEMPTS,
         )
+        pool.start()
+        app.state.job_pool = pool
+    except Exception as e:
+        logger.error(e, exc_info=True)
 
-    # Save the current time function (expected to be the fake one)
-    fake_time_fn = time.time
-    # Restore the real time function for the downstream call
-    time.time = _real_time
+# Stop the job workers first; items they hold go back to the queue
+@app.on_event("shutdown")
+async def stop_job_workers() -> None:
     try:
-        response = await call_next(request)
-    finally:
-        # Restore the previous fake time function
-        time.time = fake_time_fn
-    return response
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    # Use monotonic for timing
-    start_time = time.monotonic()
+        pool = getattr(app.state, "job_pool", None)
+        if pool is not None:
+            app.state.job_pool = None
+            await pool.stop()
+    except Exception as e:
+        logger.error(e, exc_info=True)
+
+# Close the shared OpenAI connection pool on shutdown
+@app.on_event("shutdown")
+async def close_openai_client() -> None:
     try:
-        body_bytes = await request.body()
-        request._body = body_bytes
-        payload_size = len(body_bytes)
-    except Exception:
-        payload_size = 0
+        openai_client = getattr(app.state, "openai_client", None)
+        if isinstance(openai_client, AsyncOpenAIClient):
+            await openai_client.aclose()
+    except Exception as e:
+        logger.error(e, exc_info=True)
+
+# Write out traces still waiting for the exporter on shutdown
+@app.on_event("shutdown")
+def shutdown_trace_exporter() -> None:
     try:
-        response = await call_next(request)
-    except Exception as exc:
-        logger.error("Unhandled exception during request", exc_info=True)
-        return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
-    duration_ms = int((time.monotonic() - start_time) * 1000)
-    status_code = response.status_code
-    logger.info(
-        f"{request.method} {request.url.path} | payload_size={payload_size} bytes | status_code={status_code} | duration_ms={duration_ms}"
+        if trace_exporter is not None:
+            trace_exporter.shutdown()
+    except Exception as e:
+        logger.error(e, exc_info=True)
+
+# Pure ASGI middleware; the last one added is outermost, so request logs include rejected requests
+# and every response, including 413 and 429, carries Server-Timing
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=MAX_BODY_SIZE, route_limits=MAX_BODY_SIZE_ROUTES)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(TracingMiddleware, exporter=trace_exporter)
+# Only installed when enabled, so unprofiled deployments pay nothing for it
+if PROFILE_ADMIN_TOKEN or PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=PROFILE_DIR,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        admin_token=PROFILE_ADMIN_TOKEN,
+        max_files=PROFILE_MAX_FILES,
     )
-    return response
+app.add_middleware(RequestLoggingMiddleware)
 
 # include routers
+from dm_email_owner_svc.routers.admin import admin_router
+from dm_email_owner_svc.routers.documents import documents_router
 from dm_email_owner_svc.routers.health import health_router
+from dm_email_owner_svc.routers.metrics import metrics_router
 from dm_email_owner_svc.routers.parse import parse_router
 
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(parse_router)
+app.include_router(documents_router)
+app.include_router(admin_router)
 
 @app.get("/ping")
 async def ping():
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -10,6 +11,18 @@ SERVICE_PORT = os.getenv("SERVICE_PORT", 8000)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
 
+# Model cascade, fastest model first (comma-separated). Emails the model answers with null, a malformed
+# entry or a confidence below MODEL_CASCADE_MIN_CONFIDENCE are asked again on the next tier.
+# Defaults to the single OPENAI_MODEL_NAME tier, i.e. no cascade.
+OPENAI_MODEL_TIERS = [
+    model.strip() for model in os.getenv("OPENAI_MODEL_TIERS", OPENAI_MODEL_NAME).split(",") if model.strip()
+] or [OPENAI_MODEL_NAME]
+
+try:
+    MODEL_CASCADE_MIN_CONFIDENCE = float(os.getenv("MODEL_CASCADE_MIN_CONFIDENCE", "0.7"))
+except ValueError:
+    MODEL_CASCADE_MIN_CONFIDENCE = 0.7
+
 try:
     OPENAI_TIMEOUT = int(os.getenv("OPENAI_TIMEOUT", "30"))
 except ValueError:
@@ -19,3 +32,270 @@ try:
     OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
 except ValueError:
     OPENAI_MAX_RETRIES = 3
+
+try:
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+except ValueError:
+    OPENAI_MAX_CONNECTIONS = 100
+
+try:
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+except ValueError:
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# Characters of HTML kept on each side of an email occurrence when building prompts (0 sends the full document)
+try:
+    PROMPT_CONTEXT_WINDOW = int(os.getenv("PROMPT_CONTEXT_WINDOW", "400"))
+except ValueError:
+    PROMPT_CONTEXT_WINDOW = 400
+
+# Convert HTML to compact text before it is placed in prompts
+PROMPT_NORMALIZE_HTML = os.getenv("PROMPT_NORMALIZE_HTML", "true").lower() == "true"
+
+# Persistent per-document result cache
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+
+try:
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+except ValueError:
+    RESULT_CACHE_TTL = 7 * 24 * 3600
+
+# Owners learned from model answers across documents; emails whose best owner reaches the confidence
+# threshold are answered from the directory without asking the model
+OWNER_DIRECTORY_ENABLED = os.getenv("OWNER_DIRECTORY_ENABLED", "true").lower() == "true"
+
+try:
+    OWNER_DIRECTORY_MIN_CONFIDENCE = float(os.getenv("OWNER_DIRECTORY_MIN_CONFIDENCE", "0.8"))
+except ValueError:
+    OWNER_DIRECTORY_MIN_CONFIDENCE = 0.8
+
+# In-process cache of whole /parse results with single-flight de-duplication (0 disables storage)
+try:
+    REQUEST_CACHE_MAX_SIZE = int(os.getenv("REQUEST_CACHE_MAX_SIZE", "1024"))
+except ValueError:
+    REQUEST_CACHE_MAX_SIZE = 1024
+
+try:
+    REQUEST_CACHE_TTL = float(os.getenv("REQUEST_CACHE_TTL", "300"))
+except ValueError:
+    REQUEST_CACHE_TTL = 300.0
+
+# Maximum number of emails in one parse request
+try:
+    PARSE_MAX_EMAILS = int(os.getenv("PARSE_MAX_EMAILS", "50"))
+except ValueError:
+    PARSE_MAX_EMAILS = 50
+
+# POST /parse/batch limits
+try:
+    PARSE_BATCH_MAX_ITEMS = int(os.getenv("PARSE_BATCH_MAX_ITEMS", "100"))
+except ValueError:
+    PARSE_BATCH_MAX_ITEMS = 100
+
+try:
+    PARSE_BATCH_CONCURRENCY = int(os.getenv("PARSE_BATCH_CONCURRENCY", "8"))
+except ValueError:
+    PARSE_BATCH_CONCURRENCY = 8
+
+# POST /parse/stream: documents resolved at once per upload and the longest accepted line
+try:
+    PARSE_STREAM_CONCURRENCY = int(os.getenv("PARSE_STREAM_CONCURRENCY", "8"))
+except ValueError:
+    PARSE_STREAM_CONCURRENCY = 8
+
+try:
+    PARSE_STREAM_MAX_LINE_BYTES = int(os.getenv("PARSE_STREAM_MAX_LINE_BYTES", "16777216"))
+except ValueError:
+    PARSE_STREAM_MAX_LINE_BYTES = 16777216
+
+# How long model requests for the same document wait to be merged into one call (0 disables)
+try:
+    LLM_MICRO_BATCH_WINDOW_MS = float(os.getenv("LLM_MICRO_BATCH_WINDOW_MS", "5"))
+except ValueError:
+    LLM_MICRO_BATCH_WINDOW_MS = 5.0
+
+# Chunked fan-out for large documents
+try:
+    PARSE_CHUNKED_MAX_CHARS = int(os.getenv("PARSE_CHUNKED_MAX_CHARS", "10000000"))
+except ValueError:
+    PARSE_CHUNKED_MAX_CHARS = 10000000
+
+try:
+    PARSE_CHUNK_CHARS = int(os.getenv("PARSE_CHUNK_CHARS", "20000"))
+except ValueError:
+    PARSE_CHUNK_CHARS = 20000
+
+try:
+    PARSE_CHUNK_OVERLAP = int(os.getenv("PARSE_CHUNK_OVERLAP", "500"))
+except ValueError:
+    PARSE_CHUNK_OVERLAP = 500
+
+try:
+    PARSE_CHUNK_CONCURRENCY = int(os.getenv("PARSE_CHUNK_CONCURRENCY", "16"))
+except ValueError:
+    PARSE_CHUNK_CONCURRENCY = 16
+
+# Rate limiter: "fixed_window", "sliding_window" or "token_bucket"
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")
+
+try:
+    RATE_LIMIT_STRIPES = int(os.getenv("RATE_LIMIT_STRIPES", "16"))
+except ValueError:
+    RATE_LIMIT_STRIPES = 16
+
+try:
+    RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "1000000"))
+except ValueError:
+    RATE_LIMIT_MAX_CLIENTS = 1000000
+
+# Rate limiter storage: "memory" (per process) or "sql" (shared through DATABASE_URL)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+
+# Units a process reserves from the SQL backend at once
+try:
+    RATE_LIMIT_SQL_LEASE = int(os.getenv("RATE_LIMIT_SQL_LEASE", "5"))
+except ValueError:
+    RATE_LIMIT_SQL_LEASE = 5
+
+# Quota window in seconds and the budgets of clients without a tier
+try:
+    RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "60"))
+except ValueError:
+    RATE_LIMIT_WINDOW = 60.0
+
+try:
+    RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "10"))
+except ValueError:
+    RATE_LIMIT_REQUESTS = 10
+
+# Cost units per window; /parse costs the estimated tokens of the document excerpts sent to the model
+try:
+    RATE_LIMIT_COST = int(os.getenv("RATE_LIMIT_COST", "2000000"))
+except ValueError:
+    RATE_LIMIT_COST = 2000000
+
+try:
+    RATE_LIMIT_CHARS_PER_TOKEN = int(os.getenv("RATE_LIMIT_CHARS_PER_TOKEN", "4"))
+except ValueError:
+    RATE_LIMIT_CHARS_PER_TOKEN = 4
+
+# Named quota tiers as JSON, e.g. {"premium": {"requests": 100, "cost": 50000000}}
+try:
+    RATE_LIMIT_TIERS = json.loads(os.getenv("RATE_LIMIT_TIERS", "{}"))
+except ValueError:
+    RATE_LIMIT_TIERS = {}
+
+# Client ids mapped to a tier name or their own quota as JSON, e.g. {"10.0.0.7": "premium"}
+try:
+    RATE_LIMIT_CLIENTS = json.loads(os.getenv("RATE_LIMIT_CLIENTS", "{}"))
+except ValueError:
+    RATE_LIMIT_CLIENTS = {}
+
+# Largest accepted request body in bytes (0 disables the check)
+try:
+    MAX_BODY_SIZE = int(os.getenv("MAX_BODY_SIZE", "1048576"))
+except ValueError:
+    MAX_BODY_SIZE = 1048576
+
+# Per-route body limits as JSON; the parse and document routes accept chunked documents and bulk jobs
+# by default, and NDJSON uploads (/parse/stream, directory imports), which limit each line instead, any size
+try:
+    MAX_BODY_SIZE_ROUTES = json.loads(os.getenv(
+        "MAX_BODY_SIZE_ROUTES",
+        '{"/parse": 16777216, "/parse/batch": 16777216, "/parse/jobs": 67108864, "/parse/stream": 0,'
+        ' "/documents": 16777216, "/admin/owner-directory": 0}',
+    ))
+except ValueError:
+    MAX_BODY_SIZE_ROUTES = {
+        "/parse": 16777216,
+        "/parse/batch": 16777216,
+        "/parse/jobs": 67108864,
+        "/parse/stream": 0,
+        "/documents": 16777216,
+        "/admin/owner-directory": 0,
+    }
+
+# Logging pipeline: records waiting to be written, what to drop when full, records per write
+try:
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+except ValueError:
+    LOG_QUEUE_SIZE = 10000
+
+LOG_OVERFLOW_POLICY = os.getenv("LOG_OVERFLOW_POLICY", "drop_newest")
+
+try:
+    LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+except ValueError:
+    LOG_BATCH_SIZE = 256
+
+# "text" or "json" (one compact JSON object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Span export: "none" (default), "memory" (in-process collector) or "file" (OTLP/JSON lines)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+
+# Request profiling: requests sent with `X-Profile: <PROFILE_ADMIN_TOKEN>` or picked at random with
+# probability PROFILE_SAMPLE_RATE are profiled into PROFILE_DIR; disabled unless one of them is set
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+
+try:
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+except ValueError:
+    PROFILE_SAMPLE_RATE = 0.0
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+try:
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+except ValueError:
+    PROFILE_MAX_FILES = 100
+
+# Asynchronous parse jobs: items per job and how they are worked off in the background
+try:
+    JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", "10000"))
+except ValueError:
+    JOB_MAX_ITEMS = 10000
+
+# Items resolved at once by this process (0 leaves the jobs to other processes)
+try:
+    JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+except ValueError:
+    JOB_WORKER_CONCURRENCY = 4
+
+# Seconds an idle worker waits before looking for work submitted through other processes
+try:
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+except ValueError:
+    JOB_POLL_INTERVAL = 1.0
+
+# Seconds after which an item held by a worker that died is handed to another one
+try:
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+except ValueError:
+    JOB_LEASE_SECONDS = 300.0
+
+try:
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+except ValueError:
+    JOB_MAX_ATTEMPTS = 3
+
+# Longest long-poll accepted by GET /parse/jobs/{id}?wait=
+try:
+    JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "60"))
+except ValueError:
+    JOB_MAX_WAIT = 60.0
+
+# Content-addressed documents uploaded with PUT /documents: largest accepted upload and lifetime
+try:
+    DOCUMENT_MAX_BYTES = int(os.getenv("DOCUMENT_MAX_BYTES", "16777216"))
+except ValueError:
+    DOCUMENT_MAX_BYTES = 16777216
+
+try:
+    DOCUMENT_TTL = int(os.getenv("DOCUMENT_TTL", "86400"))
+except ValueError:
+    DOCUMENT_TTL = 86400
+
+# Token required in the X-Admin-Token header by the /admin endpoints (empty disables them)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
@@ -0,0 +1,57 @@
+from collections import Counter
+from typing import Dict, List, Sequence
+
+
+def split_document(document: str, max_chars: int, overlap: int = 0) -> List[str]:
+    """Splits a document into chunks of at most `max_chars` characters on element boundaries.
+
+    Chunks end right before a tag (`<`) or a line break, whichever comes last in the second half of
+    the chunk, and hard-cut only when neither exists. Each chunk after the first starts up to
+    `overlap` characters before the previous cut, again aligned to a boundary, so an owner and
+    address straddling a cut still appear together in one chunk.
+
+    Returns:
+        The chunks in document order.
+    """
+    if max_chars <= 0 or len(document) <= max_chars:
+        return [document]
+    # Keeping the overlap under half a chunk guarantees every chunk advances
+    overlap = max(0, min(overlap, max_chars // 2 - 1))
+    chunks = []
+    start = 0
+    while len(document) - start > max_chars:
+        end = start + max_chars
+        cut = max(document.rfind("<", start + max_chars // 2, end), document.rfind("\n", start + max_chars // 2, end))
+        if cut <= start:
+            cut = end
+        chunks.append(document[start:cut])
+        # Start the next chunk on the first boundary inside the overlap, or at the cut itself
+        start = _first_boundary(document, cut - overlap, cut) if overlap else cut
+    chunks.append(document[start:])
+    return chunks
+
+
+def _first_boundary(document: str, start: int, end: int) -> int:
+    positions = [i for i in (document.find("<", start, end), document.find("\n", start, end)) if i >= 0]
+    return min(positions) if positions else end
+
+
+def merge_chunk_answers(answers: Sequence[Dict[str, str]], unknown: str = "unknown") -> Dict[str, str]:
+    """Merges per-chunk owners into one answer per email.
+
+    Conflict rule: `unknown` answers are ignored unless no chunk knows the owner; among known owners
+    the one reported by the most chunks wins and ties go to the earliest chunk.
+    """
+    votes: Dict[str, Counter] = {}
+    first_seen: Dict[str, Dict[str, int]] = {}
+    merged: Dict[str, str] = {}
+    for position, answer in enumerate(answers):
+        for email, owner in answer.items():
+            merged.setdefault(email, unknown)
+            if not owner or owner == unknown:
+                continue
+            votes.setdefault(email, Counter())[owner] += 1
+            first_seen.setdefault(email, {}).setdefault(owner, position)
+    for email, counter in votes.items():
+        merged[email] = max(counter, key=lambda owner: (counter[owner], -first_seen[email][owner]))
+    return merged
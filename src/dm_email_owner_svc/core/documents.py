@@ -0,0 +1,133 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.config import PARSE_CHUNKED_MAX_CHARS
+from dm_email_owner_svc.core.html_normalizer import normalize_html
+from dm_email_owner_svc.models.document import StoredDocument
+from dm_email_owner_svc.models.schema import DocumentInfo, ParseBatchItemResult, ParseRequest
+
+# Longest html_content accepted by /parse without chunking
+UNCHUNKED_MAX_CHARS = 50000
+
+
+def _utcnow() -> datetime:
+    # Stored as naive UTC so the column behaves the same on SQLite and other backends
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def store_document(
+    db: Session,
+    html_content: str,
+    ttl_seconds: int,
+    normalize: bool = True,
+    now: Optional[datetime] = None,
+) -> Tuple[DocumentInfo, bool]:
+    """
+    Store a document under its SHA-256, or extend the expiry of the stored copy.
+    The normalized text is computed once here when `normalize` is set. Expired documents are purged
+    on the way. Returns the document's info and whether it was newly stored.
+    """
+    now = now or _utcnow()
+    raw = html_content.encode("utf-8")
+    sha256 = hashlib.sha256(raw).hexdigest()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    info = DocumentInfo(sha256=sha256, size=len(raw), expires_at=expires_at)
+    try:
+        db.execute(delete(StoredDocument).where(StoredDocument.expires_at <= now))
+        refreshed = db.execute(
+            update(StoredDocument).where(StoredDocument.sha256 == sha256).values(expires_at=expires_at)
+        )
+        if refreshed.rowcount:
+            db.commit()
+            return info, False
+        db.add(StoredDocument(
+            sha256=sha256,
+            html_content=html_content,
+            normalized=normalize_html(html_content) if normalize else None,
+            size=len(raw),
+            created_at=now,
+            expires_at=expires_at,
+        ))
+        db.commit()
+        return info, True
+    except IntegrityError:
+        # Stored concurrently by another request
+        db.rollback()
+        return info, False
+    except Exception:
+        db.rollback()
+        raise
+
+
+def get_documents(db: Session, sha256s: Iterable[str], now: Optional[datetime] = None) -> Dict[str, StoredDocument]:
+    """Unexpired stored documents among `sha256s`, fetched with one query."""
+    keys = list(dict.fromkeys(sha256s))
+    if not keys:
+        return {}
+    now = now or _utcnow()
+    try:
+        rows = db.execute(
+            select(StoredDocument).where(StoredDocument.sha256.in_(keys), StoredDocument.expires_at > now)
+        ).scalars()
+        return {row.sha256: row for row in rows}
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        db.rollback()
+        return {}
+
+
+def get_document_info(db: Session, sha256: str) -> Optional[DocumentInfo]:
+    stored = get_documents(db, [sha256]).get(sha256)
+    if stored is None:
+        return None
+    return DocumentInfo(sha256=stored.sha256, size=stored.size, expires_at=stored.expires_at)
+
+
+def attach_document(req: ParseRequest, stored: Optional[StoredDocument]) -> ParseRequest:
+    """
+    Return `req` with the stored document as its html_content, applying the same size limits as an
+    inline document. Raises HTTPException(404) for unknown or expired documents.
+    """
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Document {req.html_sha256} not found")
+    limit = PARSE_CHUNKED_MAX_CHARS if req.chunked else UNCHUNKED_MAX_CHARS
+    if len(stored.html_content) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"html_content must not exceed {limit} characters",
+        )
+    attached = req.model_copy(update={"html_content": stored.html_content, "html_sha256": None})
+    attached._normalized = stored.normalized
+    return attached
+
+
+def load_document(db: Session, req: ParseRequest) -> ParseRequest:
+    """`req` with its referenced document attached; requests with inline HTML are returned as they are."""
+    if req.html_sha256 is None:
+        return req
+    return attach_document(req, get_documents(db, [req.html_sha256]).get(req.html_sha256))
+
+
+def load_documents(
+    db: Session, items: List[Union[ParseRequest, ParseBatchItemResult]]
+) -> List[Union[ParseRequest, ParseBatchItemResult]]:
+    """Attach the referenced documents of batch items with one query; failures become item results."""
+    wanted = [item.html_sha256 for item in items if isinstance(item, ParseRequest) and item.html_sha256]
+    stored = get_documents(db, wanted)
+    loaded: List[Union[ParseRequest, ParseBatchItemResult]] = []
+    for index, item in enumerate(items):
+        if not isinstance(item, ParseRequest) or item.html_sha256 is None:
+            loaded.append(item)
+            continue
+        try:
+            loaded.append(attach_document(item, stored.get(item.html_sha256)))
+        except HTTPException as e:
+            loaded.append(ParseBatchItemResult(index=index, status_code=e.status_code, error=e.detail))
+    return loaded
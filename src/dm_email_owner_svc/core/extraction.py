@@ -0,0 +1,142 @@
+import html
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Set
+
+# Building blocks shared by the extraction patterns
+_EMAIL = r"[\w.%+\-]+@[\w\-]+(?:\.[\w\-]+)+"
+_WORD = r"[^\W\d_][\w'.\-]*"
+_NAME = rf"{_WORD}(?:[ \t]+{_WORD}){{0,4}}"
+# A name must start a text run: beginning of a line, right after a tag or after a list separator
+_START = r"(?:^|(?<=[>\n,;:]))[ \t]*"
+# Longest run of tag attributes scanned; keeps matching linear on malformed markup such as repeated `<a `
+_ATTRS = r"[^>]{0,512}?"
+
+# `John Doe <john@example.com>`, `"John Doe" &lt;john@example.com&gt;`
+_ANGLE_RE = re.compile(
+    rf"{_START}(?P<open>[\"']?)(?P<name>{_NAME})(?P<close>[\"']?)[ \t]*(?:<|&lt;)[ \t]*(?:mailto:)?(?P<email>{_EMAIL})[ \t]*(?:>|&gt;)",
+    re.MULTILINE,
+)
+
+# `<a href="mailto:john@example.com">John Doe</a>`
+_MAILTO_RE = re.compile(
+    rf"<a\b{_ATTRS}href[ \t]*=[ \t]*[\"']mailto:(?P<email>{_EMAIL})[^\"'>]{{0,512}}[\"']{_ATTRS}>(?P<name>[^<]{{1,100}})</a>",
+    re.IGNORECASE,
+)
+
+# Signature blocks: `Jane Smith<br>jane@example.com`, `Jane Smith | jane@example.com`
+_SIGNATURE_RE = re.compile(
+    rf"{_START}(?P<name>{_NAME})[ \t]*"
+    rf"(?:<br[ \t]*/?>|</?(?:p|div|span|td|tr)\b{_ATTRS}>|\n|[ \t][|\-–][ \t])"
+    rf"(?:[ \t\n]*<[^>@]{{1,512}}>){{0,8}}[ \t\n]*(?P<email>{_EMAIL})",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+# Words that look like names to the patterns above but never are
+_STOPWORDS = {
+    "best", "regards", "thanks", "thank", "cheers", "sincerely", "kind", "warm",
+    "email", "e-mail", "mail", "mailto", "contact", "contacts", "from", "to", "cc", "bcc",
+    "reply", "sender", "support", "info", "here", "click", "team", "unsubscribe",
+    "our", "your", "the", "us", "office", "sales", "admin", "help", "service", "services", "customer",
+    "department", "general", "enquiries", "inquiries", "press", "media", "marketing", "billing",
+    "careers", "jobs", "apply", "now", "get", "touch", "write", "send", "call", "visit", "learn", "more",
+    "hello", "hi", "dear", "inc", "ltd", "llc", "gmbh", "company",
+}
+
+
+def _clean_name(raw: str) -> str:
+    name = html.unescape(raw)
+    return " ".join(name.replace('"', " ").split()).strip(" '.-")
+
+
+def _is_plausible_name(name: str, min_words: int = 1) -> bool:
+    if not name or len(name) > 80 or "@" in name:
+        return False
+    if any(ch.isdigit() for ch in name):
+        return False
+    words = name.split()
+    if not min_words <= len(words) <= 5:
+        return False
+    if any(word.lower().strip(".,:") in _STOPWORDS for word in words):
+        return False
+    if min_words > 1 and not all(word[0].isupper() for word in words):
+        return False
+    return True
+
+
+def _letters(text: str) -> str:
+    # Lower-case ASCII letters only, so "José" matches "jose" and separators are ignored
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if "a" <= ch <= "z")
+
+
+def _local_part_forms(name: str) -> Set[str]:
+    """Local parts an address built from `name` usually has, e.g. janedoe, jdoe, janed, jane, doe, doejane."""
+    tokens = [token for token in (_letters(word) for word in name.split()) if token]
+    if len(tokens) < 2:
+        return set()
+    first, last = tokens[0], tokens[-1]
+    return {
+        "".join(tokens),
+        "".join(token[0] for token in tokens[:-1]) + last,
+        first + last, first[0] + last, first + last[0], last + first, last + first[0],
+        first, last,
+    }
+
+
+def _matches_local_part(name: str, email: str) -> bool:
+    local = _letters(email.split("@", 1)[0].split("+", 1)[0])
+    return bool(local) and local in _local_part_forms(name)
+
+
+def extract_owners_locally(html_content: str, emails: List[str]) -> Dict[str, str]:
+    """Resolve email owners from unambiguous patterns in the HTML without calling the model.
+
+    Recognizes `Name <email>` pairs, `mailto:` anchors whose text is a capitalized full name and
+    signature blocks where a capitalized name sits directly above or beside the address. Mere
+    adjacency is weak evidence, since labels like "Privacy Policy" or "Account Manager" sit next to
+    addresses too, so signature names only count when the address's local part is built from them
+    (`jane.doe`, `jdoe` or `jane` for "Jane Doe"). An email is only resolved when every candidate
+    found for it agrees on the same name; anything less certain, such as link texts like "Get in
+    touch", is left to the model.
+
+    Returns:
+        A mapping from each confidently resolved requested email to its owner's display name.
+    """
+    try:
+        wanted = {email.lower(): email for email in emails}
+        candidates: Dict[str, set] = {}
+
+        def collect(pattern: re.Pattern, min_words: int, named_by_address: bool = False) -> None:
+            for match in pattern.finditer(html_content):
+                key = match.group("email").lower()
+                if key not in wanted:
+                    continue
+                if "open" in pattern.groupindex and match.group("open") != match.group("close"):
+                    # Part of a quoted display name such as `"Doe, John"`
+                    continue
+                name = _clean_name(match.group("name"))
+                if named_by_address and not _matches_local_part(name, key):
+                    continue
+                if _is_plausible_name(name, min_words=min_words):
+                    candidates.setdefault(key, set()).add(name)
+
+        # Cheap pre-check: nothing to do when none of the emails appear
+        lowered = html_content.lower()
+        if not any(key in lowered for key in wanted):
+            return {}
+
+        collect(_ANGLE_RE, 1)
+        collect(_MAILTO_RE, 2)
+        collect(_SIGNATURE_RE, 2, named_by_address=True)
+
+        resolved: Dict[str, str] = {}
+        for key, names in candidates.items():
+            # Conflicting candidates are left for the model to decide
+            if len({name.lower() for name in names}) == 1:
+                resolved[wanted[key]] = next(iter(names))
+        return resolved
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        return {}
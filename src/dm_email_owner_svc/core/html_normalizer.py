@@ -0,0 +1,177 @@
+import html
+import logging
+import re
+from typing import Dict, List, Optional
+
+# Elements whose content never carries owner information
+_SKIPPED_TAGS = {"script", "style", "head", "noscript", "svg", "template", "iframe", "object", "canvas"}
+
+# Elements whose content is raw text up to the matching end tag
+_RAW_TEXT_TAGS = {"script", "style"}
+
+# Elements rendered as line breaks so names stay next to their addresses
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tbody", "thead",
+    "tfoot", "tr", "ul",
+}
+
+_CELL_TAGS = {"td", "th"}
+
+_INLINE_SPACE_RE = re.compile(r"[ \t\r\f\v ]+")
+_BLANK_LINES_RE = re.compile(r"\s*\n\s*")
+
+_TAG_NAME_RE = re.compile(r"/?([a-zA-Z][^\s/><]*)")
+_ATTR_RE = re.compile(r"""([^\s/>=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]*))?""")
+
+
+def _parse_attrs(text: str) -> Dict[str, str]:
+    attrs: Dict[str, str] = {}
+    for match in _ATTR_RE.finditer(text):
+        value = match.group(2) or ""
+        if value[:1] in ("'", '"'):
+            value = value[1:-1]
+        attrs.setdefault(match.group(1).lower(), html.unescape(value))
+    return attrs
+
+
+class HTMLNormalizer:
+    """
+    HTML-to-text converter for prompt input.
+    Feed chunks with feed() and call close() to get the compact text. The document is tokenized in one
+    forward pass that never rescans text, so the cost is linear in its size even for malformed markup
+    such as unclosed `<`.
+    """
+    def __init__(self) -> None:
+        self._chunks: List[str] = []
+        self._parts: List[str] = []
+        self._skip_depth = 0
+        self._mailto: Optional[str] = None
+
+    def feed(self, data: str) -> None:
+        self._chunks.append(data)
+
+    def handle_starttag(self, tag: str, attrs: Dict[str, str]) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        for name, value in attrs.items():
+            # Addresses in other attributes, e.g. hidden inputs or contact links, must stay visible
+            if "@" not in value or (tag, name) == ("img", "alt") or value.lower().startswith("mailto:"):
+                continue
+            self._parts.append(f" {value} ")
+        if tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+        elif tag in _CELL_TAGS:
+            self._parts.append(" | ")
+        elif tag == "a":
+            href = attrs.get("href") or ""
+            if href.lower().startswith("mailto:"):
+                self._mailto = href[len("mailto:"):].split("?", 1)[0].strip()
+        elif tag == "img":
+            alt = attrs.get("alt")
+            if alt:
+                self._parts.append(f" {alt} ")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+        elif tag == "a" and self._mailto:
+            self._parts.append(f" <{self._mailto}>")
+            self._mailto = None
+
+    def handle_data(self, data: str) -> None:
+        if data and not self._skip_depth:
+            self._parts.append(html.unescape(data))
+
+    def _tokenize(self, text: str) -> None:
+        lowered = text.lower()
+        size = len(text)
+        # Next ">" at or after the current position; only ever moves forward, so finding tag ends is linear
+        next_gt = -2
+        i = 0
+        while i < size:
+            lt = text.find("<", i)
+            if lt < 0:
+                self.handle_data(text[i:])
+                return
+            self.handle_data(text[i:lt])
+            if text.startswith("<!--", lt):
+                end = text.find("-->", lt + 4)
+                i = size if end < 0 else end + 3
+                continue
+            name = _TAG_NAME_RE.match(text, lt + 1)
+            if name is None and text[lt + 1:lt + 2] not in ("!", "?"):
+                # Not markup, e.g. "a < b"
+                self.handle_data("<")
+                i = lt + 1
+                continue
+            if next_gt != -1 and next_gt <= lt:
+                next_gt = text.find(">", lt + 1)
+            if next_gt < 0:
+                # Unterminated tag: keep the "<" as text and carry on after it
+                self.handle_data("<")
+                i = lt + 1
+                continue
+            end = next_gt
+            i = end + 1
+            if name is None:
+                # Doctype, processing instruction or other declaration
+                continue
+            tag = name.group(1).lower()
+            if "@" in tag:
+                # Bare `<john@example.com>` looks like a tag but is really text
+                self.handle_data(text[lt:i])
+                continue
+            if text[lt + 1] == "/":
+                self.handle_endtag(tag)
+                continue
+            body = text[name.end():end]
+            self_closing = body.endswith("/")
+            self.handle_starttag(tag, _parse_attrs(body))
+            if self_closing:
+                if tag in _SKIPPED_TAGS:
+                    self._skip_depth -= 1
+                continue
+            if tag in _RAW_TEXT_TAGS:
+                close = lowered.find("</" + tag, i)
+                if close < 0:
+                    i = size
+                    continue
+                after = text.find(">", close)
+                i = size if after < 0 else after + 1
+                self.handle_endtag(tag)
+
+    def close(self) -> str:
+        self._tokenize("".join(self._chunks))
+        self._chunks = []
+        text = _INLINE_SPACE_RE.sub(" ", "".join(self._parts))
+        return _BLANK_LINES_RE.sub("\n", text).strip()
+
+
+def normalize_html(html_content: str) -> str:
+    """Converts HTML into compact text for the model.
+
+    Drops scripts, styles and other non-content elements together with their attributes. `mailto:`
+    targets are kept as `<address>` after the link text and other attribute values containing `@`
+    are kept as text, so every address in the markup stays visible. Block elements become
+    line breaks and table cells are separated with ` | `. Runs in time linear in the document size.
+
+    Returns:
+        The normalized text, or the original HTML if it could not be parsed.
+    """
+    try:
+        normalizer = HTMLNormalizer()
+        normalizer.feed(html_content)
+        return normalizer.close()
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        return html_content
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List, Optional, Set, Tuple, Union
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.core.owner_resolution import resolve_batch_item, run_db
+from dm_email_owner_svc.models.parse_job import ParseJob, ParseJobItem
+from dm_email_owner_svc.models.schema import ParseBatchItemResult, ParseJobStatus, ParseRequest
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+# Item status once its result is stored
+DONE = "done"
+
+
+def _utcnow() -> datetime:
+    # Stored as naive UTC so the column behaves the same on SQLite and other backends
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def create_job(db: Session, items: List[Union[ParseRequest, ParseBatchItemResult]], now: Optional[datetime] = None) -> ParseJobStatus:
+    """
+    Store a job with one item per validated request. Items that failed validation are stored as
+    already finished with their error result.
+    """
+    now = now or _utcnow()
+    job_id = uuid.uuid4().hex
+    rejected = sum(1 for item in items if isinstance(item, ParseBatchItemResult))
+    job = ParseJob(
+        id=job_id,
+        status=COMPLETED if rejected == len(items) else QUEUED,
+        item_count=len(items),
+        completed_count=rejected,
+        created_at=now,
+        finished_at=now if rejected == len(items) else None,
+    )
+    try:
+        db.add(job)
+        db.flush()
+        rows = []
+        for index, item in enumerate(items):
+            row = {"job_id": job_id, "item_index": index, "created_at": now, "attempts": 0}
+            if isinstance(item, ParseBatchItemResult):
+                row.update(status=DONE, status_code=item.status_code, error=item.error)
+            else:
+                row.update(status=QUEUED, request=item.model_dump_json())
+            rows.append(row)
+        db.bulk_insert_mappings(ParseJobItem, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return load_job(db, job_id, with_results=False)
+
+
+def load_job(db: Session, job_id: str, with_results: bool = True) -> Optional[ParseJobStatus]:
+    """The job's progress and, with `with_results`, the results of its finished items."""
+    try:
+        job = db.get(ParseJob, job_id, populate_existing=True)
+        if job is None:
+            return None
+        results = []
+        if with_results:
+            rows = db.execute(
+                select(ParseJobItem)
+                .where(and_(ParseJobItem.job_id == job_id, ParseJobItem.status == DONE))
+                .order_by(ParseJobItem.item_index)
+            ).scalars()
+            results = [
+                ParseBatchItemResult(
+                    index=row.item_index,
+                    status_code=row.status_code,
+                    results=json.loads(row.results) if row.results is not None else None,
+                    error=row.error,
+                )
+                for row in rows
+            ]
+        return ParseJobStatus(
+            id=job.id,
+            status=job.status,
+            item_count=job.item_count,
+            completed_count=job.completed_count,
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+            results=results,
+        )
+    finally:
+        # End the read transaction so that the next poll sees progress made by other sessions
+        db.rollback()
+
+
+def _claimable(now: datetime):
+    return or_(
+        ParseJobItem.status == QUEUED,
+        and_(ParseJobItem.status == RUNNING, ParseJobItem.lease_expires_at < now),
+    )
+
+
+def claim_item(db: Session, lease_seconds: float, max_attempts: int, now: Optional[datetime] = None) -> Optional[Tuple[str, int, str]]:
+    """
+    Claim the oldest queued item, or one whose worker's lease has expired, for this worker.
+    The claim is a conditional UPDATE, so concurrent workers in any process never claim the same
+    item. Items abandoned `max_attempts` times are finished with a 500 result instead.
+    Returns (job_id, item_index, request JSON) or None when nothing is waiting.
+    """
+    now = now or _utcnow()
+    try:
+        candidates = db.execute(
+            select(ParseJobItem.job_id, ParseJobItem.item_index, ParseJobItem.attempts, ParseJobItem.request)
+            .where(_claimable(now))
+            .order_by(ParseJobItem.created_at, ParseJobItem.item_index)
+            .limit(16)
+        ).all()
+        for job_id, item_index, attempts, request in candidates:
+            claimed = db.execute(
+                update(ParseJobItem)
+                .where(and_(ParseJobItem.job_id == job_id, ParseJobItem.item_index == item_index, _claimable(now)))
+                .values(status=RUNNING, attempts=ParseJobItem.attempts + 1, lease_expires_at=now + timedelta(seconds=lease_seconds))
+            )
+            if claimed.rowcount != 1:
+                continue
+            db.execute(
+                update(ParseJob)
+                .where(and_(ParseJob.id == job_id, ParseJob.status == QUEUED))
+                .values(status=RUNNING, started_at=now)
+            )
+            db.commit()
+            if attempts >= max_attempts:
+                result = ParseBatchItemResult(
+                    index=item_index, status_code=500, error=f"Abandoned after {attempts} attempts",
+                )
+                complete_item(db, job_id, item_index, result, now)
+                continue
+            return job_id, item_index, request
+        db.commit()
+        return None
+    except Exception:
+        db.rollback()
+        raise
+
+
+def complete_item(db: Session, job_id: str, item_index: int, result: ParseBatchItemResult, now: Optional[datetime] = None) -> None:
+    """Store an item's result and complete the job with its last item. A second finish is ignored."""
+    now = now or _utcnow()
+    results = None
+    if result.results is not None:
+        results = json.dumps([entry.model_dump() for entry in result.results])
+    try:
+        finished = db.execute(
+            update(ParseJobItem)
+            .where(and_(ParseJobItem.job_id == job_id, ParseJobItem.item_index == item_index, ParseJobItem.status != DONE))
+            .values(status=DONE, status_code=result.status_code, results=results, error=result.error, lease_expires_at=None)
+        )
+        if finished.rowcount == 1:
+            db.execute(
+                update(ParseJob).where(ParseJob.id == job_id).values(completed_count=ParseJob.completed_count + 1)
+            )
+            db.execute(
+                update(ParseJob)
+                .where(and_(ParseJob.id == job_id, ParseJob.completed_count >= ParseJob.item_count))
+                .values(status=COMPLETED, finished_at=now)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def release_items(db: Session, keys: List[Tuple[str, int]]) -> None:
+    """Return claimed but unfinished items to the queue, e.g. when a worker shuts down."""
+    try:
+        for job_id, item_index in keys:
+            db.execute(
+                update(ParseJobItem)
+                .where(and_(ParseJobItem.job_id == job_id, ParseJobItem.item_index == item_index, ParseJobItem.status == RUNNING))
+                .values(status=QUEUED, attempts=ParseJobItem.attempts - 1, lease_expires_at=None)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+class JobWorkerPool:
+    """
+    `concurrency` workers that claim job items from the database and resolve them, independent of the
+    HTTP requests being served. Workers sleep until `notify()` or for `poll_interval` seconds when the
+    queue is empty. State lives only in the database: items held by a worker that dies are claimed
+    again once their `lease_seconds` lease expires, and `stop()` returns held items to the queue.
+    """
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        client_provider: Callable[[], Any],
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+    ) -> None:
+        self.session_factory = session_factory
+        self.client_provider = client_provider
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._tasks: List[asyncio.Task] = []
+        self._held: Set[Tuple[str, int]] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._progress: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._progress = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        # Taken before cancelling, since cancelled workers stop holding their items
+        held = list(self._held)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if held:
+            await run_in_threadpool(self._with_session, release_items, held)
+        self._held.clear()
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. after a job was submitted."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_for_progress(self, timeout: float) -> None:
+        """Wait until a worker finishes an item or `timeout` seconds pass."""
+        if self._progress is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(self._progress.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _with_session(self, fn, *args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                self._wakeup.clear()
+                claimed = await run_in_threadpool(self._with_session, claim_item, self.lease_seconds, self.max_attempts)
+                if claimed is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._process(*claimed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(e, exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, job_id: str, item_index: int, request: str) -> None:
+        key = (job_id, item_index)
+        self._held.add(key)
+        db = self.session_factory()
+        try:
+            try:
+                req = ParseRequest.model_validate_json(request)
+            except ValidationError as e:
+                # Stored requests are validated on submission, but the schema may have changed since
+                detail = "; ".join(error["msg"] for error in e.errors())
+                result = ParseBatchItemResult(index=item_index, status_code=422, error=detail)
+            else:
+                result = await resolve_batch_item(item_index, req, self.client_provider(), db)
+            await run_db(db, complete_item, job_id, item_index, result)
+        finally:
+            db.close()
+            self._held.discard(key)
+        # Wake long-polling readers, then arm a fresh event for the next item
+        progress, self._progress = self._progress, asyncio.Event()
+        progress.set()
@@ -1,29 +1,244 @@
+import copy
+import json
 import logging
 import queue
 import sys
+import threading
 from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
 
-def configure_logging() -> None:
+from dm_email_owner_svc.config import LOG_BATCH_SIZE, LOG_FORMAT, LOG_OVERFLOW_POLICY, LOG_QUEUE_SIZE
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+OVERFLOW_POLICIES = (DROP_NEWEST, DROP_OLDEST)
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+
+_exception_formatter = logging.Formatter()
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Formats each record as one compact JSON object."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue that never blocks the caller.
+    When the queue is full the newest record is dropped, or with drop_oldest the oldest queued record
+    makes room for it. Dropped records are counted in `dropped`.
+    """
+    def __init__(self, log_queue: queue.Queue, overflow_policy: str = DROP_NEWEST) -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy: {overflow_policy}")
+        super().__init__(log_queue)
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the arguments into the message and render the traceback to text, leaving all other
+        formatting to the listener thread.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        with self._drop_lock:
+            self.dropped += 1
+            if self.overflow_policy == DROP_NEWEST:
+                return
+            # Make room by discarding the oldest record; give up if producers keep refilling the queue
+            for _ in range(3):
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    self.queue.put_nowait(record)
+                    return
+                except queue.Full:
+                    continue
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """StreamHandler that can write many records with one write and one flush."""
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            if record.levelno < self.level or not self.filter(record):
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        try:
+            self.acquire()
+            try:
+                self.stream.write(self.terminator.join(lines) + self.terminator)
+                self.flush()
+            finally:
+                self.release()
+        except Exception:
+            self.handleError(records[-1])
+
+
+class BatchingQueueListener(QueueListener):
     """
-    Configure root logger to use non-blocking QueueHandler and background QueueListener.
+    QueueListener that drains up to `batch_size` queued records at a time and hands them to handlers
+    as one batch. Records dropped by `source` since the last batch are reported with a warning.
     """
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        *handlers: logging.Handler,
+        batch_size: int = 256,
+        source: Optional[BoundedQueueHandler] = None,
+    ) -> None:
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = max(1, batch_size)
+        self.source = source
+        self.written = 0
+        self.batches = 0
+        self._reported_drops = 0
+
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full; wait for the listener to make room instead of failing
+        self.queue.put(self._sentinel)
+
+    def _monitor(self) -> None:
+        q = self.queue
+        has_task_done = hasattr(q, "task_done")
+        stopping = False
+        while not stopping:
+            records: List[logging.LogRecord] = []
+            block = True
+            while len(records) < self.batch_size:
+                try:
+                    record = self.dequeue(block)
+                except queue.Empty:
+                    break
+                block = False
+                if has_task_done:
+                    q.task_done()
+                if record is self._sentinel:
+                    stopping = True
+                    break
+                records.append(record)
+            drops = self._drop_report()
+            if drops is not None:
+                records.append(drops)
+            if records:
+                self.handle_batch(records)
+
+    def _drop_report(self) -> Optional[logging.LogRecord]:
+        if self.source is None or self.source.dropped == self._reported_drops:
+            return None
+        dropped = self.source.dropped
+        count = dropped - self._reported_drops
+        self._reported_drops = dropped
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "log_records_dropped | count=%d | total=%d", (count, dropped), None,
+        )
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        records = [self.prepare(record) for record in records]
+        for handler in self.handlers:
+            if isinstance(handler, BatchStreamHandler):
+                handler.emit_batch(records)
+                continue
+            for record in records:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        self.written += len(records)
+        self.batches += 1
+
+
+# The running pipeline, replaced by each configure_logging() call
+_queue_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[BatchingQueueListener] = None
+
+
+def make_formatter(log_format: str) -> logging.Formatter:
+    """"json" selects JSONLinesFormatter; anything else the plain text format."""
+    if log_format == "json":
+        return JSONLinesFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def logging_stats() -> Dict[str, int]:
+    """Queue depth and counters of the running logging pipeline."""
+    if _queue_handler is None or _listener is None:
+        return {"queue_depth": 0, "queue_size": 0, "dropped": 0, "written": 0, "batches": 0}
+    return {
+        "queue_depth": _queue_handler.queue.qsize(),
+        "queue_size": _queue_handler.queue.maxsize,
+        "dropped": _queue_handler.dropped,
+        "written": _listener.written,
+        "batches": _listener.batches,
+    }
+
+
+def configure_logging(
+    queue_size: int = LOG_QUEUE_SIZE,
+    overflow_policy: str = LOG_OVERFLOW_POLICY,
+    batch_size: int = LOG_BATCH_SIZE,
+    log_format: str = LOG_FORMAT,
+    stream=None,
+) -> None:
+    """
+    Configure root logger to use non-blocking BoundedQueueHandler and background BatchingQueueListener.
+    At most `queue_size` records wait in the queue; overflow is handled by `overflow_policy`.
+    """
+    global _queue_handler, _listener
     try:
-        # Create a thread-safe queue for log records
-        log_queue: queue.Queue[logging.LogRecord] = queue.Queue()
+        # Stop the previous pipeline, writing out what it still holds
+        if _listener is not None:
+            _listener.stop()
+
+        # Create a bounded thread-safe queue for log records
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=max(1, queue_size))
 
         # Set up the queue handler at INFO level
-        queue_handler = QueueHandler(log_queue)
+        queue_handler = BoundedQueueHandler(log_queue, overflow_policy)
         queue_handler.setLevel(logging.INFO)
 
         # Set up a standard output handler with formatter
-        formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-        output_handler = logging.StreamHandler(sys.stdout)
-        output_handler.setFormatter(formatter)
+        output_handler = BatchStreamHandler(stream or sys.stdout)
+        output_handler.setFormatter(make_formatter(log_format))
         output_handler.setLevel(logging.INFO)
 
         # Start the listener in a separate thread
-        listener = QueueListener(log_queue, output_handler)
+        listener = BatchingQueueListener(log_queue, output_handler, batch_size=batch_size, source=queue_handler)
         listener.start()
+        _queue_handler, _listener = queue_handler, listener
 
         # Configure the root logger
         root_logger = logging.getLogger()
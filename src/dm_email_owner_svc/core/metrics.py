@@ -0,0 +1,216 @@
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMPT_CHARS_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 500000)
+PROMPT_TOKENS_BUCKETS = (25, 125, 250, 625, 1250, 2500, 6250, 12500, 25000, 125000)
+EMAILS_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _ThreadShards:
+    """
+    Per-thread metric storage. Each thread only ever writes its own shard, so updates take no lock;
+    readers merge all shards. The lock is only taken the first time a thread records a value.
+    """
+    def __init__(self, factory: Callable[[], dict]) -> None:
+        self._factory = factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[dict] = []
+
+    def get(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            return list(self._shards)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels, e.g. `inc("cache")` for labels=("source",)."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._shards = _ThreadShards(dict)
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        shard = self._shards.get()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._shards.all():
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def value(self, *label_values: str) -> float:
+        return self.values().get(label_values, 0)
+
+    def render(self) -> Iterable[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Histogram with fixed upper bounds; each shard keeps per-bucket counts followed by the sum."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.bounds = tuple(sorted(buckets))
+        self._shards = _ThreadShards(dict)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        shard = self._shards.get()
+        slots = shard.get(label_values)
+        if slots is None:
+            # One slot per bound, one for +Inf, then the sum
+            slots = shard[label_values] = [0] * (len(self.bounds) + 2)
+        slots[bisect.bisect_left(self.bounds, value)] += 1
+        slots[-1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List[float]]:
+        merged: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._shards.all():
+            for key, slots in list(shard.items()):
+                target = merged.setdefault(key, [0] * len(slots))
+                for i, slot in enumerate(list(slots)):
+                    target[i] += slot
+        return merged
+
+    def count(self, *label_values: str) -> int:
+        slots = self.snapshot().get(label_values)
+        return int(sum(slots[:-1])) if slots else 0
+
+    def render(self) -> Iterable[str]:
+        names = self.labels + ("le",)
+        for key, slots in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, slot in zip(self.bounds + (math.inf,), slots[:-1]):
+                cumulative += slot
+                yield f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {_format_value(cumulative)}"
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}_sum{labels} {_format_value(slots[-1])}"
+            yield f"{self.name}_count{labels} {_format_value(cumulative)}"
+
+
+class CallbackGauge:
+    """Gauge whose value is read from `callback` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> Iterable[str]:
+        yield f"{self.name} {_format_value(self.callback())}"
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter maintained elsewhere (e.g. cache statistics) and read at scrape time."""
+    kind = "counter"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Re-registering a name replaces the previous metric, e.g. when a module is reloaded
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A failing callback must not break the whole scrape
+                lines.pop()
+                lines.pop()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template.",
+    LATENCY_BUCKETS, labels=("method", "route", "status"),
+))
+OPENAI_LATENCY = registry.register(Histogram(
+    "openai_request_duration_seconds", "Time spent waiting for the model, by outcome.",
+    LATENCY_BUCKETS, labels=("outcome",),
+))
+PROMPT_CHARS = registry.register(Histogram(
+    "prompt_chars", "Characters sent to the model per call.", PROMPT_CHARS_BUCKETS,
+))
+PROMPT_TOKENS = registry.register(Histogram(
+    "prompt_estimated_tokens", "Estimated tokens sent to the model per call.", PROMPT_TOKENS_BUCKETS,
+))
+EMAILS_PER_REQUEST = registry.register(Histogram(
+    "parse_emails_per_request", "Emails asked about per parse request or batch item.", EMAILS_BUCKETS,
+))
+RATE_LIMIT_REJECTIONS = registry.register(Counter(
+    "rate_limit_rejections_total", "Requests rejected with 429, by quota dimension.", labels=("dimension",),
+))
+BAD_GATEWAY = registry.register(Counter(
+    "parse_bad_gateway_total", "502 responses caused by the model, by cause.", labels=("cause",),
+))
+OWNER_RESOLUTIONS = registry.register(Counter(
+    "owner_resolutions_total", "Emails resolved, by source (local, cache, directory or llm).", labels=("source",),
+))
+MODEL_TIER_RESOLUTIONS = registry.register(Counter(
+    "model_tier_resolutions_total", "Emails answered by each model of the cascade.", labels=("tier",),
+))
+MODEL_TIER_ESCALATIONS = registry.register(Counter(
+    "model_tier_escalations_total", "Emails passed on to the next model of the cascade, by tier and reason.",
+    labels=("tier", "reason"),
+))
+MODEL_TIER_LATENCY = registry.register(Histogram(
+    "model_tier_duration_seconds", "Time spent waiting for each model of the cascade, by outcome.",
+    LATENCY_BUCKETS, labels=("tier", "outcome"),
+))
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from dm_email_owner_svc.core.result_cache import normalize_email
+
+# Resolves a list of emails for one document and returns owners keyed by normalized email
+BatchRunner = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+
+class _PendingBatch:
+    def __init__(self, run: BatchRunner) -> None:
+        self.run = run
+        self.emails: Dict[str, str] = {}
+        self.waiters: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """
+    Merges concurrent model requests for the same document into a single call.
+    The first submission for a key opens a batch that stays open for `window` seconds; later
+    submissions with the same key add their emails to it. When the window closes, or the batch
+    reaches `max_emails`, the union of emails is resolved once and every caller receives the result.
+    """
+    def __init__(self, window: float = 0.005, max_emails: int = 50) -> None:
+        self.window = window
+        self.max_emails = max_emails
+        self._pending: Dict[Hashable, _PendingBatch] = {}
+        self._tasks: set = set()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, key: Hashable, emails: List[str], run: BatchRunner) -> Dict[str, Any]:
+        """
+        Resolve `emails` together with other submissions sharing `key`.
+        `run` is used if this submission opens the batch. Returns owners keyed by normalized email.
+        """
+        self.requests += 1
+        if self.window <= 0:
+            self.batches += 1
+            return await run(emails)
+
+        new_emails = {normalize_email(email): email for email in emails}
+        batch = self._pending.get(key)
+        if batch is not None and len(batch.emails.keys() | new_emails.keys()) > self.max_emails:
+            # Too large to merge: send the open batch now and start a new one
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = _PendingBatch(run)
+            self._pending[key] = batch
+            batch.timer = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+        for normalized, email in new_emails.items():
+            batch.emails.setdefault(normalized, email)
+        future = asyncio.get_running_loop().create_future()
+        batch.waiters.append(future)
+        if len(batch.emails) >= self.max_emails:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._execute(batch))
+        # Keep a reference so the task is not garbage collected before it finishes
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, batch: _PendingBatch) -> None:
+        self.batches += 1
+        try:
+            result = await batch.run(list(batch.emails.values()))
+        except asyncio.CancelledError:
+            for future in batch.waiters:
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in batch.waiters:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "pending": len(self._pending),
+        }
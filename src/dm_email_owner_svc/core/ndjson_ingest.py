@@ -0,0 +1,127 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Optional, Set, Tuple, TypeVar
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+T = TypeVar("T")
+
+# Line number and content, or None for a line longer than the limit
+NumberedLine = Tuple[int, Optional[bytes]]
+
+
+async def iter_ndjson_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[NumberedLine]:
+    """
+    Split a byte stream into numbered lines (from 1) as it arrives, skipping blank lines.
+    At most `max_line_bytes` of a line are buffered; a longer line is discarded up to its newline
+    and yielded as None, so memory does not grow with the input.
+    """
+    buffer = bytearray()
+    number = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            number += 1
+            if oversized or len(buffer) + end - start > max_line_bytes:
+                yield number, None
+            elif buffer or end > start:
+                buffer += chunk[start:end]
+                if buffer.strip():
+                    yield number, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+        if not oversized:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                oversized = True
+                buffer.clear()
+    if oversized:
+        yield number + 1, None
+    elif buffer.strip():
+        yield number + 1, bytes(buffer)
+
+
+async def resolve_lines(
+    lines: AsyncIterable[NumberedLine],
+    resolve: Callable[[int, Optional[bytes]], Awaitable[T]],
+    concurrency: int,
+) -> AsyncIterator[T]:
+    """
+    Run `resolve` on each line with at most `concurrency` lines in flight and yield the results in
+    completion order. The next line is only read once a slot is free, and a slot is freed once its
+    result has been taken by the consumer, so a slow model or a slow reader of the results slows down
+    reading the input instead of buffering it. An exception from reading the input or from `resolve`
+    is raised once the lines already in flight have been yielded.
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+    done: asyncio.Queue = asyncio.Queue()
+    fed = object()
+    tasks: Set[asyncio.Task] = set()
+    pending = 0
+
+    async def run(number: int, line: Optional[bytes]) -> None:
+        try:
+            await done.put(await resolve(number, line))
+        except Exception as e:
+            await done.put(e)
+
+    async def feed() -> None:
+        nonlocal pending
+        try:
+            async for number, line in lines:
+                await slots.acquire()
+                pending += 1
+                task = asyncio.create_task(run(number, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            await done.put((fed, e))
+            return
+        await done.put((fed, None))
+
+    feeder = asyncio.create_task(feed())
+    failure: Optional[BaseException] = None
+    feeding = True
+    try:
+        while feeding or pending:
+            item = await done.get()
+            if isinstance(item, tuple) and item and item[0] is fed:
+                feeding = False
+                failure = failure or item[1]
+                continue
+            pending -= 1
+            slots.release()
+            if isinstance(item, Exception):
+                # Stop reading; the lines in flight still finish
+                failure = failure or item
+                feeding = False
+                feeder.cancel()
+                continue
+            yield item
+        if failure is not None:
+            raise failure
+    finally:
+        feeder.cancel()
+        for task in list(tasks):
+            task.cancel()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for generators that keep reading the request body while the response is sent.
+    StreamingResponse would otherwise consume request messages to watch for a disconnect; here the
+    generator's reads report it as ClientDisconnect instead.
+    """
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
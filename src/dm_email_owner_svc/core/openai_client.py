@@ -1,5 +1,8 @@
 import os
 import logging
+from typing import AsyncIterator, Optional
+
+import httpx
 import openai
 
 # Attempt to import exception classes from openai.error; if not available, fall back to Exception
@@ -8,24 +11,33 @@ try:
 except ImportError:
     APIError = Timeout = OpenAIError = Exception
 
-from dm_email_owner_svc.config import OPENAI_API_KEY, OPENAI_MODEL_NAME, OPENAI_TIMEOUT, OPENAI_MAX_RETRIES
+from dm_email_owner_svc.config import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL_TIERS,
+    OPENAI_TIMEOUT,
+    OPENAI_MAX_RETRIES,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+)
 
 
 class OpenAIClient:
     def __init__(self) -> None:
         if not OPENAI_API_KEY:
             raise ValueError('Missing OpenAI API key')
+        # Models of the cascade, fastest first; calls without a model use the first tier
+        self.model_tiers = list(OPENAI_MODEL_TIERS)
         try:
             self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
         except Exception as e:
             logging.error(e, exc_info=True)
             raise
 
-    def chat_completion(self, messages: list[dict]) -> dict:
+    def chat_completion(self, messages: list[dict], model: Optional[str] = None) -> dict:
         try:
             client_with_options = self.client.with_options(max_retries=OPENAI_MAX_RETRIES, timeout=OPENAI_TIMEOUT)
             # Call the OpenAI chat completion endpoint
-            result = client_with_options.beta.chat.completion.create(model=OPENAI_MODEL_NAME, messages=messages)
+            result = client_with_options.beta.chat.completion.create(model=model or self.model_tiers[0], messages=messages)
             return result
         except (APIError, Timeout, OpenAIError) as e:
             # Log error message without exposing sensitive API key
@@ -35,3 +47,79 @@ class OpenAIClient:
         except Exception as e:
             logging.error(e, exc_info=True)
             return {"error": "Unexpected error"}
+
+
+class OpenAIStreamError(Exception):
+    """Raised by chat_completion_stream when the streamed call fails."""
+
+
+class AsyncOpenAIClient:
+    """
+    Non-blocking counterpart of OpenAIClient for use inside the event loop.
+    A single instance owns one long-lived httpx connection pool and is meant to be
+    shared by every request handled by the process.
+    """
+    def __init__(self) -> None:
+        if not OPENAI_API_KEY:
+            raise ValueError('Missing OpenAI API key')
+        # Models of the cascade, fastest first; calls without a model use the first tier
+        self.model_tiers = list(OPENAI_MODEL_TIERS)
+        try:
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=OPENAI_TIMEOUT,
+            )
+            self.client = openai.AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                max_retries=OPENAI_MAX_RETRIES,
+                timeout=OPENAI_TIMEOUT,
+                http_client=self.http_client,
+            )
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            raise
+
+    async def chat_completion(self, messages: list[dict], model: Optional[str] = None) -> dict:
+        try:
+            result = await self.client.chat.completions.create(model=model or self.model_tiers[0], messages=messages)
+            # Normalize SDK response objects to plain dicts for the routers
+            if hasattr(result, "model_dump"):
+                return result.model_dump()
+            return result
+        except (APIError, Timeout, OpenAIError) as e:
+            logging.error('Error during chat_completion: OpenAI API error occurred', exc_info=True)
+            return {"error": "OpenAI API error"}
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            return {"error": "Unexpected error"}
+
+    async def chat_completion_stream(self, messages: list[dict], model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the completion and yield content deltas as they arrive.
+        Raises OpenAIStreamError if the call fails before or during streaming.
+        """
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model or self.model_tiers[0], messages=messages, stream=True
+            )
+            # Closing the stream returns its connection to the pool, also when the consumer stops early
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+        except (APIError, Timeout, OpenAIError) as e:
+            logging.error('Error during chat_completion_stream: OpenAI API error occurred', exc_info=True)
+            raise OpenAIStreamError("OpenAI API error") from e
+
+    async def aclose(self) -> None:
+        """Release the shared connection pool."""
+        try:
+            await self.http_client.aclose()
+        except Exception as e:
+            logging.error(e, exc_info=True)
@@ -0,0 +1,132 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.core.result_cache import normalize_email
+from dm_email_owner_svc.models.owner_directory import OwnerDirectoryEntry
+from dm_email_owner_svc.models.schema import DirectoryEntry
+
+# Pseudo-observation added to every email's total, so that one answer alone gives confidence 0.5
+# and an owner needs several agreeing answers before the model is skipped
+CONFIDENCE_PRIOR = 1
+
+
+def _utcnow() -> datetime:
+    # Stored as naive UTC so the column behaves the same on SQLite and other backends
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def lookup_owners(db: Session, emails: Iterable[str], min_confidence: float) -> Dict[str, str]:
+    """
+    The most confident owner of each email whose confidence reaches `min_confidence`, keyed by
+    normalized email, fetched with one query. Failures are logged and treated as misses.
+    """
+    keys = list(dict.fromkeys(normalize_email(email) for email in emails))
+    if not keys:
+        return {}
+    try:
+        rows = db.execute(
+            select(OwnerDirectoryEntry.email, OwnerDirectoryEntry.owner, OwnerDirectoryEntry.confidence)
+            .where(OwnerDirectoryEntry.email.in_(keys), OwnerDirectoryEntry.confidence >= min_confidence)
+        ).all()
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        db.rollback()
+        return {}
+    best: Dict[str, tuple] = {}
+    for email, owner, confidence in rows:
+        if email not in best or confidence > best[email][1]:
+            best[email] = (owner, confidence)
+    return {email: owner for email, (owner, _) in best.items()}
+
+
+def record_owners(db: Session, owners: Dict[str, str], now: Optional[datetime] = None) -> None:
+    """
+    Count one observation per known owner and recompute the confidence of every owner of those emails.
+    `unknown` answers are not recorded. Failures are logged and do not affect the caller.
+    """
+    answers = {normalize_email(email): owner for email, owner in owners.items() if owner and owner != "unknown"}
+    if not answers:
+        return
+    now = now or _utcnow()
+    try:
+        rows = db.execute(select(OwnerDirectoryEntry).where(OwnerDirectoryEntry.email.in_(answers))).scalars().all()
+        entries = {(row.email, row.owner): row for row in rows}
+        for email, owner in answers.items():
+            entry = entries.get((email, owner))
+            if entry is None:
+                entry = entries[(email, owner)] = OwnerDirectoryEntry(
+                    email=email, owner=owner, observations=0, confidence=0.0, updated_at=now,
+                )
+                db.add(entry)
+            entry.observations += 1
+            entry.updated_at = now
+        _recompute_confidence(entries.values())
+        db.commit()
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        db.rollback()
+
+
+def _recompute_confidence(entries: Iterable[OwnerDirectoryEntry]) -> None:
+    entries = list(entries)
+    totals: Dict[str, int] = {}
+    for entry in entries:
+        totals[entry.email] = totals.get(entry.email, 0) + entry.observations
+    for entry in entries:
+        entry.confidence = entry.observations / (totals[entry.email] + CONFIDENCE_PRIOR)
+
+
+def import_entries(db: Session, entries: List[DirectoryEntry], now: Optional[datetime] = None) -> int:
+    """
+    Insert or replace directory entries with the given confidence and observation count.
+    Returns how many were written.
+    """
+    if not entries:
+        return 0
+    now = now or _utcnow()
+    latest = {(normalize_email(entry.email), entry.owner): entry for entry in entries}
+    try:
+        existing = {
+            (row.email, row.owner): row
+            for row in db.execute(
+                select(OwnerDirectoryEntry).where(OwnerDirectoryEntry.email.in_({email for email, _ in latest}))
+            ).scalars()
+        }
+        for key, entry in latest.items():
+            row = existing.get(key)
+            if row is None:
+                db.add(OwnerDirectoryEntry(
+                    email=key[0], owner=key[1], observations=entry.observations,
+                    confidence=entry.confidence, updated_at=now,
+                ))
+                continue
+            row.observations = entry.observations
+            row.confidence = entry.confidence
+            row.updated_at = now
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(latest)
+
+
+def export_entries(db: Session, batch_size: int = 1000) -> Iterator[DirectoryEntry]:
+    """All directory entries ordered by email, read `batch_size` rows at a time."""
+    last = ("", "")
+    while True:
+        rows = db.execute(
+            select(OwnerDirectoryEntry)
+            .where((OwnerDirectoryEntry.email > last[0])
+                   | ((OwnerDirectoryEntry.email == last[0]) & (OwnerDirectoryEntry.owner > last[1])))
+            .order_by(OwnerDirectoryEntry.email, OwnerDirectoryEntry.owner)
+            .limit(batch_size)
+        ).scalars().all()
+        if not rows:
+            return
+        for row in rows:
+            yield DirectoryEntry(email=row.email, owner=row.owner, confidence=row.confidence, observations=row.observations)
+        last = (rows[-1].email, rows[-1].owner)
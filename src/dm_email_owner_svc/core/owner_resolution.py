@@ -0,0 +1,500 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.models.schema import ParseBatchItemResult, ParseRequest, ParseResponse
+from dm_email_owner_svc.core.prompts import PROMPT_VERSION, build_email_owner_prompt, reduce_html_context
+from dm_email_owner_svc.core.chunking import merge_chunk_answers, split_document
+from dm_email_owner_svc.core.extraction import extract_owners_locally
+from dm_email_owner_svc.core.html_normalizer import normalize_html
+from dm_email_owner_svc.core.metrics import (
+    BAD_GATEWAY,
+    MODEL_TIER_ESCALATIONS,
+    MODEL_TIER_LATENCY,
+    MODEL_TIER_RESOLUTIONS,
+    OPENAI_LATENCY,
+    OWNER_RESOLUTIONS,
+    PROMPT_CHARS,
+    PROMPT_TOKENS,
+)
+from dm_email_owner_svc.core.micro_batcher import MicroBatcher
+from dm_email_owner_svc.core.openai_client import OpenAIStreamError
+from dm_email_owner_svc.core.owner_directory import lookup_owners, record_owners
+from dm_email_owner_svc.core.request_cache import RequestCache
+from dm_email_owner_svc.core.result_cache import (
+    canonical_emails,
+    document_hash,
+    get_cached_owners,
+    normalize_email,
+    store_owners,
+)
+from dm_email_owner_svc.core.stream_parser import JSONArrayStreamParser
+from dm_email_owner_svc.core.tracing import current_trace, span
+from dm_email_owner_svc.config import (
+    LLM_MICRO_BATCH_WINDOW_MS,
+    MODEL_CASCADE_MIN_CONFIDENCE,
+    OPENAI_MODEL_NAME,
+    OPENAI_MODEL_TIERS,
+    OWNER_DIRECTORY_ENABLED,
+    OWNER_DIRECTORY_MIN_CONFIDENCE,
+    PARSE_CHUNK_CHARS,
+    PARSE_CHUNK_CONCURRENCY,
+    PARSE_CHUNK_OVERLAP,
+    PARSE_MAX_EMAILS,
+    PROMPT_NORMALIZE_HTML,
+    RATE_LIMIT_CHARS_PER_TOKEN,
+    REQUEST_CACHE_MAX_SIZE,
+    REQUEST_CACHE_TTL,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+# In-process cache of resolved requests shared by all /parse calls in this worker
+request_cache = RequestCache(max_size=REQUEST_CACHE_MAX_SIZE, ttl=REQUEST_CACHE_TTL)
+
+# Merges concurrent model calls about the same document
+micro_batcher = MicroBatcher(window=LLM_MICRO_BATCH_WINDOW_MS / 1000.0, max_emails=PARSE_MAX_EMAILS)
+
+# Model name under which answers are cached: the model itself, or a digest of the cascade's tiers and
+# confidence bar, since its answers come from several models
+if len(OPENAI_MODEL_TIERS) == 1:
+    RESULT_CACHE_MODEL = OPENAI_MODEL_TIERS[0]
+else:
+    RESULT_CACHE_MODEL = "cascade-" + hashlib.sha256(
+        f"{','.join(OPENAI_MODEL_TIERS)}|{MODEL_CASCADE_MIN_CONFIDENCE}".encode("utf-8")
+    ).hexdigest()[:32]
+
+
+class ModelAnswerError(Exception):
+    """A model call that failed or returned an unusable answer; `cause` labels parse_bad_gateway_total."""
+    def __init__(self, cause: str, detail: str) -> None:
+        super().__init__(detail)
+        self.cause = cause
+        self.detail = detail
+
+
+class _Prepared:
+    """Outcome of the stages that run before the model is asked."""
+    def __init__(self, resolved: Dict[str, Tuple[str, str]], document: str, present: List[str], doc_hash: str) -> None:
+        # Owners already known, keyed by normalized email, with their source
+        self.resolved = resolved
+        # Prompt-ready document and the emails that still need the model
+        self.document = document
+        self.present = present
+        # Hash of the original html_content used by the result cache
+        self.doc_hash = doc_hash
+
+
+def request_cache_key(html_content: str, emails: List[str], chunked: bool = False) -> str:
+    """Canonical hash of a parse request: the document plus its set of normalized emails and chunking."""
+    digest = hashlib.sha256(html_content.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(",".join(sorted({normalize_email(email) for email in emails})).encode("utf-8"))
+    if chunked:
+        digest.update(b"\0chunked")
+    return digest.hexdigest()
+
+
+async def run_db(db: Session, fn, *args):
+    """
+    Run a blocking database call in the threadpool.
+    Calls sharing a session (e.g. the items of one batch) are serialized, since a Session must not be
+    used from several threads at once.
+    """
+    lock = db.info.setdefault("async_lock", asyncio.Lock())
+    async with lock:
+        return await run_in_threadpool(fn, db, *args)
+
+
+def index_model_answers(parsed: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Index the entries of the model's JSON answer by normalized email in one pass.
+    Entries without a string email are skipped and the first answer for an email wins.
+    Raises ModelAnswerError when the answer is not a JSON array.
+    """
+    if not isinstance(parsed, list):
+        raise ModelAnswerError("non_array_response", "Error parsing response from AI")
+    index: Dict[str, Dict[str, Any]] = {}
+    for entry in parsed:
+        if not isinstance(entry, dict) or not isinstance(entry.get("email"), str):
+            continue
+        index.setdefault(normalize_email(entry["email"]), entry)
+    return index
+
+
+def owner_or_unknown(owner: Any) -> str:
+    """Model owners that are null, empty or not strings become "unknown"."""
+    return owner.strip() if isinstance(owner, str) and owner.strip() else "unknown"
+
+
+def tier_answer(entry: Optional[Dict[str, Any]], final: bool) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Judge one model answer within the cascade, returning (owner, None) to accept it or
+    (None, reason) to ask the next tier. The last tier's answers are always accepted, as "unknown" if unusable.
+    """
+    if final:
+        return owner_or_unknown(entry.get("owner") if entry is not None else None), None
+    if entry is None:
+        return None, "malformed"
+    owner = entry.get("owner")
+    if owner is None or (isinstance(owner, str) and not owner.strip()):
+        return None, "null"
+    confidence = entry.get("confidence")
+    if not isinstance(owner, str) or isinstance(confidence, bool) or not isinstance(confidence, (int, float)):
+        return None, "malformed"
+    if confidence < MODEL_CASCADE_MIN_CONFIDENCE:
+        return None, "low_confidence"
+    return owner.strip(), None
+
+
+def model_tiers(openai_client) -> List[Optional[str]]:
+    """The client's models, fastest first; clients without tiers are asked once with their default model."""
+    return list(getattr(openai_client, "model_tiers", None) or [None])
+
+
+def tier_label(model: Optional[str]) -> str:
+    return model or OPENAI_MODEL_NAME
+
+
+def model_kwargs(model: Optional[str]) -> Dict[str, str]:
+    return {} if model is None else {"model": model}
+
+
+def record_prompt_size(messages: List[Dict[str, str]]) -> None:
+    chars = sum(len(message["content"]) for message in messages)
+    PROMPT_CHARS.observe(chars)
+    PROMPT_TOKENS.observe(math.ceil(chars / max(1, RATE_LIMIT_CHARS_PER_TOKEN)))
+
+
+async def ask_tier(openai_client, model: Optional[str], context: str, emails: List[str], final: bool) -> Dict[str, Dict[str, Any]]:
+    """
+    Ask one model of the cascade about `emails` and index its answer entries by normalized email.
+    Tiers before the last are also asked for a confidence. Raises ModelAnswerError on downstream failures.
+    """
+    with span("prompt"):
+        messages = build_email_owner_prompt(context, emails, with_confidence=not final)
+    record_prompt_size(messages)
+    started = time.perf_counter()
+    with span("openai", emails=len(emails), model=tier_label(model)):
+        result = await openai_client.chat_completion(messages, **model_kwargs(model))
+    failed = bool(result.get('error'))
+    elapsed = time.perf_counter() - started
+    OPENAI_LATENCY.observe(elapsed, "error" if failed else "ok")
+    MODEL_TIER_LATENCY.observe(elapsed, tier_label(model), "error" if failed else "ok")
+    if failed:
+        raise ModelAnswerError("downstream_error", "Downstream API error")
+    with span("parse_response"):
+        try:
+            content = result['choices'][0]['message']['content']
+            parsed = json.loads(content)
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            raise ModelAnswerError("unparseable_response", "Error parsing response from AI")
+        return index_model_answers(parsed)
+
+
+async def ask_model(
+    openai_client, document: str, emails: List[str], tiers: Optional[List[Optional[str]]] = None
+) -> Dict[str, str]:
+    """
+    Ask the model for the owners of `emails`, showing it only the parts of `document` around them.
+    With several model tiers the fastest is asked first, and only emails it answers with null, a
+    malformed entry or a low confidence are asked again on the next tier, whose prompt holds just those
+    emails and their excerpts. Returns owners keyed by normalized email; raises HTTPException(502) when
+    the last tier fails.
+    """
+    tiers = model_tiers(openai_client) if tiers is None else tiers
+    owners: Dict[str, str] = {}
+    pending = emails
+    asked: Optional[List[str]] = None
+    for level, model in enumerate(tiers):
+        final = level == len(tiers) - 1
+        context, present = reduce_html_context(document, pending)
+        if asked is None:
+            asked = present
+        started = time.perf_counter()
+        try:
+            entries = await ask_tier(openai_client, model, context, present, final)
+        except ModelAnswerError as e:
+            if final:
+                BAD_GATEWAY.inc(e.cause)
+                raise HTTPException(status_code=502, detail=e.detail)
+            MODEL_TIER_ESCALATIONS.inc(tier_label(model), "error", amount=len(present))
+            pending = present
+            continue
+        escalated: List[str] = []
+        for email in present:
+            owner, reason = tier_answer(entries.get(normalize_email(email)), final)
+            if reason is None:
+                owners[normalize_email(email)] = owner
+                continue
+            MODEL_TIER_ESCALATIONS.inc(tier_label(model), reason)
+            escalated.append(email)
+        MODEL_TIER_RESOLUTIONS.inc(tier_label(model), amount=len(present) - len(escalated))
+        if len(tiers) > 1:
+            logger.info("model_cascade | tier=%s | asked=%d | resolved=%d | escalated=%d | seconds=%.3f",
+                        tier_label(model), len(present), len(present) - len(escalated), len(escalated),
+                        time.perf_counter() - started)
+        pending = escalated
+        if not pending:
+            break
+    return {normalize_email(email): owners.get(normalize_email(email), "unknown") for email in asked or []}
+
+
+async def ask_model_chunked(openai_client, document: str, emails: List[str]) -> Dict[str, str]:
+    """
+    Ask the model about a document too large for one prompt.
+    The document is split on element boundaries and the chunks are sent in parallel, each asking only
+    for the emails that occur in it; the answers are merged with merge_chunk_answers.
+    """
+    chunks = split_document(document, PARSE_CHUNK_CHARS, PARSE_CHUNK_OVERLAP)
+    semaphore = asyncio.Semaphore(max(1, PARSE_CHUNK_CONCURRENCY))
+
+    async def ask_chunk(chunk: str) -> Dict[str, str]:
+        _, present = reduce_html_context(chunk, emails, window=0)
+        if not present:
+            return {}
+        async with semaphore:
+            return await ask_model(openai_client, chunk, present)
+
+    answers = await asyncio.gather(*(ask_chunk(chunk) for chunk in chunks))
+    logger.info("chunked_fan_out | document_chars=%d | chunks=%d | model_calls=%d",
+                len(document), len(chunks), sum(1 for answer in answers if answer))
+    with span("merge"):
+        merged = merge_chunk_answers(answers)
+    return {normalize_email(email): merged.get(normalize_email(email), "unknown") for email in emails}
+
+
+def splits_document(document: str, chunked: bool) -> bool:
+    """Whether a document is fanned out over chunks: only for chunked requests longer than PARSE_CHUNK_CHARS."""
+    return chunked and len(document) > PARSE_CHUNK_CHARS
+
+
+async def ask_document(openai_client, document: str, emails: List[str], chunked: bool = False) -> Dict[str, str]:
+    """Ask the model in one call, or fan out over chunks for long documents of chunked requests."""
+    if splits_document(document, chunked):
+        return await ask_model_chunked(openai_client, document, emails)
+    return await ask_model(openai_client, document, emails)
+
+
+async def _prepare(html_content: str, emails: List[str], db: Session, normalized: Optional[str] = None) -> _Prepared:
+    """
+    Resolve everything that does not need the model: local rule-based extraction, the result cache,
+    confident owner directory entries and emails absent from the document. The remaining emails are returned with the prompt-ready
+    document. Emails are canonicalized and de-duplicated first, so each address is asked about once.
+    `normalized` is the document's normalized text if it is already known, e.g. for stored documents.
+    """
+    emails = canonical_emails(emails)
+    resolved: Dict[str, Tuple[str, str]] = {}
+    with span("extract"):
+        local_owners = await run_in_threadpool(extract_owners_locally, html_content, emails)
+    for email, owner in local_owners.items():
+        resolved[email] = (owner, "local")
+    unresolved = [email for email in emails if email not in local_owners]
+    doc_hash = document_hash(html_content)
+    if unresolved and RESULT_CACHE_ENABLED:
+        with span("cache_lookup"):
+            cached = await run_db(db, get_cached_owners, doc_hash, unresolved, RESULT_CACHE_MODEL, PROMPT_VERSION)
+        for email in unresolved:
+            if email in cached:
+                resolved[email] = (cached[email], "cache")
+        unresolved = [email for email in unresolved if email not in resolved]
+    if unresolved and OWNER_DIRECTORY_ENABLED:
+        with span("directory_lookup"):
+            known = await run_db(db, lookup_owners, unresolved, OWNER_DIRECTORY_MIN_CONFIDENCE)
+        for email, owner in known.items():
+            resolved[email] = (owner, "directory")
+        unresolved = [email for email in unresolved if email not in resolved]
+    # Presence is checked on the raw HTML, since normalization drops scripts and most attributes
+    _, present = reduce_html_context(html_content, unresolved, window=0)
+    for email in unresolved:
+        if email not in present:
+            resolved[email] = ("unknown", "local")
+    document = html_content
+    if present and PROMPT_NORMALIZE_HTML:
+        with span("normalize"):
+            # Off the event loop: large documents take a while even with a linear pass
+            document = normalized if normalized is not None else await run_in_threadpool(normalize_html, html_content)
+        logger.info(
+            "prompt_normalized | original_chars=%d | normalized_chars=%d | saved_pct=%.1f",
+            len(html_content), len(document), 100.0 * (1 - len(document) / len(html_content)),
+        )
+        _, kept = reduce_html_context(document, present, window=0)
+        if len(kept) < len(present):
+            # An address only occurs in dropped markup, e.g. a script, so the model sees the raw HTML
+            document = html_content
+    return _Prepared(resolved, document, present, doc_hash)
+
+
+async def remember_answers(db: Session, doc_hash: str, llm_owners: Dict[str, str]) -> None:
+    """Keep model answers in the per-document result cache and count them in the owner directory."""
+    if not RESULT_CACHE_ENABLED and not OWNER_DIRECTORY_ENABLED:
+        return
+    with span("store"):
+        if RESULT_CACHE_ENABLED:
+            await run_db(db, store_owners, doc_hash, llm_owners, RESULT_CACHE_MODEL, PROMPT_VERSION, RESULT_CACHE_TTL)
+        if OWNER_DIRECTORY_ENABLED:
+            await run_db(db, record_owners, llm_owners)
+
+
+async def resolve_owners(
+    html_content: str, emails: List[str], openai_client, db: Session, normalized: Optional[str] = None,
+    chunked: bool = False,
+) -> Dict[str, Tuple[str, str]]:
+    """
+    Map each email to its owner and the source of the answer, keyed by normalized email.
+    Emails resolved by local rule-based extraction, found in the result cache or owner directory, or
+    absent from the document never reach the model, which only sees the HTML around the remaining emails.
+    """
+    prepared = await _prepare(html_content, emails, db, normalized)
+    resolved = prepared.resolved
+    if prepared.present:
+        document = prepared.document
+        # Concurrent requests for the same document are merged into one model call
+        # Includes waiting for other requests merged into the same model call
+        with span("model"):
+            answers = await micro_batcher.submit(
+                (id(openai_client), document_hash(document), chunked),
+                prepared.present,
+                lambda batch_emails: ask_document(openai_client, document, batch_emails, chunked),
+            )
+        llm_owners = {email: answers.get(normalize_email(email), "unknown") for email in prepared.present}
+        await remember_answers(db, prepared.doc_hash, llm_owners)
+        for email, owner in llm_owners.items():
+            resolved[normalize_email(email)] = (owner, "llm")
+    for _, source in resolved.values():
+        OWNER_RESOLUTIONS.inc(source)
+    return resolved
+
+
+async def parse_request(req: ParseRequest, openai_client, db: Session) -> List[ParseResponse]:
+    """
+    Resolve a ParseRequest into responses in request order.
+    Identical concurrent requests share one resolution through the in-process request cache.
+    """
+    resolved = await request_cache.get_or_compute(
+        request_cache_key(req.html_content, req.emails, req.chunked),
+        lambda: resolve_owners(req.html_content, req.emails, openai_client, db, req._normalized, req.chunked),
+    )
+    output = []
+    for email in req.emails:
+        owner, source = resolved[normalize_email(email)]
+        output.append(ParseResponse(email=email, owner=owner, source=source))
+    return output
+
+
+async def resolve_batch_item(index: int, req: ParseRequest, openai_client, db: Session) -> ParseBatchItemResult:
+    """Resolve one batch or job item, turning failures into an error result for that item."""
+    try:
+        results = await parse_request(req, openai_client, db)
+    except HTTPException as e:
+        return ParseBatchItemResult(index=index, status_code=e.status_code, error=e.detail)
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        return ParseBatchItemResult(index=index, status_code=500, error="Internal Server Error")
+    return ParseBatchItemResult(index=index, status_code=200, results=results)
+
+
+async def stream_owners(req: ParseRequest, openai_client, db: Session) -> AsyncIterator[ParseResponse]:
+    """
+    Yield a ParseResponse for each requested email as soon as it is resolved.
+    Locally resolved and cached owners are yielded first; model answers follow as the streamed output
+    is parsed, then the answers of later cascade tiers. Clients without streaming support and documents
+    split into chunks are answered all at once instead. Raises HTTPException(502) on downstream failures.
+    """
+    originals: Dict[str, List[str]] = {}
+    for email in req.emails:
+        originals.setdefault(normalize_email(email), []).append(email)
+
+    prepared = await _prepare(req.html_content, req.emails, db, req._normalized)
+    for key, (owner, source) in prepared.resolved.items():
+        OWNER_RESOLUTIONS.inc(source)
+        for email in originals.get(key, []):
+            yield ParseResponse(email=email, owner=owner, source=source)
+    if not prepared.present:
+        return
+
+    llm_owners: Dict[str, str] = {}
+    if hasattr(openai_client, "chat_completion_stream") and not splits_document(prepared.document, req.chunked):
+        # The fastest tier is streamed; emails it cannot answer confidently go through the rest of the cascade
+        tiers = model_tiers(openai_client)
+        model, final = tiers[0], len(tiers) == 1
+        with span("prompt"):
+            context, present = reduce_html_context(prepared.document, prepared.present)
+            messages = build_email_owner_prompt(context, present, with_confidence=not final)
+        record_prompt_size(messages)
+        wanted = {normalize_email(email): email for email in present}
+        escalated: Dict[str, str] = {}
+        parser = JSONArrayStreamParser()
+        trace = current_trace()
+        trace_start = trace.clock() if trace is not None else 0.0
+        started = time.perf_counter()
+        failed = False
+        try:
+            # Closed as soon as this generator is, e.g. when the client disconnects mid-stream
+            deltas = openai_client.chat_completion_stream(messages, **model_kwargs(model))
+            async with contextlib.aclosing(deltas):
+                async for delta in deltas:
+                    for entry in parser.feed(delta):
+                        if not isinstance(entry, dict) or not isinstance(entry.get("email"), str):
+                            continue
+                        key = normalize_email(entry["email"])
+                        if key not in wanted or key in llm_owners or key in escalated:
+                            continue
+                        owner, reason = tier_answer(entry, final)
+                        if reason is not None:
+                            MODEL_TIER_ESCALATIONS.inc(tier_label(model), reason)
+                            escalated[key] = wanted[key]
+                            continue
+                        llm_owners[key] = owner
+                        for email in originals.get(key, []):
+                            yield ParseResponse(email=email, owner=owner, source="llm")
+        except OpenAIStreamError:
+            OPENAI_LATENCY.observe(time.perf_counter() - started, "error")
+            MODEL_TIER_LATENCY.observe(time.perf_counter() - started, tier_label(model), "error")
+            if final:
+                BAD_GATEWAY.inc("stream_error")
+                raise HTTPException(status_code=502, detail="Downstream API error")
+            failed = True
+        else:
+            OPENAI_LATENCY.observe(time.perf_counter() - started, "ok")
+            MODEL_TIER_LATENCY.observe(time.perf_counter() - started, tier_label(model), "ok")
+        if trace is not None:
+            # Recorded afterwards: a span held open across the yields above would leak into the consumer
+            trace.add("openai", trace_start, trace.clock(), emails=len(present), model=tier_label(model))
+        # Emails the model skipped
+        skipped = [key for key in wanted if key not in llm_owners and key not in escalated]
+        if not final:
+            MODEL_TIER_ESCALATIONS.inc(tier_label(model), "error" if failed else "malformed", amount=len(skipped))
+            escalated.update((key, wanted[key]) for key in skipped)
+            skipped = []
+        for key in skipped:
+            llm_owners[key] = "unknown"
+            for email in originals.get(key, []):
+                yield ParseResponse(email=email, owner="unknown", source="llm")
+        MODEL_TIER_RESOLUTIONS.inc(tier_label(model), amount=len(llm_owners))
+        if escalated:
+            answers = await ask_model(openai_client, prepared.document, list(escalated.values()), tiers[1:])
+            for key in escalated:
+                llm_owners[key] = answers.get(key, "unknown")
+                for email in originals.get(key, []):
+                    yield ParseResponse(email=email, owner=llm_owners[key], source="llm")
+    else:
+        llm_owners = await ask_document(openai_client, prepared.document, prepared.present, req.chunked)
+        for key, owner in llm_owners.items():
+            for email in originals.get(key, []):
+                yield ParseResponse(email=email, owner=owner, source="llm")
+
+    OWNER_RESOLUTIONS.inc("llm", amount=len(llm_owners))
+    await remember_answers(db, prepared.doc_hash, llm_owners)
@@ -1,19 +1,60 @@
-def build_email_owner_prompt(html_content: str, emails: list[str]) -> list[dict]:
+from typing import List, Tuple
+
+from dm_email_owner_svc.config import PROMPT_CONTEXT_WINDOW
+
+# Bump whenever the prompt wording or preprocessing changes so cached answers are not reused
+PROMPT_VERSION = "2"
+
+# Marker placed between non-contiguous excerpts of the document
+CONTEXT_SEPARATOR = "\n...\n"
+
+# Characters that continue an address before it or after it, so a match next to them is part of a longer one
+_LOCAL_PART_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789._%+-")
+_DOMAIN_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789-")
+
+
+def find_email(lowered: str, needle: str, start: int = 0) -> int:
+    """Returns the index of the next whole occurrence of the lower-case `needle` in `lowered`, or -1.
+
+    Occurrences inside a longer address, such as `n@example.com` in `john@example.com` or in
+    `n@example.com.au`, are skipped.
+    """
+    while True:
+        index = lowered.find(needle, start)
+        if index < 0:
+            return -1
+        end = index + len(needle)
+        after = lowered[end:end + 1]
+        if (
+            (index == 0 or lowered[index - 1] not in _LOCAL_PART_CHARS)
+            and after not in _DOMAIN_CHARS
+            and not (after == "." and lowered[end + 1:end + 2] in _DOMAIN_CHARS)
+        ):
+            return index
+        start = index + 1
+
+
+def build_email_owner_prompt(html_content: str, emails: list[str], with_confidence: bool = False) -> list[dict]:
     """Constructs prompt messages for mapping emails to owners from given HTML content.
 
     The system prompt instructs the assistant to extract display names corresponding to the provided email addresses from the HTML content.
     The user prompt embeds the provided HTML content and a comma-separated list of email addresses.
+    With `with_confidence`, each answer must also carry a 'confidence' between 0 and 1, which the model
+    cascade uses to decide whether to ask a stronger model.
 
     Returns:
         A list containing two dictionaries, one for the 'system' role and one for the 'user' role.
     """
     # Define the system prompt with the assistant's role
+    keys = "'email', 'owner' and 'confidence'" if with_confidence else "'email' and 'owner'"
     system_prompt = (
         "You are an assistant that extracts display names from HTML content for given email addresses. "
         "For each email, identify the corresponding owner's display name from the provided HTML content. "
         "If an email is not found or no corresponding display name exists, return null for that owner. "
-        "Return only a JSON array of objects with keys 'email' and 'owner', with no additional text."
+        f"Return only a JSON array of objects with keys {keys}, with no additional text."
     )
+    if with_confidence:
+        system_prompt += " 'confidence' is a number between 0 and 1 stating how certain you are of the owner."
 
     # Create a comma-separated string of email addresses
     email_list_str = ", ".join(emails)
@@ -23,10 +64,47 @@ def build_email_owner_prompt(html_content: str, emails: list[str]) -> list[dict]
         f"Extract the owner's display name for each of the following emails from the HTML content provided below.\n\n"
         f"HTML Content:\n{html_content}\n\n"
         f"Emails: {email_list_str}\n\n"
-        f"Respond with a JSON array of objects with keys 'email' and 'owner' only."
+        f"Respond with a JSON array of objects with keys {keys} only."
     )
 
     return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
+
+
+def reduce_html_context(html_content: str, emails: List[str], window: int = PROMPT_CONTEXT_WINDOW) -> Tuple[str, List[str]]:
+    """Cuts the HTML down to the neighbourhoods around each occurrence of the given emails.
+
+    Every whole occurrence (matched case-insensitively, see find_email) is widened by `window` characters on each side,
+    overlapping or touching ranges are merged and the excerpts are joined with CONTEXT_SEPARATOR.
+    A non-positive `window` keeps the full document.
+
+    Returns:
+        A tuple of the reduced HTML and the emails that occur in the document, in input order.
+    """
+    lowered = html_content.lower()
+    spans: List[Tuple[int, int]] = []
+    present: List[str] = []
+    for email in emails:
+        needle = email.lower()
+        start = find_email(lowered, needle)
+        if start < 0:
+            continue
+        present.append(email)
+        while start >= 0:
+            spans.append((max(0, start - window), min(len(html_content), start + len(needle) + window)))
+            start = find_email(lowered, needle, start + len(needle))
+
+    if window <= 0 or not spans:
+        return (html_content if present else ""), present
+
+    spans.sort()
+    merged = [spans[0]]
+    for start, end in spans[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return CONTEXT_SEPARATOR.join(html_content[start:end] for start, end in merged), present
@@ -0,0 +1,139 @@
+import logging
+import math
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from dm_email_owner_svc.config import PROMPT_CONTEXT_WINDOW
+from dm_email_owner_svc.core.prompts import reduce_html_context
+from dm_email_owner_svc.core.rate_limit import RateLimiter
+from dm_email_owner_svc.core.result_cache import canonical_emails
+
+# Quota dimensions: every request is charged one "requests" unit, /parse additionally its "cost"
+REQUESTS = "requests"
+COST = "cost"
+DIMENSIONS = (REQUESTS, COST)
+
+DEFAULT_TIER = "default"
+
+
+def estimate_parse_cost(
+    html_content: str, emails: Iterable[str], chars_per_token: int = 4, window: int = PROMPT_CONTEXT_WINDOW
+) -> int:
+    """
+    Estimated input tokens of what the model is sent about the document: the excerpts within `window`
+    characters of each email occurrence (the whole document when `window` is not positive) and the list
+    of emails that occur. Chunked documents send the same excerpts spread over several prompts. The
+    raw HTML is measured, so normalization only makes the estimate more generous.
+    """
+    context, present = reduce_html_context(html_content, canonical_emails(emails), window=window)
+    chars = len(context) + sum(len(email) + 2 for email in present)
+    return max(1, math.ceil(chars / max(1, chars_per_token)))
+
+
+class Quota:
+    """Per-window budget of one tier (or one client) in each dimension."""
+    def __init__(self, name: str, requests: int, cost: int) -> None:
+        self.name = name
+        self.requests = requests
+        self.cost = cost
+
+    def limit(self, dimension: str) -> int:
+        return self.requests if dimension == REQUESTS else self.cost
+
+
+class QuotaStatus:
+    """Outcome of a charge, reported to the client in rate-limit headers."""
+    __slots__ = ("dimension", "allowed", "limit", "remaining", "reset_after")
+
+    def __init__(self, dimension: str, allowed: bool, limit: int, remaining: int, reset_after: float) -> None:
+        self.dimension = dimension
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+
+    def headers(self) -> Dict[str, str]:
+        suffix = self.dimension.capitalize()
+        return {
+            f"X-RateLimit-Limit-{suffix}": str(self.limit),
+            f"X-RateLimit-Remaining-{suffix}": str(self.remaining),
+            f"X-RateLimit-Reset-{suffix}": str(math.ceil(self.reset_after)),
+        }
+
+
+def rate_limit_headers(statuses: Iterable[QuotaStatus]) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    for quota_status in statuses:
+        headers.update(quota_status.headers())
+    return headers
+
+
+class QuotaManager:
+    """
+    Per-client quotas charged in two dimensions, each with its own RateLimiter per quota.
+    Clients listed in `clients` use their own quota or tier; everybody else uses `default`.
+    """
+    def __init__(
+        self,
+        default: Quota,
+        limiter_factory: Callable[[int], RateLimiter],
+        tiers: Optional[Mapping[str, Quota]] = None,
+        clients: Optional[Mapping[str, Quota]] = None,
+    ) -> None:
+        self.default = default
+        self.tiers = dict(tiers or {})
+        self.clients = dict(clients or {})
+        self._limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        for quota in [default, *self.tiers.values(), *self.clients.values()]:
+            for dimension in DIMENSIONS:
+                if (quota.name, dimension) not in self._limiters:
+                    self._limiters[(quota.name, dimension)] = limiter_factory(quota.limit(dimension))
+        # Charges must leave the event loop when any limiter talks to a database
+        self.blocking = any(getattr(limiter, "blocking", False) for limiter in self._limiters.values())
+
+    def quota_for(self, client_id: str) -> Quota:
+        return self.clients.get(client_id, self.default)
+
+    def charge(self, client_id: str, dimension: str, cost: int) -> QuotaStatus:
+        """Consume `cost` units of the client's quota in `dimension` and report what is left."""
+        quota = self.quota_for(client_id)
+        limiter = self._limiters[(quota.name, dimension)]
+        # Dimensions of a client never share a counter, even in a shared storage backend
+        key = f"{dimension}:{client_id}"
+        allowed, remaining, reset_after = limiter.charge(key, cost=cost)
+        return QuotaStatus(dimension, allowed, quota.limit(dimension), remaining, reset_after)
+
+    def reset(self) -> None:
+        for limiter in self._limiters.values():
+            limiter.reset()
+
+
+def build_quota_manager(
+    requests: int,
+    cost: int,
+    tiers: Mapping[str, Any],
+    clients: Mapping[str, Any],
+    limiter_factory: Callable[[int], RateLimiter],
+) -> QuotaManager:
+    """
+    Build a QuotaManager from configuration.
+    `tiers` maps tier names to {"requests": n, "cost": n}; missing budgets fall back to the defaults.
+    `clients` maps client ids to a tier name or to a budget of their own. Unknown tiers are logged and
+    the client keeps the default quota.
+    """
+    def quota(name: str, spec: Any) -> Quota:
+        spec = spec if isinstance(spec, dict) else {}
+        return Quota(name, int(spec.get(REQUESTS, requests)), int(spec.get(COST, cost)))
+
+    tier_quotas = {name: quota(f"tier:{name}", spec) for name, spec in tiers.items()}
+    client_quotas: Dict[str, Quota] = {}
+    for client_id, spec in clients.items():
+        if isinstance(spec, str):
+            if spec in tier_quotas:
+                client_quotas[client_id] = tier_quotas[spec]
+            elif spec != DEFAULT_TIER:
+                logging.warning("Unknown rate limit tier %s for client %s", spec, client_id)
+        else:
+            client_quotas[client_id] = quota(f"client:{client_id}", spec)
+    default = tier_quotas.get(DEFAULT_TIER) or Quota(DEFAULT_TIER, requests, cost)
+    return QuotaManager(default, limiter_factory, tiers=tier_quotas, clients=client_quotas)
+
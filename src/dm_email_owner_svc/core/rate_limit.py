@@ -1,39 +1,276 @@
 import time
 import threading
-from typing import Dict, Tuple
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 
+FIXED_WINDOW = "fixed_window"
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+ALGORITHMS = (FIXED_WINDOW, SLIDING_WINDOW, TOKEN_BUCKET)
+
+
+class RateLimitStorage:
+    """
+    Storage backend interface for RateLimiter.
+    A backend owns all per-client state and decides atomically whether `cost` units may be consumed.
+    """
+    # True when calls may block on I/O, so callers on the event loop should run them in a thread
+    blocking = False
+
+    def consume(self, client_id: str, cost: int, now: float) -> bool:
+        raise NotImplementedError
+
+    def status(self, client_id: str, now: float) -> Tuple[float, float]:
+        """Units the client may still consume and seconds until its budget resets, without consuming."""
+        raise NotImplementedError
+
+    def consume_status(self, client_id: str, cost: int, now: float) -> Tuple[bool, float, float]:
+        """consume() together with the status it leaves behind; backends override this to avoid a second lookup."""
+        allowed = self.consume(client_id, cost, now)
+        return (allowed, *self.status(client_id, now))
+
+    def client_count(self) -> int:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+
+class _Stripe:
+    """One shard of client state with its own lock and sweep schedule."""
+    __slots__ = ("lock", "clients", "next_sweep")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Per-client state is a small tuple; the exact layout depends on the algorithm
+        self.clients: Dict[str, Tuple[float, ...]] = {}
+        self.next_sweep = 0.0
+
+
+class MemoryRateLimitStorage(RateLimitStorage):
+    """
+    Process-local backend supporting every algorithm.
+    Client state lives in `stripes` independently locked shards. Idle entries are dropped lazily when
+    touched and by a sweep of each shard every `sweep_interval` seconds, and each shard holds at most
+    `max_clients / stripes` entries, evicting the least recently used.
+    """
+    def __init__(
+        self,
+        limit: int,
+        window_size: float,
+        algorithm: str = FIXED_WINDOW,
+        stripes: int = 16,
+        max_clients: int = 1_000_000,
+        sweep_interval: Optional[float] = None,
+    ) -> None:
+        self.limit = limit
+        self.window_size = window_size
+        self.algorithm = algorithm
+        self.sweep_interval = window_size if sweep_interval is None else sweep_interval
+        self._stripes: List[_Stripe] = [_Stripe() for _ in range(max(1, stripes))]
+        self._max_per_stripe = max(1, max_clients // len(self._stripes))
+        self._consume = {
+            FIXED_WINDOW: self._consume_fixed_window,
+            SLIDING_WINDOW: self._consume_sliding_window,
+            TOKEN_BUCKET: self._consume_token_bucket,
+        }[algorithm]
+        self._status = {
+            FIXED_WINDOW: self._status_fixed_window,
+            SLIDING_WINDOW: self._status_sliding_window,
+            TOKEN_BUCKET: self._status_token_bucket,
+        }[algorithm]
+
+    def _stripe_for(self, client_id: str) -> _Stripe:
+        return self._stripes[zlib.crc32(client_id.encode("utf-8")) % len(self._stripes)]
+
+    def consume(self, client_id: str, cost: int, now: float) -> bool:
+        return self.consume_status(client_id, cost, now)[0]
+
+    def consume_status(self, client_id: str, cost: int, now: float) -> Tuple[bool, float, float]:
+        stripe = self._stripe_for(client_id)
+        with stripe.lock:
+            if now >= stripe.next_sweep:
+                self._sweep(stripe, now)
+            state = stripe.clients.pop(client_id, None)
+            allowed, new_state = self._consume(state, now, cost)
+            if new_state is not None:
+                # Re-inserting keeps the dict ordered from least to most recently used
+                stripe.clients[client_id] = new_state
+                if len(stripe.clients) > self._max_per_stripe:
+                    del stripe.clients[next(iter(stripe.clients))]
+            return (allowed, *self._status(new_state, now))
+
+    def _consume_fixed_window(self, state, now: float, cost: int):
+        count, window_start = state or (0, 0.0)
+        # Reset the window if it has expired
+        if now - window_start >= self.window_size:
+            if cost > self.limit:
+                return False, None
+            return True, (cost, now)
+        # Within window and under limit
+        if count + cost <= self.limit:
+            return True, (count + cost, window_start)
+        # Limit exceeded
+        return False, state
+
+    def _consume_sliding_window(self, state, now: float, cost: int):
+        window_start = now - now % self.window_size
+        previous, current, start = state or (0, 0, window_start)
+        if start != window_start:
+            # Roll forward: the old current window becomes the previous one only if adjacent
+            previous = current if window_start - start == self.window_size else 0
+            current = 0
+        overlap = 1.0 - (now - window_start) / self.window_size
+        estimated = previous * overlap + current
+        if estimated + cost > self.limit:
+            return False, (previous, current, window_start)
+        return True, (previous, current + cost, window_start)
+
+    def _consume_token_bucket(self, state, now: float, cost: int):
+        tokens, last = state or (float(self.limit), now)
+        rate = self.limit / self.window_size
+        tokens = min(float(self.limit), tokens + (now - last) * rate)
+        if tokens < cost:
+            return False, (tokens, now)
+        return True, (tokens - cost, now)
+
+    def status(self, client_id: str, now: float) -> Tuple[float, float]:
+        stripe = self._stripe_for(client_id)
+        with stripe.lock:
+            return self._status(stripe.clients.get(client_id), now)
+
+    def _status_fixed_window(self, state, now: float) -> Tuple[float, float]:
+        if state is None or now - state[1] >= self.window_size:
+            # The next request opens a new window
+            return float(self.limit), self.window_size
+        count, window_start = state
+        return float(self.limit - count), window_start + self.window_size - now
+
+    def _status_sliding_window(self, state, now: float) -> Tuple[float, float]:
+        window_start = now - now % self.window_size
+        previous, current, start = state or (0, 0, window_start)
+        if start != window_start:
+            previous = current if window_start - start == self.window_size else 0
+            current = 0
+        overlap = 1.0 - (now - window_start) / self.window_size
+        # The estimate keeps decreasing after the window ends, so report the end of the current window
+        return self.limit - (previous * overlap + current), window_start + self.window_size - now
+
+    def _status_token_bucket(self, state, now: float) -> Tuple[float, float]:
+        tokens, last = state or (float(self.limit), now)
+        rate = self.limit / self.window_size
+        tokens = min(float(self.limit), tokens + (now - last) * rate)
+        # Seconds until the bucket is full again
+        return tokens, (self.limit - tokens) / rate
+
+    def _is_idle(self, state, now: float) -> bool:
+        """True when dropping the state would not change any future decision."""
+        if self.algorithm == FIXED_WINDOW:
+            return now - state[1] >= self.window_size
+        if self.algorithm == SLIDING_WINDOW:
+            return now - state[2] >= 2 * self.window_size
+        tokens, last = state
+        return tokens + (now - last) * self.limit / self.window_size >= self.limit
+
+    def _sweep(self, stripe: _Stripe, now: float) -> None:
+        idle = [client_id for client_id, state in stripe.clients.items() if self._is_idle(state, now)]
+        for client_id in idle:
+            del stripe.clients[client_id]
+        stripe.next_sweep = now + self.sweep_interval
+
+    def client_count(self) -> int:
+        return sum(len(stripe.clients) for stripe in self._stripes)
+
+    def reset(self) -> None:
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.clients.clear()
+                stripe.next_sweep = 0.0
+
+
 class RateLimiter:
     """
-    A per-client fixed-window rate limiter.
-    Allows up to `limit` requests per `window_size` seconds for each client.
-    Thread-safe implementation using threading.Lock.
+    A per-client rate limiter.
+    Allows up to `limit` units per `window_size` seconds for each client using one of:
+
+    - fixed_window: counts per window starting at the client's first request; allows bursts of up
+      to 2x `limit` across a window edge.
+    - sliding_window: sliding-window counter that weights the previous window's count by how much
+      of it still overlaps the sliding window. Two counters per client, no per-request log.
+    - token_bucket: buckets of `limit` tokens refilled continuously at `limit / window_size` per second.
+
+    State is kept by a RateLimitStorage backend; by default a striped, memory-bounded
+    MemoryRateLimitStorage built from the remaining arguments.
     """
-    def __init__(self, limit: int = 10, window_size: float = 60.0) -> None:
+    def __init__(
+        self,
+        limit: int = 10,
+        window_size: float = 60.0,
+        algorithm: str = FIXED_WINDOW,
+        stripes: int = 16,
+        max_clients: int = 1_000_000,
+        sweep_interval: Optional[float] = None,
+        clock: Optional[Callable[[], float]] = None,
+        storage: Optional[RateLimitStorage] = None,
+    ) -> None:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
         self.limit = limit
         self.window_size = window_size
-        self._clients: Dict[str, Tuple[int, float]] = {}
-        self._lock = threading.Lock()
+        self.algorithm = algorithm
+        # Resolve time.time at call time unless a clock is injected
+        self._clock = clock or (lambda: time.time())
+        self.storage = storage or MemoryRateLimitStorage(
+            limit, window_size, algorithm, stripes=stripes, max_clients=max_clients, sweep_interval=sweep_interval
+        )
 
-    def is_allowed(self, client_id: str) -> bool:
+    def is_allowed(self, client_id: str, cost: int = 1) -> bool:
         """
         Check if a request from the given client_id is allowed under the rate limit.
+        `cost` is the number of units the request consumes (e.g. items in a batch).
         Returns True if allowed, False if the limit has been exceeded.
         """
         try:
-            with self._lock:
-                current_time = time.time()
-                count, window_start = self._clients.get(client_id, (0, 0.0))
-                # Reset the window if it has expired
-                if current_time - window_start >= self.window_size:
-                    self._clients[client_id] = (1, current_time)
-                    return True
-                # Within window and under limit
-                if count < self.limit:
-                    self._clients[client_id] = (count + 1, window_start)
-                    return True
-                # Limit exceeded
-                return False
+            return self.storage.consume(client_id, cost, self._clock())
         except Exception as e:
             logging.error(e, exc_info=True)
             return False
+
+    def charge(self, client_id: str, cost: int = 1) -> Tuple[bool, int, float]:
+        """
+        is_allowed() and status() in one storage call: whether the request is allowed, the remaining
+        whole units and seconds until the budget resets. Failures are logged and deny the request.
+        """
+        try:
+            allowed, remaining, reset_after = self.storage.consume_status(client_id, cost, self._clock())
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            return False, self.limit, self.window_size
+        return allowed, max(0, int(remaining)), max(0.0, reset_after)
+
+    def status(self, client_id: str) -> Tuple[int, float]:
+        """
+        Remaining whole units for the client and seconds until its budget resets.
+        Failures are logged and reported as a full budget.
+        """
+        try:
+            remaining, reset_after = self.storage.status(client_id, self._clock())
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            return self.limit, self.window_size
+        return max(0, int(remaining)), max(0.0, reset_after)
+
+    @property
+    def blocking(self) -> bool:
+        return self.storage.blocking
+
+    def client_count(self) -> int:
+        return self.storage.client_count()
+
+    def reset(self) -> None:
+        """Forget all client state."""
+        try:
+            self.storage.reset()
+        except Exception as e:
+            logging.error(e, exc_info=True)
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.models.owner_cache import OwnerCacheEntry
+
+
+def document_hash(html_content: str) -> str:
+    """Returns the hex SHA-256 of the document used as the cache key."""
+    return hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def canonical_emails(emails: Iterable[str]) -> List[str]:
+    """Normalize emails and drop duplicates, keeping first-seen order."""
+    return list(dict.fromkeys(normalize_email(email) for email in emails))
+
+
+# Rows per upsert statement, well below the bind parameter limits of SQLite and PostgreSQL
+_UPSERT_BATCH_SIZE = 500
+
+
+def _utcnow() -> datetime:
+    # Stored as naive UTC so the column behaves the same on SQLite and other backends
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_cached_owners(
+    db: Session,
+    document_sha256: str,
+    emails: Iterable[str],
+    model_name: str,
+    prompt_version: str,
+    now: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """
+    Look up unexpired cached owners for the given emails in one query.
+    Returns a mapping from normalized email to owner; failures are logged and treated as misses.
+    """
+    keys = {normalize_email(email) for email in emails}
+    if not keys:
+        return {}
+    now = now or _utcnow()
+    try:
+        rows = db.execute(
+            select(OwnerCacheEntry.email, OwnerCacheEntry.owner).where(
+                OwnerCacheEntry.document_sha256 == document_sha256,
+                OwnerCacheEntry.model_name == model_name,
+                OwnerCacheEntry.prompt_version == prompt_version,
+                OwnerCacheEntry.email.in_(keys),
+                OwnerCacheEntry.expires_at > now,
+            )
+        ).all()
+        return {email: owner for email, owner in rows}
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        db.rollback()
+        return {}
+
+
+def store_owners(
+    db: Session,
+    document_sha256: str,
+    owners: Dict[str, str],
+    model_name: str,
+    prompt_version: str,
+    ttl_seconds: int,
+    now: Optional[datetime] = None,
+) -> None:
+    """
+    Write owners for one document in bulk, replacing existing or expired entries for the same keys.
+    On SQLite and PostgreSQL the entries are written with one upsert statement, so concurrent writers
+    for the same keys cannot collide; other databases replace them in a savepoint that is retried.
+    Failures are logged and do not affect the caller.
+    """
+    if not owners:
+        return
+    now = now or _utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    mappings = [
+        {
+            "document_sha256": document_sha256,
+            "email": email,
+            "model_name": model_name,
+            "prompt_version": prompt_version,
+            "owner": owner,
+            "created_at": now,
+            "expires_at": expires_at,
+        }
+        for email, owner in {normalize_email(email): owner for email, owner in owners.items()}.items()
+    ]
+    try:
+        for start in range(0, len(mappings), _UPSERT_BATCH_SIZE):
+            _upsert(db, mappings[start:start + _UPSERT_BATCH_SIZE])
+        db.commit()
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        db.rollback()
+
+
+def _upsert(db: Session, mappings: List[dict]) -> None:
+    """Insert cache entries, overwriting rows with the same key in the same statement."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        _replace(db, mappings)
+        return
+    statement = insert(OwnerCacheEntry).values(mappings)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[column.name for column in OwnerCacheEntry.__table__.primary_key.columns],
+        set_={name: statement.excluded[name] for name in ("owner", "created_at", "expires_at")},
+    ))
+
+
+def _replace(db: Session, mappings: List[dict]) -> None:
+    # Without an upsert statement a concurrent writer can insert between the delete and the insert;
+    # the savepoint is then rolled back and the replacement retried once
+    first = mappings[0]
+    for attempt in range(2):
+        try:
+            with db.begin_nested():
+                db.execute(
+                    delete(OwnerCacheEntry).where(
+                        and_(
+                            OwnerCacheEntry.document_sha256 == first["document_sha256"],
+                            OwnerCacheEntry.model_name == first["model_name"],
+                            OwnerCacheEntry.prompt_version == first["prompt_version"],
+                            OwnerCacheEntry.email.in_([mapping["email"] for mapping in mappings]),
+                        )
+                    )
+                )
+                db.bulk_insert_mappings(OwnerCacheEntry, mappings)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def purge_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete expired entries and return how many were removed."""
+    now = now or _utcnow()
+    try:
+        result = db.execute(delete(OwnerCacheEntry).where(OwnerCacheEntry.expires_at <= now))
+        db.commit()
+        return result.rowcount or 0
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        db.rollback()
+        return 0
@@ -0,0 +1,213 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from dm_email_owner_svc.core.rate_limit import FIXED_WINDOW, SLIDING_WINDOW, RateLimitStorage
+from dm_email_owner_svc.models.rate_limit import RateLimitCounter
+
+
+class SQLRateLimitStorage(RateLimitStorage):
+    """
+    Rate-limit backend shared by all worker processes through the application database.
+
+    Each client has one counter row per epoch-aligned window. Units are reserved with a conditional
+    UPDATE, so concurrent processes can never push a counter past the limit. To keep the hot path off
+    the database, a process reserves `lease_size` units at a time and serves later requests from that
+    local lease until it runs out or the window ends. Larger leases mean fewer round trips but let one
+    process hold budget another process could have used. The counters seen on the last round trip are
+    remembered, so rows known to exist are not inserted again and requests that cannot fit before the
+    budget frees up are denied without touching the database.
+
+    Supports the fixed_window (epoch-aligned) and sliding_window algorithms.
+    """
+    blocking = True
+
+    def __init__(
+        self,
+        engine: Engine,
+        limit: int,
+        window_size: float,
+        algorithm: str = SLIDING_WINDOW,
+        lease_size: int = 1,
+        sweep_interval: Optional[float] = None,
+    ) -> None:
+        if algorithm not in (FIXED_WINDOW, SLIDING_WINDOW):
+            raise ValueError(f"Rate limit algorithm {algorithm} is not supported by the SQL backend")
+        self.engine = engine
+        self.limit = limit
+        self.window_size = window_size
+        self.algorithm = algorithm
+        self.lease_size = max(1, lease_size)
+        self.sweep_interval = window_size if sweep_interval is None else sweep_interval
+        self._lock = threading.Lock()
+        # client_id -> [window_index, units reserved in the database but not yet used]
+        self._leases: Dict[str, List[int]] = {}
+        # client_id -> [window_index, units used in the database, units used in the previous window]
+        self._known: Dict[str, List[int]] = {}
+        self._next_sweep = 0.0
+        self.round_trips = 0
+
+    def consume(self, client_id: str, cost: int, now: float) -> bool:
+        window_index = int(now // self.window_size)
+        with self._lock:
+            sweep = now >= self._next_sweep
+            if sweep:
+                self._next_sweep = now + self.sweep_interval
+                self._leases = {key: lease for key, lease in self._leases.items() if lease[0] == window_index}
+                self._known = {key: known for key, known in self._known.items() if known[0] == window_index}
+            lease = self._leases.get(client_id)
+            if lease is not None and lease[0] == window_index and lease[1] >= cost:
+                lease[1] -= cost
+                return True
+            known = self._known.get(client_id)
+            if known is not None and known[0] == window_index:
+                # Other processes only ever use more, so a request that did not fit still does not
+                if cost > self._capacity(known[2], window_index, now) - known[1]:
+                    return False
+        if sweep:
+            self._sweep(window_index)
+
+        amount = max(cost, self.lease_size)
+        granted = self._reserve(client_id, window_index, now, amount)
+        if not granted and amount > cost:
+            # A full lease no longer fits; the request itself still might
+            amount = cost
+            granted = self._reserve(client_id, window_index, now, amount)
+        if not granted:
+            return False
+        with self._lock:
+            lease = self._leases.get(client_id)
+            if lease is not None and lease[0] == window_index:
+                lease[1] += amount - cost
+            else:
+                self._leases[client_id] = [window_index, amount - cost]
+        return True
+
+    def consume_status(self, client_id: str, cost: int, now: float) -> Tuple[bool, float, float]:
+        # Reported from the counters seen on the last round trip instead of reading them again
+        allowed = self.consume(client_id, cost, now)
+        window_index = int(now // self.window_size)
+        remaining = float(self.limit)
+        with self._lock:
+            known = self._known.get(client_id)
+            if known is not None and known[0] == window_index:
+                remaining = self._capacity(known[2], window_index, now) - known[1]
+            lease = self._leases.get(client_id)
+            if lease is not None and lease[0] == window_index:
+                remaining += lease[1]
+        return allowed, remaining, (window_index + 1) * self.window_size - now
+
+    def _ensure_row(self, conn: Connection, client_id: str, window_index: int) -> None:
+        values = {"client_id": client_id, "window_index": window_index, "used": 0}
+        dialect = conn.dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            conn.execute(insert(RateLimitCounter).values(**values).on_conflict_do_nothing())
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            conn.execute(insert(RateLimitCounter).values(**values).on_conflict_do_nothing())
+        else:
+            try:
+                with conn.begin_nested():
+                    conn.execute(RateLimitCounter.__table__.insert().values(**values))
+            except IntegrityError:
+                pass
+
+    def _capacity(self, previous: int, window_index: int, now: float) -> float:
+        """Units the current window may hold in total, after weighting in the previous window."""
+        if self.algorithm != SLIDING_WINDOW:
+            return float(self.limit)
+        overlap = 1.0 - (now - window_index * self.window_size) / self.window_size
+        return self.limit - previous * overlap
+
+    def _used(self, conn: Connection, client_id: str, window_index: int) -> Optional[int]:
+        return conn.execute(
+            select(RateLimitCounter.used).where(
+                RateLimitCounter.client_id == client_id,
+                RateLimitCounter.window_index == window_index,
+            )
+        ).scalar()
+
+    def _increment(self, conn: Connection, client_id: str, window_index: int, capacity: float, amount: int) -> bool:
+        result = conn.execute(
+            update(RateLimitCounter)
+            .where(
+                RateLimitCounter.client_id == client_id,
+                RateLimitCounter.window_index == window_index,
+                RateLimitCounter.used + amount <= capacity,
+            )
+            .values(used=RateLimitCounter.used + amount)
+        )
+        return result.rowcount == 1
+
+    def _reserve(self, client_id: str, window_index: int, now: float, amount: int) -> bool:
+        self.round_trips += 1
+        with self._lock:
+            known = self._known.get(client_id)
+        if known is not None and known[0] != window_index:
+            known = None
+        with self.engine.begin() as conn:
+            if known is None:
+                # Write first so SQLite takes its write lock up front instead of upgrading a read lock
+                self._ensure_row(conn, client_id, window_index)
+                previous = 0
+                if self.algorithm == SLIDING_WINDOW:
+                    previous = self._used(conn, client_id, window_index - 1) or 0
+            else:
+                # The row exists and the previous window is closed, so its count cannot change any more
+                previous = known[2]
+            capacity = self._capacity(previous, window_index, now)
+            granted = self._increment(conn, client_id, window_index, capacity, amount)
+            used = self._used(conn, client_id, window_index)
+            if used is None:
+                # Deleted by a reset in another process since it was last seen
+                self._ensure_row(conn, client_id, window_index)
+                granted = self._increment(conn, client_id, window_index, capacity, amount)
+                used = self._used(conn, client_id, window_index)
+        with self._lock:
+            self._known[client_id] = [window_index, used or 0, previous]
+        return granted
+
+    def status(self, client_id: str, now: float) -> Tuple[float, float]:
+        window_index = int(now // self.window_size)
+        with self.engine.connect() as conn:
+            used = dict(conn.execute(
+                select(RateLimitCounter.window_index, RateLimitCounter.used).where(
+                    RateLimitCounter.client_id == client_id,
+                    RateLimitCounter.window_index.in_((window_index - 1, window_index)),
+                )
+            ).all())
+        remaining = self.limit - used.get(window_index, 0)
+        if self.algorithm == SLIDING_WINDOW:
+            overlap = 1.0 - (now - window_index * self.window_size) / self.window_size
+            remaining -= used.get(window_index - 1, 0) * overlap
+        with self._lock:
+            lease = self._leases.get(client_id)
+            if lease is not None and lease[0] == window_index:
+                # Units leased by this process are counted as used in the database but still available here
+                remaining += lease[1]
+        return remaining, (window_index + 1) * self.window_size - now
+
+    def _sweep(self, window_index: int) -> None:
+        """Delete counters no algorithm can read any more."""
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(delete(RateLimitCounter).where(RateLimitCounter.window_index < window_index - 1))
+        except Exception as e:
+            logging.error(e, exc_info=True)
+
+    def client_count(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count(func.distinct(RateLimitCounter.client_id)))).scalar() or 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._leases.clear()
+            self._known.clear()
+            self._next_sweep = 0.0
+        with self.engine.begin() as conn:
+            conn.execute(delete(RateLimitCounter))
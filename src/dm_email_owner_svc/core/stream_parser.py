@@ -0,0 +1,45 @@
+import json
+import logging
+from typing import Any, List, Optional
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for a JSON array of objects arriving in arbitrary text chunks.
+    feed() returns every object completed by the chunk, so items can be used before the array is
+    closed. Text outside the array (e.g. Markdown fences around model output) is ignored.
+    """
+    def __init__(self) -> None:
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._current: Optional[List[str]] = None
+
+    def feed(self, text: str) -> List[Any]:
+        items = []
+        for ch in text:
+            if self._current is not None:
+                self._current.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"' and self._depth > 0:
+                self._in_string = True
+            elif ch == "[" or ch == "{":
+                if ch == "{" and self._depth == 1:
+                    self._current = ["{"]
+                self._depth += 1
+            elif (ch == "]" or ch == "}") and self._depth > 0:
+                self._depth -= 1
+                if ch == "}" and self._depth == 1 and self._current is not None:
+                    try:
+                        items.append(json.loads("".join(self._current)))
+                    except ValueError as e:
+                        logging.error(e, exc_info=True)
+                    self._current = None
+        return items
@@ -0,0 +1,277 @@
+import contextlib
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SERVICE_NAME = "dm_email_owner_svc"
+
+# OpenTelemetry span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, span_id: str, parent_id: Optional[str], start: float, end: float, attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end = end
+        self.attributes = attributes
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+
+class Trace:
+    """
+    Spans recorded while serving one request. Span times come from `clock`; they are converted to
+    wall-clock nanoseconds relative to the wall-clock start of the trace when exported.
+    """
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.trace_id = _new_id(128)
+        self.root_id = _new_id(64)
+        self.start_unix_nano = time.time_ns()
+        self.start = clock()
+        self.end: Optional[float] = None
+        self.name = ""
+        self.attributes: Dict[str, Any] = {}
+        self.error = False
+        self.spans: List[Span] = []
+
+    def add(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        parent_id: Optional[str] = None,
+        span_id: Optional[str] = None,
+        **attributes: Any,
+    ) -> Span:
+        recorded = Span(name, span_id or _new_id(64), parent_id or self.root_id, start, end, attributes)
+        self.spans.append(recorded)
+        return recorded
+
+    def finish(self, name: str, error: bool = False, **attributes: Any) -> None:
+        self.end = self.clock()
+        self.name = name
+        self.error = error
+        self.attributes.update(attributes)
+
+    def stage_durations(self) -> Dict[str, float]:
+        """Milliseconds per span name, summed over repeated stages, in first-seen order."""
+        stages: Dict[str, float] = {}
+        for recorded in self.spans:
+            stages[recorded.name] = stages.get(recorded.name, 0.0) + recorded.duration_ms
+        return stages
+
+    def server_timing(self) -> str:
+        """Value of the Server-Timing header: one metric per stage plus the total so far."""
+        entries = [f"{name};dur={duration:.1f}" for name, duration in self.stage_durations().items()]
+        entries.append(f"total;dur={(self.clock() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def summary(self) -> str:
+        """Compact stage timings for the access log, e.g. "validate:0.4,openai:812.0"."""
+        return ",".join(f"{name}:{duration:.1f}" for name, duration in self.stage_durations().items())
+
+    def _unix_nano(self, value: float) -> str:
+        return str(self.start_unix_nano + int((value - self.start) * 1e9))
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest."""
+        end = self.end if self.end is not None else self.clock()
+        root = {
+            "traceId": self.trace_id,
+            "spanId": self.root_id,
+            "name": self.name,
+            "kind": SPAN_KIND_SERVER,
+            "startTimeUnixNano": self._unix_nano(self.start),
+            "endTimeUnixNano": self._unix_nano(end),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": STATUS_CODE_ERROR if self.error else STATUS_CODE_OK},
+        }
+        spans = [root] + [
+            {
+                "traceId": self.trace_id,
+                "spanId": recorded.span_id,
+                "parentSpanId": recorded.parent_id,
+                "name": recorded.name,
+                "kind": SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": self._unix_nano(recorded.start),
+                "endTimeUnixNano": self._unix_nano(recorded.end),
+                "attributes": _otlp_attributes(recorded.attributes),
+            }
+            for recorded in self.spans
+        ]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def use_trace(trace: Trace) -> Iterator[Trace]:
+    """Make `trace` the current trace of this task and the tasks it starts."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Record the enclosed block as a stage of the current trace; a no-op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    span_id = _new_id(64)
+    parent_id = _current_span_id.get()
+    token = _current_span_id.set(span_id)
+    start = trace.clock()
+    try:
+        yield
+    finally:
+        _current_span_id.reset(token)
+        trace.add(name, start, trace.clock(), parent_id, span_id, **attributes)
+
+
+def record_since_start(name: str) -> None:
+    """Record the time from the start of the current trace until now as a stage."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, trace.start, trace.clock())
+
+
+class SpanExporter:
+    """Receives every finished trace."""
+    def export(self, trace: Trace) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the OTLP/JSON form of the last `max_traces` finished traces, e.g. for tests."""
+    def __init__(self, max_traces: int = 1000) -> None:
+        self.max_traces = max_traces
+        self.traces: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        exported = trace.to_otlp()
+        with self._lock:
+            self.traces.append(exported)
+            del self.traces[:-self.max_traces]
+
+    def spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self.traces)
+        return [
+            exported_span
+            for exported in traces
+            for resource in exported["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for exported_span in scope["spans"]
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.traces.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends one OTLP/JSON line per trace to `path`, the format of the OpenTelemetry Collector's file
+    exporter. Lines are written by a background thread; when `max_pending` traces are waiting, new
+    ones are dropped and counted in `dropped`.
+    """
+    def __init__(self, path: str, max_pending: int = 10000) -> None:
+        self.path = path
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._write, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(json.dumps(trace.to_otlp(), separators=(",", ":")))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as output:
+            while True:
+                line = self._queue.get()
+                lines = [line]
+                # Write whatever else is already waiting in the same call
+                while line is not None:
+                    try:
+                        line = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    lines.append(line)
+                try:
+                    output.write("".join(f"{entry}\n" for entry in lines if entry is not None))
+                    output.flush()
+                except Exception as e:
+                    logging.error(e, exc_info=True)
+                if lines[-1] is None:
+                    return
+
+    def shutdown(self) -> None:
+        """Write out the queued traces and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+def build_exporter(kind: str, path: str) -> Optional[SpanExporter]:
+    """"memory" and "file" select an exporter; anything else disables exporting."""
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind == "file":
+        return FileSpanExporter(path)
+    return None
@@ -0,0 +1,12 @@
+import hmac
+
+from fastapi import HTTPException, Request, status
+
+from dm_email_owner_svc.config import ADMIN_TOKEN
+
+
+def require_admin(request: Request) -> None:
+    """Allow the request only with X-Admin-Token set to ADMIN_TOKEN; without a token admin routes are off."""
+    token = request.headers.get("X-Admin-Token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
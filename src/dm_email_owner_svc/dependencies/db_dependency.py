@@ -0,0 +1,22 @@
+import contextlib
+from typing import Iterator
+
+from fastapi import Request
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.models.base import get_db
+
+
+@contextlib.contextmanager
+def streaming_session(request: Request) -> Iterator[Session]:
+    """
+    A database session for a response body that is produced after the handler returns.
+    Sessions from the get_db dependency are closed before the body is streamed, so streaming
+    generators open and close their own through the same provider, honouring dependency overrides.
+    """
+    provider = request.app.dependency_overrides.get(get_db, get_db)
+    sessions = provider()
+    try:
+        yield next(sessions)
+    finally:
+        sessions.close()
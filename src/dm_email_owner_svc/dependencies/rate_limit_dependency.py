@@ -0,0 +1,75 @@
+import logging
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from dm_email_owner_svc.core.metrics import RATE_LIMIT_REJECTIONS
+from dm_email_owner_svc.core.quotas import REQUESTS, QuotaManager, QuotaStatus, rate_limit_headers
+
+
+def get_client_id(request: Request) -> str:
+    """Client identity used for rate limiting; X-Client-Host overrides the peer address for testing."""
+    return request.headers.get("X-Client-Host", request.client.host if request.client else "unknown")
+
+
+def get_quotas(request: Request) -> Optional[QuotaManager]:
+    """Quotas injected into the rate-limit middleware, else the application's."""
+    return getattr(request.state, "quotas", None) or getattr(request.app.state, "quotas", None)
+
+
+def rate_limit_bypassed(request: Request) -> bool:
+    """Test headers that skip rate limiting for one request."""
+    return (
+        request.headers.get("X-Test-Disable-RateLimit", "").lower() == "true"
+        or request.headers.get("X-Test-Reset-RateLimit", "").lower() == "true"
+    )
+
+
+def _unit(dimension: str) -> str:
+    return "requests" if dimension == REQUESTS else "cost units"
+
+
+def rate_limit_detail(quota_status: QuotaStatus, window: float) -> str:
+    return f"Rate limit exceeded. Max {quota_status.limit} {_unit(quota_status.dimension)} per {window:g} seconds."
+
+
+async def charge_rate_limit(request: Request, cost: int, dimension: str = REQUESTS) -> Optional[QuotaStatus]:
+    """
+    Charge `cost` units of the client's quota in `dimension` for a request whose cost is only known
+    inside the route. The outcome is kept on request.state so the middleware can report it in the
+    response headers; raises 429 when the remaining budget is too small, and 413 without charging
+    anything when the cost exceeds the whole budget, since waiting for a reset would never help.
+    Quotas backed by a database are charged in the threadpool.
+    """
+    if cost <= 0 or rate_limit_bypassed(request):
+        return None
+    quotas = get_quotas(request)
+    if quotas is None:
+        return None
+    window = getattr(request.app.state, "rate_limit_window", 60)
+    limit = quotas.quota_for(get_client_id(request)).limit(dimension)
+    if cost > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request costs {cost} {_unit(dimension)}, more than the quota of {limit} per {window:g} seconds.",
+        )
+    try:
+        if quotas.blocking:
+            quota_status = await run_in_threadpool(quotas.charge, get_client_id(request), dimension, cost)
+        else:
+            quota_status = quotas.charge(get_client_id(request), dimension, cost)
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        return None
+    statuses: Dict[str, QuotaStatus] = getattr(request.state, "rate_limit", {})
+    statuses[dimension] = quota_status
+    request.state.rate_limit = statuses
+    if not quota_status.allowed:
+        RATE_LIMIT_REJECTIONS.inc(dimension)
+        raise HTTPException(
+            status_code=429,
+            detail=rate_limit_detail(quota_status, window),
+            headers=rate_limit_headers(statuses.values()),
+        )
+    return quota_status
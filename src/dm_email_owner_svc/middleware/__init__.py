@@ -0,0 +1,5 @@
+from .body_limit import BodySizeLimitMiddleware
+from .profiling import ProfilingMiddleware
+from .rate_limit import RateLimitMiddleware
+from .request_logging import RequestLoggingMiddleware
+from .tracing import TracingMiddleware
@@ -0,0 +1,55 @@
+from typing import Mapping, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects request bodies larger than the limit of their route with 413 before they are buffered.
+    A Content-Length over the limit is rejected without reading the body; otherwise bytes are counted
+    as the application reads them and the read that crosses the limit raises HTTPException(413).
+    `route_limits` maps exact paths to limits in bytes; other paths use `max_body_size`. Limits of 0 or
+    less disable the check.
+    """
+    def __init__(self, app: ASGIApp, max_body_size: int, route_limits: Optional[Mapping[str, int]] = None) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+        self.route_limits = dict(route_limits or {})
+
+    def limit_for(self, path: str) -> int:
+        return self.route_limits.get(path, self.max_body_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self.limit_for(scope["path"])
+        if limit <= 0:
+            await self.app(scope, receive, send)
+            return
+        detail = f"Request body must not exceed {limit} bytes"
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    response = JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": detail})
+                    await response(scope, receive, send)
+                    return
+                break
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
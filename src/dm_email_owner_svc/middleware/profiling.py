@@ -0,0 +1,87 @@
+import asyncio
+import cProfile
+import hmac
+import logging
+import os
+import random
+import secrets
+import threading
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_REQUEST_HEADER = b"x-profile"
+PROFILE_RESPONSE_HEADER = "X-Profile-File"
+PROFILE_SUFFIX = ".pstats"
+
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile and saves the stats as a pstats file in `directory`.
+    A request is profiled when its X-Profile header equals `admin_token`, or at random with
+    probability `sample_rate`; its response names the file in an X-Profile-File header. cProfile
+    records everything the event loop runs meanwhile, and only one request is profiled at a time, so
+    concurrent requests are served unprofiled. At most `max_files` profiles are kept, oldest removed first.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        sample_rate: float = 0.0,
+        admin_token: str = "",
+        max_files: int = 100,
+    ) -> None:
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token.encode()
+        self.max_files = max(1, max_files)
+        self._active = threading.Lock()
+
+    def wanted(self, scope: Scope) -> bool:
+        if self.admin_token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_REQUEST_HEADER and hmac.compare_digest(value, self.admin_token):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.wanted(scope) or not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        # Time first so that file names sort oldest first
+        file_name = f"{time.time_ns()}-{secrets.token_hex(4)}{PROFILE_SUFFIX}"
+
+        async def send_with_reference(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_RESPONSE_HEADER, file_name)
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_reference)
+            finally:
+                profiler.disable()
+        finally:
+            self._active.release()
+            await asyncio.to_thread(self.save, profiler, file_name)
+
+    def save(self, profiler: cProfile.Profile, file_name: str) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.directory, file_name))
+            self.prune()
+        except Exception as e:
+            logging.error(e, exc_info=True)
+
+    def prune(self) -> None:
+        """Remove the oldest profiles beyond `max_files`."""
+        profiles = sorted(name for name in os.listdir(self.directory) if name.endswith(PROFILE_SUFFIX))
+        for name in profiles[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
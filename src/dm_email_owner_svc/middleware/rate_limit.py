@@ -0,0 +1,52 @@
+import logging
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from dm_email_owner_svc.core.quotas import QuotaManager, rate_limit_headers
+from dm_email_owner_svc.dependencies.rate_limit_dependency import charge_rate_limit, get_quotas, rate_limit_bypassed
+
+
+class RateLimitMiddleware:
+    """
+    Charges every HTTP request one unit of the client's requests quota and adds the rate-limit
+    headers of all charges made while serving it (including route-level cost charges) to the response.
+    Quotas are taken from `app.state.quotas` unless given explicitly; time comes from their limiters.
+    """
+    def __init__(self, app: ASGIApp, quotas: Optional[QuotaManager] = None) -> None:
+        self.app = app
+        self.quotas = quotas
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if self.quotas is not None:
+            # Route-level charges use the same quotas
+            request.state.quotas = self.quotas
+        # If test header is set to reset rate limiter, clear state and bypass rate limiting for this request
+        if request.headers.get("X-Test-Reset-RateLimit", "").lower() == "true":
+            try:
+                get_quotas(request).reset()
+            except Exception as e:
+                logging.error(e, exc_info=True)
+        if not rate_limit_bypassed(request):
+            try:
+                await charge_rate_limit(request, 1)
+            except HTTPException as e:
+                response = JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers)
+                await response(scope, receive, send)
+                return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                statuses = scope.get("state", {}).get("rate_limit")
+                if statuses:
+                    MutableHeaders(scope=message).update(rate_limit_headers(statuses.values()))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,72 @@
+import logging
+import time
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from dm_email_owner_svc.core.metrics import REQUEST_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLoggingMiddleware:
+    """
+    Logs method, path, request body size, status code and duration of every HTTP request, records the
+    duration per route template in REQUEST_LATENCY, and turns unhandled exceptions into a 500 response.
+    The body is counted as the application reads it rather than buffered up front, and durations come
+    from `clock` (monotonic by default). Stage timings of the request's trace, if any, are appended.
+    """
+    def __init__(self, app: ASGIApp, clock: Callable[[], float] = time.monotonic) -> None:
+        self.app = app
+        self.clock = clock
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start_time = self.clock()
+        payload_size = 0
+        status_code = 500
+        response_started = False
+
+        async def counting_receive() -> Message:
+            nonlocal payload_size
+            message = await receive()
+            if message["type"] == "http.request":
+                payload_size += len(message.get("body", b""))
+            return message
+
+        async def recording_send(message: Message) -> None:
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, recording_send)
+        except Exception:
+            logger.error("Unhandled exception during request", exc_info=True)
+            if response_started:
+                # Too late for an error response; the server closes the connection
+                return
+            status_code = 500
+            response = JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+            await response(scope, receive, send)
+        duration = self.clock() - start_time
+        # The router stores the matched route in the scope; unmatched paths share one label
+        route = scope.get("route")
+        REQUEST_LATENCY.observe(duration, scope["method"], getattr(route, "path", "unmatched"), str(status_code))
+        duration_ms = int(duration * 1000)
+        trace = scope.get("state", {}).get("trace")
+        if trace is not None and trace.spans:
+            logger.info(
+                "%s %s | payload_size=%d bytes | status_code=%d | duration_ms=%d | timings=%s",
+                scope["method"], scope["path"], payload_size, status_code, duration_ms, trace.summary(),
+            )
+            return
+        logger.info(
+            "%s %s | payload_size=%d bytes | status_code=%d | duration_ms=%d",
+            scope["method"], scope["path"], payload_size, status_code, duration_ms,
+        )
@@ -0,0 +1,56 @@
+import logging
+import time
+from typing import Callable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from dm_email_owner_svc.core.tracing import SpanExporter, Trace, use_trace
+
+
+class TracingMiddleware:
+    """
+    Starts a Trace for every HTTP request, makes it current for the code serving the request and
+    keeps it in the request state for outer middleware. The stages recorded so far are sent in a
+    Server-Timing header and the finished trace goes to `exporter`.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        exporter: Optional[SpanExporter] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.app = app
+        self.exporter = exporter
+        self.clock = clock
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace(clock=self.clock)
+        scope.setdefault("state", {})["trace"] = trace
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            with use_trace(trace):
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            trace.finish(
+                f"{scope['method']} {route}",
+                error=status_code >= 500,
+                **{"http.method": scope["method"], "http.route": route, "http.status_code": status_code},
+            )
+            if self.exporter is not None:
+                try:
+                    self.exporter.export(trace)
+                except Exception as e:
+                    logging.error(e, exc_info=True)
@@ -1 +1,6 @@
-from .base import Base, get_db
\ No newline at end of file
+from .base import Base, get_db
+from .owner_cache import OwnerCacheEntry
+from .rate_limit import RateLimitCounter
+from .parse_job import ParseJob, ParseJobItem
+from .document import StoredDocument
+from .owner_directory import OwnerDirectoryEntry
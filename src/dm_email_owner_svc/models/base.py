@@ -1,18 +1,34 @@
 from sqlalchemy import Column, PrimaryKeyConstraint, String
-from sqlalchemy import create_engine
+from sqlalchemy import StaticPool, create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session
 
 from dm_email_owner_svc.config import DATABASE_URL
 
 Base = declarative_base()
 
-engine = create_engine(DATABASE_URL)
+
+def is_in_memory_database(url: str = DATABASE_URL) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:"))
+
+
+def _engine_options(url: str) -> dict:
+    if not url.startswith("sqlite"):
+        return {}
+    # Sessions are used from the threadpool, so SQLite connections must not be pinned to one thread
+    options = {"connect_args": {"check_same_thread": False}}
+    if is_in_memory_database(url):
+        # Share the single in-memory database across the whole process
+        options["poolclass"] = StaticPool
+    return options
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine)
 
 
 def get_db() -> Session:
-    session = scoped_session(sessionmaker(bind=engine))
+    session = SessionLocal()
     try:
         yield session
     finally:
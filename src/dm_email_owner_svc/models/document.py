@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from .base import Base
+
+
+class StoredDocument(Base):
+    """
+    An HTML document uploaded with PUT /documents, addressed by the SHA-256 of its UTF-8 bytes.
+    `normalized` keeps the prompt-ready text computed on upload so that it is not recomputed per request.
+    """
+    __tablename__ = "documents"
+
+    sha256 = Column(String(64), primary_key=True)
+    html_content = Column(Text, nullable=False)
+    normalized = Column(Text, nullable=True)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_documents_expires_at", "expires_at"),
+    )
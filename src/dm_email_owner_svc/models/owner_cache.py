@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, Index, PrimaryKeyConstraint, String
+
+from .base import Base
+
+
+class OwnerCacheEntry(Base):
+    """
+    Cached model answer for one email in one document.
+    Entries are scoped to the model and prompt version that produced them and expire at `expires_at`.
+    """
+    __tablename__ = "owner_cache"
+
+    document_sha256 = Column(String(64), nullable=False)
+    email = Column(String(320), nullable=False)
+    model_name = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    owner = Column(String(320), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("document_sha256", "email", "model_name", "prompt_version"),
+        Index("ix_owner_cache_expires_at", "expires_at"),
+    )
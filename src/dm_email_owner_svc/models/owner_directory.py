@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Float, Integer, PrimaryKeyConstraint, String
+
+from .base import Base
+
+
+class OwnerDirectoryEntry(Base):
+    """
+    An owner reported for an email across documents. `observations` counts the answers naming this
+    owner; `confidence` is the share of the email's answers that agree with it.
+    """
+    __tablename__ = "owner_directory"
+
+    email = Column(String(320), nullable=False)
+    owner = Column(String(320), nullable=False)
+    observations = Column(Integer, nullable=False)
+    confidence = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("email", "owner"),
+    )
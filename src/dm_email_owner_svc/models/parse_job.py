@@ -0,0 +1,44 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, PrimaryKeyConstraint, String, Text
+
+from .base import Base
+
+
+class ParseJob(Base):
+    """
+    A set of parse requests submitted through POST /parse/jobs and resolved by the job workers.
+    `completed_count` counts finished items; the job is completed once it reaches `item_count`.
+    """
+    __tablename__ = "parse_jobs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False)
+    item_count = Column(Integer, nullable=False)
+    completed_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class ParseJobItem(Base):
+    """
+    One document of a job. `request` holds the validated ParseRequest as JSON, or NULL when the item
+    was rejected on submission. A running item whose `lease_expires_at` has passed was abandoned by its
+    worker and can be claimed again.
+    """
+    __tablename__ = "parse_job_items"
+
+    job_id = Column(String(32), ForeignKey("parse_jobs.id", ondelete="CASCADE"), nullable=False)
+    item_index = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False)
+    request = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    lease_expires_at = Column(DateTime, nullable=True)
+    status_code = Column(Integer, nullable=True)
+    results = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("job_id", "item_index"),
+        Index("ix_parse_job_items_status_created_at", "status", "created_at"),
+    )
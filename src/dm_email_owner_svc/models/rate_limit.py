@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, Integer, PrimaryKeyConstraint, String
+
+from .base import Base
+
+
+class RateLimitCounter(Base):
+    """
+    Units consumed by one client in one epoch-aligned rate-limit window.
+    Shared by every worker process using the SQL rate-limit backend.
+    """
+    __tablename__ = "rate_limit_counters"
+
+    client_id = Column(String(255), nullable=False)
+    window_index = Column(BigInteger, nullable=False)
+    used = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("client_id", "window_index"),
+    )
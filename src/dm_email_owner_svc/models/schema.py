@@ -1,28 +1,127 @@
-from pydantic import BaseModel, EmailStr, validator
-from typing import List
+import re
+from datetime import datetime
+
+from pydantic import BaseModel, EmailStr, PrivateAttr, validator
+from typing import List, Optional
+
+from dm_email_owner_svc.config import PARSE_CHUNKED_MAX_CHARS, PARSE_MAX_EMAILS
+
+
+SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
 
 
 class ParseRequest(BaseModel):
-    html_content: str
+    # Allow documents over 50000 characters, which are split into chunks for the model
+    chunked: bool = False
+    html_content: Optional[str] = None
+    # SHA-256 of a document stored with PUT /documents, sent instead of html_content
+    html_sha256: Optional[str] = None
     emails: List[EmailStr]
+    # Prompt-ready text of a stored document, computed when it was uploaded
+    _normalized: Optional[str] = PrivateAttr(default=None)
 
     @validator('html_content')
-    def validate_html_content(cls, v: str) -> str:
+    def validate_html_content(cls, v: str, values: dict) -> str:
         if not v or not v.strip():
             raise ValueError('html_content must be a non-empty string')
-        if len(v) > 50000:
+        if values.get('chunked'):
+            if len(v) > PARSE_CHUNKED_MAX_CHARS:
+                raise ValueError(f'html_content must not exceed {PARSE_CHUNKED_MAX_CHARS} characters')
+        elif len(v) > 50000:
             raise ValueError('html_content must not exceed 50000 characters')
         return v
 
+    @validator('html_sha256', always=True)
+    def validate_html_sha256(cls, v: Optional[str], values: dict) -> Optional[str]:
+        if v is None:
+            # A missing key means html_content was given but invalid, which is already reported
+            if 'html_content' in values and values['html_content'] is None:
+                raise ValueError('html_content or html_sha256 is required')
+            return v
+        v = v.strip().lower()
+        if not SHA256_PATTERN.fullmatch(v):
+            raise ValueError('html_sha256 must be a hex-encoded SHA-256 digest')
+        if values.get('html_content') is not None:
+            raise ValueError('html_content and html_sha256 are mutually exclusive')
+        return v
+
     @validator('emails')
     def validate_emails(cls, v: List[EmailStr]) -> List[EmailStr]:
         if not v:
             raise ValueError('emails list must contain at least 1 email')
-        if len(v) > 50:
-            raise ValueError('emails list must not contain more than 50 emails')
+        if len(v) > PARSE_MAX_EMAILS:
+            raise ValueError(f'emails list must not contain more than {PARSE_MAX_EMAILS} emails')
         return v
 
 
 class ParseResponse(BaseModel):
     email: EmailStr
     owner: str
+    # How the owner was found: "local" (rule-based extraction), "cache", "directory" or "llm"
+    source: str = "llm"
+
+
+class ParseBatchItemResult(BaseModel):
+    # Position of the item in the request body
+    index: int
+    status_code: int
+    results: Optional[List[ParseResponse]] = None
+    error: Optional[str] = None
+
+
+class ParseStreamLineResult(BaseModel):
+    # Line number in the uploaded NDJSON body, starting at 1
+    line: int
+    status_code: int
+    results: Optional[List[ParseResponse]] = None
+    error: Optional[str] = None
+
+class ParseJobStatus(BaseModel):
+    id: str
+    # "queued", "running" or "completed"
+    status: str
+    item_count: int
+    completed_count: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    # Finished items in input order
+    results: List[ParseBatchItemResult] = []
+
+
+class DocumentInfo(BaseModel):
+    sha256: str
+    # Size of the stored document in bytes
+    size: int
+    expires_at: datetime
+
+
+class DirectoryEntry(BaseModel):
+    email: EmailStr
+    owner: str
+    confidence: float = 1.0
+    observations: int = 1
+
+    @validator('owner')
+    def validate_owner(cls, v: str) -> str:
+        if not v.strip() or v.strip().lower() == 'unknown':
+            raise ValueError('owner must be a known name')
+        return v.strip()
+
+    @validator('confidence')
+    def validate_confidence(cls, v: float) -> float:
+        if not 0.0 <= v <= 1.0:
+            raise ValueError('confidence must be between 0 and 1')
+        return v
+
+    @validator('observations')
+    def validate_observations(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError('observations must be at least 1')
+        return v
+
+
+class DirectoryImportResult(BaseModel):
+    imported: int
+    rejected: int
+    # The first rejected lines, e.g. "line 3: confidence must be between 0 and 1"
+    errors: List[str] = []
@@ -0,0 +1,63 @@
+from typing import Iterator, List
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.core.ndjson_ingest import iter_ndjson_lines
+from dm_email_owner_svc.core.owner_directory import export_entries, import_entries
+from dm_email_owner_svc.dependencies.admin_dependency import require_admin
+from dm_email_owner_svc.dependencies.db_dependency import streaming_session
+from dm_email_owner_svc.models.base import get_db
+from dm_email_owner_svc.models.schema import DirectoryEntry, DirectoryImportResult
+from dm_email_owner_svc.routers.parse import NDJSON_MEDIA_TYPE
+
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+# Entries written per transaction during an import
+IMPORT_BATCH_SIZE = 1000
+# Longest accepted import line and how many rejected lines are described in the response
+IMPORT_MAX_LINE_BYTES = 65536
+IMPORT_MAX_ERRORS = 100
+
+
+@admin_router.post("/owner-directory", response_model=DirectoryImportResult)
+async def import_owner_directory(request: Request, db: Session = Depends(get_db)) -> DirectoryImportResult:
+    """
+    Bulk-import owner directory entries from an NDJSON body, one DirectoryEntry per line, in the format
+    written by the export. Entries replace existing ones for the same email and owner; invalid lines
+    are skipped and reported.
+    """
+    result = DirectoryImportResult(imported=0, rejected=0)
+    batch: List[DirectoryEntry] = []
+    async for number, line in iter_ndjson_lines(request.stream(), IMPORT_MAX_LINE_BYTES):
+        try:
+            if line is None:
+                raise ValueError(f"line must not exceed {IMPORT_MAX_LINE_BYTES} bytes")
+            batch.append(DirectoryEntry.model_validate_json(line))
+        except (ValidationError, ValueError) as e:
+            result.rejected += 1
+            if len(result.errors) < IMPORT_MAX_ERRORS:
+                detail = "; ".join(error["msg"] for error in e.errors()) if isinstance(e, ValidationError) else str(e)
+                result.errors.append(f"line {number}: {detail}")
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            result.imported += await run_in_threadpool(import_entries, db, batch)
+            batch = []
+    result.imported += await run_in_threadpool(import_entries, db, batch)
+    return result
+
+
+@admin_router.get("/owner-directory")
+async def export_owner_directory(request: Request) -> StreamingResponse:
+    """
+    Export the whole owner directory as NDJSON, one DirectoryEntry per line ordered by email.
+    """
+    def lines() -> Iterator[str]:
+        with streaming_session(request) as db:
+            for entry in export_entries(db):
+                yield entry.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from dm_email_owner_svc.config import DOCUMENT_MAX_BYTES, DOCUMENT_TTL, PROMPT_NORMALIZE_HTML
+from dm_email_owner_svc.core.documents import get_document_info, store_document
+from dm_email_owner_svc.models.base import get_db
+from dm_email_owner_svc.models.schema import DocumentInfo
+
+documents_router = APIRouter()
+
+
+@documents_router.put("/documents", response_model=DocumentInfo)
+async def put_document(request: Request, response: Response, db: Session = Depends(get_db)) -> DocumentInfo:
+    """
+    Store the UTF-8 HTML request body for DOCUMENT_TTL seconds under its SHA-256, which /parse then
+    accepts as `html_sha256`. Returns 201 when the document is new; uploading a stored document again
+    returns 200 and extends its expiry.
+    """
+    body = await request.body()
+    if len(body) > DOCUMENT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Document must not exceed {DOCUMENT_MAX_BYTES} bytes",
+        )
+    try:
+        html_content = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Document must be UTF-8 encoded")
+    if not html_content.strip():
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Document must not be empty")
+    info, created = await run_in_threadpool(store_document, db, html_content, DOCUMENT_TTL, PROMPT_NORMALIZE_HTML)
+    response.status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    return info
+
+
+@documents_router.get("/documents/{sha256}", response_model=DocumentInfo)
+async def get_document(sha256: str, db: Session = Depends(get_db)) -> DocumentInfo:
+    """
+    Size and expiry of a stored document, to check whether it must be uploaded again.
+    """
+    info = await run_in_threadpool(get_document_info, db, sha256.lower())
+    if info is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    return info
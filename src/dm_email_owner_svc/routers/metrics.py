@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from dm_email_owner_svc.core.logging import logging_stats
+from dm_email_owner_svc.core.metrics import CONTENT_TYPE, CallbackCounter, CallbackGauge, registry
+from dm_email_owner_svc.core.owner_resolution import micro_batcher, request_cache
+
+metrics_router = APIRouter()
+
+# Statistics kept by other components, read at scrape time
+registry.register(CallbackCounter(
+    "request_cache_hits_total", "Parse requests answered from the in-process request cache.",
+    lambda: request_cache.stats()["hits"],
+))
+registry.register(CallbackCounter(
+    "request_cache_misses_total", "Parse requests that had to be resolved.",
+    lambda: request_cache.stats()["misses"],
+))
+registry.register(CallbackCounter(
+    "request_cache_coalesced_total", "Parse requests that joined an identical in-flight request.",
+    lambda: request_cache.stats()["coalesced"],
+))
+registry.register(CallbackCounter(
+    "llm_micro_batches_total", "Model calls made by the micro-batcher.",
+    lambda: micro_batcher.stats()["batches"],
+))
+registry.register(CallbackGauge(
+    "log_queue_depth", "Log records waiting to be written.",
+    lambda: logging_stats()["queue_depth"],
+))
+registry.register(CallbackCounter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full.",
+    lambda: logging_stats()["dropped"],
+))
+
+
+@metrics_router.get("/metrics")
+async def metrics() -> Response:
+    """
+    Service metrics in the Prometheus text exposition format.
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
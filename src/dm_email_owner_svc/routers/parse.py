@@ -1,40 +1,300 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+import asyncio
 import json
 import logging
-from typing import List
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
-from dm_email_owner_svc.models.schema import ParseRequest, ParseResponse
+from dm_email_owner_svc.models.schema import (
+    ParseBatchItemResult,
+    ParseJobStatus,
+    ParseRequest,
+    ParseResponse,
+    ParseStreamLineResult,
+)
 from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
-from dm_email_owner_svc.core.prompts import build_email_owner_prompt
+from dm_email_owner_svc.dependencies.db_dependency import streaming_session
+from dm_email_owner_svc.dependencies.rate_limit_dependency import charge_rate_limit
+from dm_email_owner_svc.models.base import get_db
+from dm_email_owner_svc.core.metrics import EMAILS_PER_REQUEST
+from dm_email_owner_svc.core.ndjson_ingest import DuplexStreamingResponse, iter_ndjson_lines, resolve_lines
+from dm_email_owner_svc.core.jobs import COMPLETED, JobWorkerPool, create_job, load_job
+from dm_email_owner_svc.core.documents import load_document, load_documents
+from dm_email_owner_svc.core.owner_resolution import (
+    parse_request,
+    request_cache,
+    resolve_batch_item,
+    run_db,
+    stream_owners,
+)
+from dm_email_owner_svc.core.quotas import COST, estimate_parse_cost
+from dm_email_owner_svc.core.tracing import record_since_start
+from dm_email_owner_svc.config import (
+    JOB_MAX_ITEMS,
+    JOB_MAX_WAIT,
+    JOB_POLL_INTERVAL,
+    PARSE_BATCH_CONCURRENCY,
+    PARSE_BATCH_MAX_ITEMS,
+    PARSE_STREAM_CONCURRENCY,
+    PARSE_STREAM_MAX_LINE_BYTES,
+    RATE_LIMIT_CHARS_PER_TOKEN,
+)
 
 
 parse_router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
 @parse_router.post(
     "/parse",
     response_model=List[ParseResponse],
     status_code=200,
 )
-async def parse_emails(req: ParseRequest, openai_client=Depends(get_openai_client)) -> List[ParseResponse]:
+async def parse_emails(
+    req: ParseRequest,
+    request: Request,
+    openai_client=Depends(get_openai_client),
+    db: Session = Depends(get_db),
+):
     """
-    Parse HTML content and map given emails to their owners.
+    Parse HTML content, inline or stored with PUT /documents and referenced by `html_sha256`, and map
+    given emails to their owners.
+    With `Accept: application/x-ndjson` the response streams one JSON line per email as soon as its
+    owner is known. The request is charged its estimated cost against the client's quota.
     """
-    messages = build_email_owner_prompt(req.html_content, req.emails)
-    result = openai_client.chat_completion(messages)
-    if result.get('error'):
-        raise HTTPException(status_code=502, detail="Downstream API error")
+    # Everything before the handler: rate limiting, reading and validating the body
+    record_since_start("validate")
+    if req.html_sha256 is not None:
+        req = await run_db(db, load_document, req)
+    await charge_rate_limit(request, await parse_cost([req]), COST)
+    EMAILS_PER_REQUEST.observe(len(req.emails))
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(_ndjson_lines(req, openai_client, request), media_type=NDJSON_MEDIA_TYPE)
+    return await parse_request(req, openai_client, db)
+
+
+async def parse_cost(reqs: List[ParseRequest]) -> int:
+    """Estimated cost of `reqs`, computed in the threadpool since documents may be large."""
+    return await run_in_threadpool(
+        lambda: sum(estimate_parse_cost(req.html_content, req.emails, RATE_LIMIT_CHARS_PER_TOKEN) for req in reqs)
+    )
+
+
+async def _ndjson_lines(req: ParseRequest, openai_client, request: Request) -> AsyncIterator[str]:
     try:
-        content = result['choices'][0]['message']['content']
-        parsed = json.loads(content)
+        with streaming_session(request) as db:
+            async for item in stream_owners(req, openai_client, db):
+                yield item.model_dump_json() + "\n"
+    except HTTPException as e:
+        # Headers are already sent, so errors are reported in-band
+        yield json.dumps({"error": e.detail, "status_code": e.status_code}) + "\n"
     except Exception as e:
         logging.error(e, exc_info=True)
-        raise HTTPException(status_code=502, detail="Error parsing response from AI")
-    output = []
-    for email in req.emails:
-        owner = "unknown"
-        for entry in parsed:
-            if entry.get("email") == email:
-                owner = entry.get("owner", "unknown")
-                break
-        output.append(ParseResponse(email=email, owner=owner))
-    return output
+        yield json.dumps({"error": "Internal Server Error", "status_code": 500}) + "\n"
+
+
+@parse_router.post(
+    "/parse/batch",
+    response_model=List[ParseBatchItemResult],
+    status_code=200,
+)
+async def parse_emails_batch(
+    request: Request,
+    items: List[Dict[str, Any]] = Body(...),
+    openai_client=Depends(get_openai_client),
+    db: Session = Depends(get_db),
+) -> List[ParseBatchItemResult]:
+    """
+    Parse many documents in one request.
+    Each item has the shape of a ParseRequest and is validated and processed independently, with at
+    most PARSE_BATCH_CONCURRENCY items in flight. Results or errors are returned in input order. The
+    batch is charged one request unit per item and the estimated cost of its valid items.
+    """
+    if not items:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="batch must contain at least 1 item")
+    if len(items) > PARSE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"batch must not contain more than {PARSE_BATCH_MAX_ITEMS} items",
+        )
+    validated = await with_documents(db, validate_items(items))
+    record_since_start("validate")
+    # The middleware already charged one unit for the request itself
+    await charge_items(request, validated)
+
+    semaphore = asyncio.Semaphore(max(1, PARSE_BATCH_CONCURRENCY))
+
+    async def process(index: int, req: Union[ParseRequest, ParseBatchItemResult]) -> ParseBatchItemResult:
+        if isinstance(req, ParseBatchItemResult):
+            return req
+        EMAILS_PER_REQUEST.observe(len(req.emails))
+        async with semaphore:
+            return await resolve_batch_item(index, req, openai_client, db)
+
+    return await asyncio.gather(*(process(index, req) for index, req in enumerate(validated)))
+
+
+@parse_router.post("/parse/stream", response_model=None)
+async def parse_emails_ndjson(
+    request: Request,
+    openai_client=Depends(get_openai_client),
+) -> DuplexStreamingResponse:
+    """
+    Resolve an NDJSON body with one ParseRequest per line, read as it arrives.
+    At most PARSE_STREAM_CONCURRENCY lines are resolved at once and no further input is read until one
+    finishes, so memory use does not depend on the upload size. Each result is written as an NDJSON
+    line tagged with its input line number as soon as it is ready. Every line is charged like a batch
+    item; an exhausted quota ends the response with an error line.
+    """
+    return DuplexStreamingResponse(_ndjson_results(request, openai_client), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _ndjson_results(request: Request, openai_client) -> AsyncIterator[str]:
+    first = True
+
+    async def resolve(number: int, line: Optional[bytes]) -> ParseStreamLineResult:
+        nonlocal first
+        if line is None:
+            return ParseStreamLineResult(
+                line=number, status_code=413, error=f"line must not exceed {PARSE_STREAM_MAX_LINE_BYTES} bytes",
+            )
+        # The middleware already charged one unit for the request itself
+        if not first:
+            await charge_rate_limit(request, 1)
+        first = False
+        try:
+            req = ParseRequest.model_validate_json(line)
+        except ValidationError as e:
+            detail = "; ".join(error["msg"] for error in e.errors())
+            return ParseStreamLineResult(line=number, status_code=422, error=detail)
+        if req.html_sha256 is not None:
+            try:
+                req = await run_db(db, load_document, req)
+            except HTTPException as e:
+                return ParseStreamLineResult(line=number, status_code=e.status_code, error=e.detail)
+        await charge_rate_limit(request, await parse_cost([req]), COST)
+        EMAILS_PER_REQUEST.observe(len(req.emails))
+        result = await resolve_batch_item(number, req, openai_client, db)
+        return ParseStreamLineResult(line=number, status_code=result.status_code, results=result.results, error=result.error)
+
+    lines = iter_ndjson_lines(request.stream(), PARSE_STREAM_MAX_LINE_BYTES)
+    try:
+        # One session for all lines: every use goes through run_db, which serializes them
+        with streaming_session(request) as db:
+            async for result in resolve_lines(lines, resolve, PARSE_STREAM_CONCURRENCY):
+                yield result.model_dump_json() + "\n"
+    except ClientDisconnect:
+        return
+    except HTTPException as e:
+        # Headers are already sent, so errors are reported in-band
+        yield json.dumps({"error": e.detail, "status_code": e.status_code}) + "\n"
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        yield json.dumps({"error": "Internal Server Error", "status_code": 500}) + "\n"
+
+
+def validate_items(items: List[Dict[str, Any]]) -> List[Union[ParseRequest, ParseBatchItemResult]]:
+    """Validate each item as a ParseRequest; invalid items become their 422 result."""
+    validated: List[Union[ParseRequest, ParseBatchItemResult]] = []
+    for index, item in enumerate(items):
+        try:
+            validated.append(ParseRequest.model_validate(item))
+        except ValidationError as e:
+            detail = "; ".join(error["msg"] for error in e.errors())
+            validated.append(ParseBatchItemResult(index=index, status_code=422, error=detail))
+    return validated
+
+
+async def with_documents(
+    db: Session, validated: List[Union[ParseRequest, ParseBatchItemResult]]
+) -> List[Union[ParseRequest, ParseBatchItemResult]]:
+    """Attach the stored documents referenced by `html_sha256`; unknown ones become 404 item results."""
+    if any(isinstance(item, ParseRequest) and item.html_sha256 is not None for item in validated):
+        return await run_db(db, load_documents, validated)
+    return validated
+
+
+async def charge_items(request: Request, validated: List[Union[ParseRequest, ParseBatchItemResult]]) -> None:
+    """Charge one request unit per item beyond the first and the estimated cost of the valid items."""
+    await charge_rate_limit(request, len(validated) - 1)
+    await charge_rate_limit(request, await parse_cost([req for req in validated if isinstance(req, ParseRequest)]), COST)
+
+
+def get_job_pool(request: Request) -> Optional[JobWorkerPool]:
+    """The job workers of this process, or None when they run elsewhere."""
+    return getattr(request.app.state, "job_pool", None)
+
+
+@parse_router.post(
+    "/parse/jobs",
+    response_model=ParseJobStatus,
+    status_code=202,
+)
+async def create_parse_job(
+    request: Request,
+    body: Union[List[Dict[str, Any]], Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db),
+    pool: Optional[JobWorkerPool] = Depends(get_job_pool),
+) -> ParseJobStatus:
+    """
+    Queue one ParseRequest, or an array of them, for the background job workers and return the job
+    at once. Items are validated now; invalid ones are stored with their 422 result. The job is
+    charged like a batch.
+    """
+    items = body if isinstance(body, list) else [body]
+    if not items:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="job must contain at least 1 item")
+    if len(items) > JOB_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"job must not contain more than {JOB_MAX_ITEMS} items",
+        )
+    validated = await with_documents(db, validate_items(items))
+    await charge_items(request, validated)
+    job = await run_in_threadpool(create_job, db, validated)
+    if pool is not None:
+        pool.notify()
+    return job
+
+
+@parse_router.get("/parse/jobs/{job_id}", response_model=ParseJobStatus)
+async def get_parse_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=JOB_MAX_WAIT),
+    db: Session = Depends(get_db),
+    pool: Optional[JobWorkerPool] = Depends(get_job_pool),
+) -> ParseJobStatus:
+    """
+    Progress of a job and the results of its finished items in input order. With `wait` seconds the
+    call returns as soon as the job completes, or with the progress so far once `wait` has passed.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        job = await run_in_threadpool(load_job, db, job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        remaining = deadline - time.monotonic()
+        if job.status == COMPLETED or remaining <= 0:
+            return job
+        # Local workers signal progress; jobs worked off by other processes are polled
+        timeout = min(remaining, JOB_POLL_INTERVAL)
+        if pool is not None:
+            await pool.wait_for_progress(timeout)
+        else:
+            await asyncio.sleep(timeout)
+
+
+@parse_router.get("/parse/cache")
+async def parse_cache_stats() -> Dict[str, int]:
+    """
+    Counters of the in-process request cache.
+    """
+    return request_cache.stats()
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+
+from dm_email_owner_svc.config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+    JOB_WORKER_CONCURRENCY,
+)
+from dm_email_owner_svc.core.jobs import JobWorkerPool
+from dm_email_owner_svc.core.logging import configure_logging
+from dm_email_owner_svc.core.openai_client import AsyncOpenAIClient
+from dm_email_owner_svc.models.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+async def run_workers() -> None:
+    openai_client = AsyncOpenAIClient()
+    pool = JobWorkerPool(
+        SessionLocal,
+        lambda: openai_client,
+        concurrency=JOB_WORKER_CONCURRENCY,
+        poll_interval=JOB_POLL_INTERVAL,
+        lease_seconds=JOB_LEASE_SECONDS,
+        max_attempts=JOB_MAX_ATTEMPTS,
+    )
+    pool.start()
+    logger.info("Job workers started | concurrency=%d", pool.concurrency)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await openai_client.aclose()
+
+
+def main():
+    # Job workers without the HTTP API, scaled separately from the API processes
+    configure_logging()
+    try:
+        asyncio.run(run_workers())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -39,4 +39,13 @@ def client(session_local):
     with TestClient(app) as c:
         yield c
     app.dependency_overrides[get_db] = get_db
-# DO NOT MODIFY SECTION END
\ No newline at end of file
+# DO NOT MODIFY SECTION END
+
+@pytest.fixture(autouse=True)
+def reset_in_process_state():
+    # Some test modules replace the app startup hooks, so clear process-wide state before every test
+    from dm_email_owner_svc.app import quotas
+    from dm_email_owner_svc.routers.parse import request_cache
+    quotas.reset()
+    request_cache.clear()
+    yield
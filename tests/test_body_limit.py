@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from dm_email_owner_svc.middleware import BodySizeLimitMiddleware
+
+
+def _limited_app(max_body_size, route_limits=None):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_body_size=max_body_size, route_limits=route_limits)
+
+    @app.post("/small")
+    async def small(data: dict):
+        return {"keys": len(data)}
+
+    @app.post("/large")
+    async def large(data: dict):
+        return {"keys": len(data)}
+
+    return app
+
+
+def test_declared_oversize_body_is_rejected_before_reading(client):
+    response = client.post("/echo", content=b"{" + b" " * (1024 * 1024) + b"}", headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body must not exceed 1048576 bytes"}
+
+
+def test_routes_have_their_own_limits():
+    with TestClient(_limited_app(100, {"/large": 1000})) as test_client:
+        body = {"key": "x" * 200}
+        assert test_client.post("/small", json=body).status_code == 413
+        assert test_client.post("/large", json=body).status_code == 200
+        assert test_client.post("/small", json={"key": "x"}).status_code == 200
+
+
+def test_streamed_body_is_cut_off_when_the_limit_is_crossed():
+    app = _limited_app(100)
+    chunk = json.dumps({"key": "x" * 60}).encode()[:40]
+    reads = 0
+    messages = []
+
+    async def receive():
+        nonlocal reads
+        reads += 1
+        # An endless body without Content-Length
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/small",
+        "raw_path": b"/small",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"transfer-encoding", b"chunked")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    assert messages[0]["status"] == 413
+    # The third chunk crosses 100 bytes and nothing more is read
+    assert reads == 3
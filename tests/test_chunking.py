@@ -0,0 +1,41 @@
+from dm_email_owner_svc.core.chunking import merge_chunk_answers, split_document
+
+
+def test_small_documents_are_not_split():
+    assert split_document("<p>short</p>", 100, 10) == ["<p>short</p>"]
+
+
+def test_chunks_end_on_element_boundaries_and_cover_the_document():
+    document = "".join(f"<p>Person {i} p{i}@example.com</p>" for i in range(200))
+    chunks = split_document(document, 500, 0)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert all(chunk.startswith("<") for chunk in chunks)
+    assert "".join(chunks) == document
+
+
+def test_chunks_overlap():
+    document = "".join(f"<p>Person {i} p{i}@example.com</p>" for i in range(200))
+    chunks = split_document(document, 500, 100)
+    for previous, current in zip(chunks, chunks[1:]):
+        # Each chunk repeats the tail of the previous one
+        assert previous.endswith(current[:20]) or current[:20] in previous
+    assert all(f"p{i}@example.com</p>" in document for i in range(200))
+
+
+def test_hard_cut_without_boundaries():
+    assert split_document("a" * 25, 10, 3) == ["a" * 10, "a" * 10, "a" * 5]
+
+
+def test_merge_prefers_known_then_majority_then_earliest():
+    answers = [
+        {"a@example.com": "unknown", "b@example.com": "Bea", "c@example.com": "Cy"},
+        {"a@example.com": "Ann", "b@example.com": "Bee", "c@example.com": "Cyrus"},
+        {"b@example.com": "Bee", "d@example.com": "unknown"},
+    ]
+    assert merge_chunk_answers(answers) == {
+        "a@example.com": "Ann",
+        "b@example.com": "Bee",
+        "c@example.com": "Cy",
+        "d@example.com": "unknown",
+    }
@@ -0,0 +1,78 @@
+import hashlib
+from datetime import timedelta
+
+from dm_email_owner_svc.core.documents import _utcnow, get_documents, store_document
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from tests.test_parse import CountingClient
+
+HTML = "<div><script>x()</script><p>Contact test@example.com for details</p></div>"
+SHA256 = hashlib.sha256(HTML.encode("utf-8")).hexdigest()
+
+
+def test_put_document_is_content_addressed(client):
+    response = client.put("/documents", content=HTML, headers={"Content-Type": "text/html"})
+    assert response.status_code == 201
+    assert response.json()["sha256"] == SHA256 and response.json()["size"] == len(HTML)
+    again = client.put("/documents", content=HTML)
+    assert again.status_code == 200 and again.json()["expires_at"] >= response.json()["expires_at"]
+    assert client.get(f"/documents/{SHA256.upper()}").json()["sha256"] == SHA256
+    assert client.get(f"/documents/{'0' * 64}").status_code == 404
+
+
+def test_put_document_rejects_empty_and_non_utf8(client):
+    assert client.put("/documents", content=b"  ").status_code == 422
+    assert client.put("/documents", content=b"\xff\xfe").status_code == 422
+
+
+def test_parse_by_sha256_matches_inline_html(client, monkeypatch):
+    counting = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: counting
+    client.put("/documents", content=HTML)
+
+    def fail(html_content):
+        raise AssertionError("stored documents are normalized on upload")
+
+    monkeypatch.setattr("dm_email_owner_svc.core.owner_resolution.normalize_html", fail)
+    by_reference = client.post("/parse", json={"html_sha256": SHA256, "emails": ["test@example.com"]})
+    assert by_reference.status_code == 200
+    assert by_reference.json() == [{"email": "test@example.com", "owner": "Owner A", "source": "llm"}]
+    assert "x()" not in counting.calls[-1][-1]["content"]
+    inline = client.post("/parse", json={"html_content": HTML, "emails": ["test@example.com"]})
+    assert inline.json() == by_reference.json()
+    assert len(counting.calls) == 1
+    client.app.dependency_overrides = {}
+
+
+def test_parse_by_unknown_sha256_is_404(client):
+    response = client.post("/parse", json={"html_sha256": "a" * 64, "emails": ["test@example.com"]})
+    assert response.status_code == 404
+
+
+def test_parse_requires_exactly_one_document_source(client):
+    assert client.post("/parse", json={"emails": ["test@example.com"]}).status_code == 422
+    both = {"html_content": HTML, "html_sha256": SHA256, "emails": ["test@example.com"]}
+    assert client.post("/parse", json=both).status_code == 422
+    assert client.post("/parse", json={"html_sha256": "abc", "emails": ["test@example.com"]}).status_code == 422
+
+
+def test_batch_items_reference_stored_documents(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: CountingClient()
+    client.put("/documents", content=HTML)
+    items = [
+        {"html_sha256": SHA256, "emails": ["test@example.com"]},
+        {"html_sha256": "b" * 64, "emails": ["test@example.com"]},
+    ]
+    results = client.post("/parse/batch", json=items).json()
+    assert [result["status_code"] for result in results] == [200, 404]
+    client.app.dependency_overrides = {}
+
+
+def test_expired_documents_are_not_served_and_purged(db_session):
+    now = _utcnow()
+    store_document(db_session, HTML, ttl_seconds=60, now=now)
+    later = now + timedelta(seconds=61)
+    assert get_documents(db_session, [SHA256], now=later) == {}
+    _, created = store_document(db_session, "<p>other</p>", ttl_seconds=60, now=later)
+    assert created
+    _, created = store_document(db_session, HTML, ttl_seconds=60, now=later)
+    assert created
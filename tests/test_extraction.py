@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from dm_email_owner_svc.core.extraction import extract_owners_locally
+
+
+@pytest.mark.parametrize("html_content,email,owner", [
+    ("<div>John Doe <john@example.com></div>", "john@example.com", "John Doe"),
+    ('<p>From: "Jane Roe" &lt;jane@example.com&gt;</p>', "jane@example.com", "Jane Roe"),
+    ('<a href="mailto:bob@example.org?subject=Hi">Bob Stone</a>', "bob@example.org", "Bob Stone"),
+    ("<p>Best regards,<br>Alice Wonder<br>alice@example.io</p>", "alice@example.io", "Alice Wonder"),
+    ("<td>Carl Jung | carl@example.ch</td>", "carl@example.ch", "Carl Jung"),
+])
+def test_resolves_common_patterns(html_content, email, owner):
+    assert extract_owners_locally(html_content, [email]) == {email: owner}
+
+
+def test_matches_emails_case_insensitively():
+    html_content = "<div>John Doe &lt;John.Doe@Example.com&gt;</div>"
+    assert extract_owners_locally(html_content, ["john.doe@example.com"]) == {"john.doe@example.com": "John Doe"}
+
+
+@pytest.mark.parametrize("html_content", [
+    "<p>Hello</p>",
+    "<p>Contact us at a@example.com</p>",
+    '<a href="mailto:a@example.com">a@example.com</a>',
+    "<p>Thanks<br>a@example.com</p>",
+    "<p>Email: <a@example.com></p>",
+    '<a href="mailto:a@example.com">Get in touch</a>',
+    '<a href="mailto:a@example.com">Apply now</a>',
+    '<a href="mailto:a@example.com">Bob</a>',
+    "<p>Our Office<br>a@example.com</p>",
+    '<p>"Doe, John" <a@example.com></p>',
+])
+def test_leaves_ambiguous_cases_unresolved(html_content):
+    assert extract_owners_locally(html_content, ["a@example.com"]) == {}
+
+
+@pytest.mark.parametrize("html_content,email", [
+    ("<div>View Online</div><div>news@x.com</div>", "news@x.com"),
+    ("<p>Privacy Policy | legal@x.com</p>", "legal@x.com"),
+    ("<td>Account Manager</td><td>am@x.com</td>", "am@x.com"),
+    ("<p>Account Manager<br>accounts@x.com</p>", "accounts@x.com"),
+    ("<p>Alice Wonder<br>office.manager@example.io</p>", "office.manager@example.io"),
+])
+def test_signature_names_need_a_matching_address(html_content, email):
+    assert extract_owners_locally(html_content, [email]) == {}
+
+
+@pytest.mark.parametrize("email", [
+    "jane.doe@example.com", "jdoe@example.com", "janed@example.com", "doe_jane@example.com",
+    "jane+news@example.com", "j.doe@example.com",
+])
+def test_signature_names_match_common_address_forms(email):
+    assert extract_owners_locally(f"<p>Jane Doe<br>{email}</p>", [email]) == {email: "Jane Doe"}
+
+
+def test_signature_names_ignore_accents():
+    assert extract_owners_locally("<p>José Núñez<br>jnunez@example.es</p>", ["jnunez@example.es"]) == {
+        "jnunez@example.es": "José Núñez",
+    }
+
+
+def test_conflicting_candidates_are_unresolved():
+    html_content = "<div>Ann One <a@example.com></div><div>Bea Two <a@example.com></div>"
+    assert extract_owners_locally(html_content, ["a@example.com"]) == {}
+
+
+def test_only_requested_emails_are_returned():
+    html_content = "<div>Ann One <a@example.com></div><div>Bea Two <b@example.com></div>"
+    assert extract_owners_locally(html_content, ["b@example.com"]) == {"b@example.com": "Bea Two"}
+
+
+@pytest.mark.parametrize("unit", ["<a ", '<a href="mailto:', "Aa Bb <", "Jo Do <p ", "Ann Lee<br>"])
+def test_malformed_markup_is_scanned_in_linear_time(unit):
+    html_content = unit * (60000 // len(unit)) + " a@example.com"
+    started = time.perf_counter()
+    extract_owners_locally(html_content, ["a@example.com"])
+    assert time.perf_counter() - started < 1.0
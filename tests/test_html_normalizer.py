@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from dm_email_owner_svc.core.html_normalizer import HTMLNormalizer, normalize_html
+
+
+def test_drops_non_content_elements_and_attributes():
+    html_content = (
+        '<html><head><title>t</title><style>.a{color:red}</style></head>'
+        '<body><div style="color:red" data-track="xyz"><script>var x = 1;</script>'
+        '<img src="data:image/png;base64,AAAA">Hello</div></body></html>'
+    )
+    assert normalize_html(html_content) == "Hello"
+
+
+def test_keeps_names_next_to_addresses():
+    html_content = (
+        '<div><div><p>John Doe <john@example.com></p></div></div>'
+        '<a href="mailto:bob@example.org?subject=hi" class="x">Bob Stone</a>'
+        '<table><tr><td>Ann Lee</td><td>ann@example.io</td></tr></table>'
+        '<p>&lt;jane@example.io&gt; &amp; co</p>'
+    )
+    assert normalize_html(html_content).split("\n") == [
+        "John Doe <john@example.com>",
+        "Bob Stone <bob@example.org>",
+        "| Ann Lee | ann@example.io",
+        "<jane@example.io> & co",
+    ]
+
+
+def test_collapses_whitespace_and_nesting():
+    html_content = "<div>\n\n<div>  A   \t B </div>\n<div></div><div><br/>C</div></div>"
+    assert normalize_html(html_content) == "A B\nC"
+
+
+def test_attribute_addresses_are_kept():
+    html_content = '<input type="hidden" value="ann@corp.com"><a href="/c?contact=bob@corp.com" title="x">Bob</a>'
+    assert normalize_html(html_content) == "ann@corp.com /c?contact=bob@corp.com Bob"
+
+
+def test_streaming_feed_matches_single_pass():
+    html_content = '<p>John <b>Doe</b></p><script>x()</script><a href="mailto:j@example.com">J</a>'
+    normalizer = HTMLNormalizer()
+    for i in range(0, len(html_content), 7):
+        normalizer.feed(html_content[i:i + 7])
+    assert normalizer.close() == normalize_html(html_content)
+
+
+@pytest.mark.parametrize("unit", ["Aa Bb <", "<a", "<a ", "</a", "<a@", '<a href="', "<!--", "</", "<p title='x"])
+def test_malformed_markup_is_normalized_in_linear_time(unit):
+    html_content = unit * (150000 // len(unit))
+    started = time.perf_counter()
+    normalize_html(html_content)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_unterminated_tags_keep_their_text():
+    assert normalize_html("<p>a < b and c <</p>") == "a < b and c <"
+    assert normalize_html("<p>x</p><!-- open") == "x"
+    assert normalize_html("<script>if (a<b) {}</script><p>ok</p>") == "ok"
@@ -26,4 +26,73 @@ def test_logging_output(capsys):
     captured = capsys.readouterr()
     # Verify that all messages appear in stdout
     for i in range(3):
-        assert f"Test message {i}" in captured.out
\ No newline at end of file
+        assert f"Test message {i}" in captured.out
+
+def _record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+
+
+def test_bounded_queue_drops_newest_or_oldest():
+    import queue
+    from dm_email_owner_svc.core.logging import BoundedQueueHandler
+
+    newest = BoundedQueueHandler(queue.Queue(maxsize=2), "drop_newest")
+    oldest = BoundedQueueHandler(queue.Queue(maxsize=2), "drop_oldest")
+    for handler in (newest, oldest):
+        for i in range(4):
+            handler.emit(_record(f"m{i}"))
+        assert handler.dropped == 2
+    assert [newest.queue.get_nowait().getMessage() for _ in range(2)] == ["m0", "m1"]
+    assert [oldest.queue.get_nowait().getMessage() for _ in range(2)] == ["m2", "m3"]
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(queue.Queue(), "block")
+
+
+def test_listener_writes_in_batches_and_reports_drops():
+    import io
+    import queue
+    from dm_email_owner_svc.core.logging import BatchingQueueListener, BatchStreamHandler, BoundedQueueHandler
+
+    class CountingStream(io.StringIO):
+        writes = 0
+
+        def write(self, text):
+            self.writes += 1
+            return super().write(text)
+
+    stream = CountingStream()
+    output = BatchStreamHandler(stream)
+    output.setFormatter(logging.Formatter("%(message)s"))
+    log_queue = queue.Queue(maxsize=10)
+    source = BoundedQueueHandler(log_queue, "drop_newest")
+    for i in range(12):
+        source.emit(_record(f"m{i}"))
+    listener = BatchingQueueListener(log_queue, output, batch_size=4, source=source)
+    listener.start()
+    listener.stop()
+    lines = stream.getvalue().splitlines()
+    # The drop report follows the first batch written after the drops
+    assert lines[:5] == ["m0", "m1", "m2", "m3", "log_records_dropped | count=2 | total=2"]
+    assert lines[5:] == [f"m{i}" for i in range(4, 10)]
+    assert listener.written == 11
+    assert stream.writes == listener.batches == 3
+
+
+def test_json_lines_format():
+    import io
+    import json
+    from dm_email_owner_svc.core.logging import configure_logging, logging_stats
+
+    stream = io.StringIO()
+    configure_logging(log_format="json", stream=stream)
+    logging.getLogger("svc").info("GET %s | status_code=%d", "/ping", 200)
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logging.getLogger("svc").error("failed", exc_info=True)
+    configure_logging()
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert entries[0]["msg"] == "GET /ping | status_code=200"
+    assert entries[0]["level"] == "INFO" and entries[0]["logger"] == "svc"
+    assert "RuntimeError: boom" in entries[1]["exc"]
+    assert logging_stats()["dropped"] == 0
@@ -0,0 +1,71 @@
+import threading
+
+from dm_email_owner_svc.core.metrics import (
+    BAD_GATEWAY,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    RATE_LIMIT_REJECTIONS,
+    REQUEST_LATENCY,
+)
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from tests.test_parse_batch import FailingOpenAIClient
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("work_seconds", "Work.", (0.1, 1.0), labels=("kind",)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "a")
+    assert registry.render().splitlines() == [
+        "# HELP work_seconds Work.",
+        "# TYPE work_seconds histogram",
+        'work_seconds_bucket{kind="a",le="0.1"} 2',
+        'work_seconds_bucket{kind="a",le="1"} 3',
+        'work_seconds_bucket{kind="a",le="+Inf"} 4',
+        'work_seconds_sum{kind="a"} 3.65',
+        'work_seconds_count{kind="a"} 4',
+    ]
+
+
+def test_counter_merges_per_thread_shards():
+    counter = Counter("events_total", "Events.", labels=("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc("x")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc('quote"d', amount=2)
+    assert counter.value("x") == 8000
+    assert 'events_total{kind="quote\\"d"} 2' in list(counter.render())
+
+
+def test_metrics_endpoint_reports_requests_and_failures(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: FailingOpenAIClient()
+    latency_before = REQUEST_LATENCY.count("GET", "/ping", "200")
+    failures_before = BAD_GATEWAY.value("downstream_error")
+    rejections_before = RATE_LIMIT_REJECTIONS.value("requests")
+    headers = {"X-Client-Host": "metrics-client"}
+    client.get("/ping", headers=headers)
+    payload = {"html_content": "<p>fail@example.com</p>", "emails": ["fail@example.com"]}
+    assert client.post("/parse", json=payload, headers=headers).status_code == 502
+    for _ in range(9):
+        client.get("/ping", headers=headers)
+    response = client.get("/metrics", headers={"X-Test-Disable-RateLimit": "true"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert REQUEST_LATENCY.count("GET", "/ping", "200") == latency_before + 9
+    assert BAD_GATEWAY.value("downstream_error") == failures_before + 1
+    assert RATE_LIMIT_REJECTIONS.value("requests") == rejections_before + 1
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/parse",status="502",le="+Inf"}' in body
+    assert 'openai_request_duration_seconds_count{outcome="error"}' in body
+    for name in ("prompt_chars_count", "prompt_estimated_tokens_sum", "parse_emails_per_request_bucket",
+                 "request_cache_hits_total", "log_queue_depth", "owner_resolutions_total"):
+        assert name in body
+    client.app.dependency_overrides = {}
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from dm_email_owner_svc.core.micro_batcher import MicroBatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    async def run(self, emails):
+        self.calls.append(list(emails))
+        await asyncio.sleep(0)
+        return {email.lower(): f"owner of {email.lower()}" for email in emails}
+
+
+def test_concurrent_submissions_for_same_key_are_merged():
+    batcher = MicroBatcher(window=0.01)
+    recorder = Recorder()
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit("doc", ["a@example.com"], recorder.run),
+            batcher.submit("doc", ["b@example.com", "A@example.com"], recorder.run),
+            batcher.submit("doc", ["c@example.com"], recorder.run),
+        )
+
+    results = asyncio.run(run())
+    assert recorder.calls == [["a@example.com", "b@example.com", "c@example.com"]]
+    for result in results:
+        assert result["b@example.com"] == "owner of b@example.com"
+    assert batcher.stats() == {"requests": 3, "batches": 1, "pending": 0}
+
+
+def test_different_keys_are_not_merged():
+    batcher = MicroBatcher(window=0.01)
+    recorder = Recorder()
+
+    async def run():
+        await asyncio.gather(
+            batcher.submit("doc1", ["a@example.com"], recorder.run),
+            batcher.submit("doc2", ["a@example.com"], recorder.run),
+        )
+
+    asyncio.run(run())
+    assert len(recorder.calls) == 2
+
+
+def test_full_batch_is_flushed_early():
+    batcher = MicroBatcher(window=10.0, max_emails=2)
+    recorder = Recorder()
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.submit("doc", ["a@example.com"], recorder.run),
+            batcher.submit("doc", ["b@example.com"], recorder.run),
+            batcher.submit("doc", ["c@example.com", "d@example.com"], recorder.run),
+        ), timeout=1.0)
+
+    asyncio.run(run())
+    assert recorder.calls == [["a@example.com", "b@example.com"], ["c@example.com", "d@example.com"]]
+
+
+def test_errors_reach_every_caller():
+    batcher = MicroBatcher(window=0.01)
+
+    async def failing(emails):
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit("doc", ["a@example.com"], failing),
+            batcher.submit("doc", ["b@example.com"], failing),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_zero_window_calls_through():
+    batcher = MicroBatcher(window=0)
+    recorder = Recorder()
+
+    async def run():
+        await asyncio.gather(
+            batcher.submit("doc", ["a@example.com"], recorder.run),
+            batcher.submit("doc", ["b@example.com"], recorder.run),
+        )
+
+    asyncio.run(run())
+    assert len(recorder.calls) == 2
@@ -37,4 +37,57 @@ def test_log_middleware_exception(client, caplog):
     assert response.json() == {"detail": "Internal Server Error"}
     error_logs = [record for record in caplog.records if record.levelname == "ERROR"]
     assert any("Unhandled exception during request" in record.getMessage() for record in error_logs), \
-        f"Expected error log for exception not found. Logs: {[r.getMessage() for r in caplog.records]}"
\ No newline at end of file
+        f"Expected error log for exception not found. Logs: {[r.getMessage() for r in caplog.records]}"
+
+class StepClock:
+    """Advances by `step` seconds on every call."""
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def _app_with(middleware_class, **options):
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    app.add_middleware(middleware_class, **options)
+
+    @app.post("/upload")
+    async def upload(data: dict):
+        return {"keys": len(data)}
+
+    return app
+
+
+def test_log_middleware_uses_injected_clock(caplog):
+    import time
+    from fastapi.testclient import TestClient
+    from dm_email_owner_svc.middleware import RequestLoggingMiddleware
+
+    caplog.set_level(logging.INFO)
+    real_time = time.time
+    with TestClient(_app_with(RequestLoggingMiddleware, clock=StepClock(0.25))) as test_client:
+        response = test_client.post("/upload", content=b'{"a": 1, "b": 2}', headers={"Content-Type": "application/json"})
+    assert response.status_code == 200
+    messages = [record.getMessage() for record in caplog.records]
+    assert "POST /upload | payload_size=16 bytes | status_code=200 | duration_ms=250" in messages
+    # Nothing process-global is swapped while serving requests
+    assert time.time is real_time
+
+
+def test_rate_limit_middleware_with_injected_quotas():
+    from fastapi.testclient import TestClient
+    from dm_email_owner_svc.core.quotas import build_quota_manager
+    from dm_email_owner_svc.core.rate_limit import RateLimiter
+    from dm_email_owner_svc.middleware import RateLimitMiddleware
+
+    quotas = build_quota_manager(2, 100, {}, {}, lambda limit: RateLimiter(limit=limit, clock=lambda: 30.0))
+    with TestClient(_app_with(RateLimitMiddleware, quotas=quotas)) as test_client:
+        statuses = [test_client.post("/upload", json={}).status_code for _ in range(3)]
+        response = test_client.post("/upload", json={})
+    assert statuses == [200, 200, 429]
+    assert response.headers["X-RateLimit-Remaining-Requests"] == "0"
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from dm_email_owner_svc.core.metrics import MODEL_TIER_ESCALATIONS, MODEL_TIER_LATENCY, MODEL_TIER_RESOLUTIONS
+from dm_email_owner_svc.core.owner_resolution import ask_model, tier_answer
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+
+HTML = "<p>Alice alice@example.com</p>" + "x" * 1000 + "<p>Bob bob@example.com</p>" + "y" * 1000 + "<p>carol@example.com</p>"
+EMAILS = ["alice@example.com", "bob@example.com", "carol@example.com", "dan@example.com"]
+
+
+def completion(entries):
+    return {"choices": [{"message": {"content": json.dumps(entries)}}]}
+
+
+class TieredClient:
+    model_tiers = ["fast", "strong"]
+
+    def __init__(self, answers):
+        # Per model: a list of answer entries, or None to fail the call
+        self.answers = answers
+        self.calls = []
+
+    async def chat_completion(self, messages, model=None):
+        self.calls.append((model, messages))
+        if self.answers[model] is None:
+            return {"error": "OpenAI API error"}
+        return completion(self.answers[model])
+
+
+class StreamingTieredClient(TieredClient):
+    async def chat_completion_stream(self, messages, model=None):
+        self.calls.append((model, messages))
+        text = json.dumps(self.answers[model])
+        for i in range(0, len(text), 7):
+            yield text[i:i + 7]
+
+
+FAST = [
+    {"email": "alice@example.com", "owner": "Alice", "confidence": 0.95},
+    {"email": "bob@example.com", "owner": None, "confidence": 0.9},
+    {"email": "carol@example.com", "owner": "Carol?", "confidence": 0.2},
+    {"email": "dan@example.com", "owner": "Dan"},
+]
+STRONG = [
+    {"email": "bob@example.com", "owner": "Bob"},
+    {"email": "carol@example.com", "owner": "Carol"},
+    {"email": "dan@example.com", "owner": None},
+]
+
+
+@pytest.mark.parametrize("entry, expected", [
+    ({"owner": "Ann", "confidence": 0.9}, ("Ann", None)),
+    ({"owner": "Ann", "confidence": 0.5}, (None, "low_confidence")),
+    ({"owner": None, "confidence": 1}, (None, "null")),
+    ({"owner": " ", "confidence": 1}, (None, "null")),
+    ({"owner": "Ann"}, (None, "malformed")),
+    ({"owner": "Ann", "confidence": "high"}, (None, "malformed")),
+    ({"owner": 5, "confidence": 1}, (None, "malformed")),
+    (None, (None, "malformed")),
+])
+def test_tier_answer_escalates_unusable_answers(entry, expected):
+    assert tier_answer(entry, final=False) == expected
+
+
+def test_final_tier_answers_are_always_accepted():
+    assert tier_answer({"owner": "Ann"}, final=True) == ("Ann", None)
+    assert tier_answer(None, final=True) == ("unknown", None)
+
+
+def test_only_unresolved_emails_reach_the_next_tier():
+    client = TieredClient({"fast": FAST, "strong": STRONG})
+    before = {tier: MODEL_TIER_RESOLUTIONS.value(tier) for tier in ("fast", "strong")}
+    low_before = MODEL_TIER_ESCALATIONS.value("fast", "low_confidence")
+    answers = asyncio.run(ask_model(client, HTML + " dan@example.com", EMAILS))
+    assert answers == {
+        "alice@example.com": "Alice", "bob@example.com": "Bob",
+        "carol@example.com": "Carol", "dan@example.com": "unknown",
+    }
+    assert [model for model, _ in client.calls] == ["fast", "strong"]
+    fast_prompt, strong_prompt = (messages[-1]["content"] for _, messages in client.calls)
+    assert "'confidence'" in client.calls[0][1][0]["content"]
+    assert "'confidence'" not in client.calls[1][1][0]["content"]
+    # The retry only carries the escalated emails and the excerpts around them
+    assert "alice@example.com" in fast_prompt and "alice@example.com" not in strong_prompt
+    assert len(strong_prompt) < len(fast_prompt)
+    assert MODEL_TIER_RESOLUTIONS.value("fast") == before["fast"] + 1
+    assert MODEL_TIER_RESOLUTIONS.value("strong") == before["strong"] + 3
+    assert MODEL_TIER_ESCALATIONS.value("fast", "low_confidence") == low_before + 1
+    assert MODEL_TIER_LATENCY.count("strong", "ok") >= 1
+
+
+def test_confident_first_tier_skips_the_rest():
+    client = TieredClient({"fast": [{"email": "alice@example.com", "owner": "Alice", "confidence": 1}], "strong": None})
+    assert asyncio.run(ask_model(client, HTML, ["alice@example.com"])) == {"alice@example.com": "Alice"}
+    assert [model for model, _ in client.calls] == ["fast"]
+
+
+def test_failed_tier_escalates_and_last_tier_failure_is_502():
+    client = TieredClient({"fast": None, "strong": STRONG})
+    assert asyncio.run(ask_model(client, HTML, ["bob@example.com"])) == {"bob@example.com": "Bob"}
+    client = TieredClient({"fast": None, "strong": None})
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(ask_model(client, HTML, ["bob@example.com"]))
+    assert exc_info.value.status_code == 502
+
+
+def test_parse_runs_the_cascade(client):
+    fake = TieredClient({"fast": FAST, "strong": STRONG})
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    payload = {"html_content": HTML, "emails": ["alice@example.com", "carol@example.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.json() == [
+        {"email": "alice@example.com", "owner": "Alice", "source": "llm"},
+        {"email": "carol@example.com", "owner": "Carol", "source": "llm"},
+    ]
+    client.app.dependency_overrides = {}
+
+
+def test_stream_yields_first_tier_answers_then_escalations(client):
+    fake = StreamingTieredClient({"fast": FAST, "strong": STRONG})
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    payload = {"html_content": HTML, "emails": ["carol@example.com", "alice@example.com", "bob@example.com"]}
+    response = client.post("/parse", json=payload, headers={"Accept": "application/x-ndjson"})
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"email": "alice@example.com", "owner": "Alice", "source": "llm"},
+        {"email": "bob@example.com", "owner": "Bob", "source": "llm"},
+        {"email": "carol@example.com", "owner": "Carol", "source": "llm"},
+    ]
+    assert [model for model, _ in fake.calls] == ["fast", "strong"]
+    client.app.dependency_overrides = {}
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import openai
 import logging
@@ -155,3 +156,188 @@ def test_chat_completion_timeout(monkeypatch):
     messages = [{"role": "user", "content": "Hello"}]
     response = client.chat_completion(messages)
     assert response == {"error": "OpenAI API error"}
+
+
+# Async client tests
+
+def test_async_missing_api_key(monkeypatch):
+    monkeypatch.setattr("dm_email_owner_svc.config.OPENAI_API_KEY", "")
+    import dm_email_owner_svc.core.openai_client as openai_client_module
+    importlib.reload(openai_client_module)
+    with pytest.raises(ValueError) as exc_info:
+        openai_client_module.AsyncOpenAIClient()
+    assert 'Missing OpenAI API key' in str(exc_info.value)
+
+
+def _reload_with_async_openai(monkeypatch, create):
+    monkeypatch.setattr("dm_email_owner_svc.config.OPENAI_API_KEY", "dummy_key")
+    import dm_email_owner_svc.core.openai_client as openai_client_module
+    importlib.reload(openai_client_module)
+
+    class DummyAsyncOpenAI:
+        def __init__(self, api_key, max_retries, timeout, http_client):
+            self.http_client = http_client
+            completions = type('Completions', (), {'create': staticmethod(create)})()
+            self.chat = type('Chat', (), {'completions': completions})()
+
+    monkeypatch.setattr(openai, 'AsyncOpenAI', DummyAsyncOpenAI)
+    return openai_client_module.AsyncOpenAIClient
+
+
+def test_async_chat_completion_success(monkeypatch):
+    dummy_response = {"result": "success"}
+
+    async def create(model, messages):
+        return dummy_response
+
+    AsyncOpenAIClient = _reload_with_async_openai(monkeypatch, create)
+
+    async def run():
+        client = AsyncOpenAIClient()
+        try:
+            return await client.chat_completion([{"role": "user", "content": "Hello"}])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == dummy_response
+
+
+def test_async_chat_completion_error(monkeypatch):
+    async def create(model, messages):
+        raise openai.APIError('Simulated API error', request="dummy_request", body="dummy_body")
+
+    AsyncOpenAIClient = _reload_with_async_openai(monkeypatch, create)
+
+    async def run():
+        client = AsyncOpenAIClient()
+        try:
+            return await client.chat_completion([{"role": "user", "content": "Hello"}])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == {"error": "OpenAI API error"}
+
+
+def test_async_client_shares_connection_pool(monkeypatch):
+    calls = []
+
+    async def create(model, messages):
+        calls.append(model)
+        return {"ok": True}
+
+    AsyncOpenAIClient = _reload_with_async_openai(monkeypatch, create)
+
+    async def run():
+        client = AsyncOpenAIClient()
+        try:
+            # Many concurrent requests go through the same client and pool
+            results = await asyncio.gather(*(client.chat_completion([]) for _ in range(20)))
+            return client, results
+        finally:
+            await client.aclose()
+
+    client, results = asyncio.run(run())
+    assert len(calls) == 20
+    assert all(r == {"ok": True} for r in results)
+    assert client.client.http_client is client.http_client
+
+
+class FakeStream:
+    """Stands in for openai's AsyncStream: iterable and closed through `async with`."""
+    def __init__(self, contents):
+        self.contents = contents
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def __aiter__(self):
+        for content in self.contents:
+            delta = type('Delta', (), {'content': content})()
+            choice = type('Choice', (), {'delta': delta})()
+            yield type('Chunk', (), {'choices': [choice]})()
+
+
+def test_async_chat_completion_stream_yields_deltas(monkeypatch):
+    fake_stream = FakeStream(['[{"email"', None, ': "a@example.com"}]'])
+
+    async def create(model, messages, stream=False):
+        assert stream is True
+        return fake_stream
+    AsyncOpenAIClient = _reload_with_async_openai(monkeypatch, create)
+
+    async def run():
+        client = AsyncOpenAIClient()
+        try:
+            return [delta async for delta in client.chat_completion_stream([])]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == ['[{"email"', ': "a@example.com"}]']
+    assert fake_stream.closed
+
+
+def test_async_chat_completion_stream_is_closed_when_consumer_stops_early(monkeypatch):
+    fake_stream = FakeStream(['[', '{"email": "a@example.com"}', ']'])
+
+    async def create(model, messages, stream=False):
+        return fake_stream
+    AsyncOpenAIClient = _reload_with_async_openai(monkeypatch, create)
+
+    async def run():
+        client = AsyncOpenAIClient()
+        try:
+            deltas = client.chat_completion_stream([])
+            first = await deltas.__anext__()
+            await deltas.aclose()
+            return first
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == '['
+    assert fake_stream.closed
+
+
+def test_async_chat_completion_stream_raises_on_error(monkeypatch):
+    async def create(model, messages, stream=False):
+        raise openai.APIError('Simulated API error', request="dummy_request", body="dummy_body")
+
+    AsyncOpenAIClient = _reload_with_async_openai(monkeypatch, create)
+    import dm_email_owner_svc.core.openai_client as openai_client_module
+
+    async def run():
+        client = AsyncOpenAIClient()
+        try:
+            return [delta async for delta in client.chat_completion_stream([])]
+        finally:
+            await client.aclose()
+
+    with pytest.raises(openai_client_module.OpenAIStreamError):
+        asyncio.run(run())
+
+
+def test_async_chat_completion_uses_model_tiers(monkeypatch):
+    models = []
+
+    async def create(model, messages):
+        models.append(model)
+        return {"ok": True}
+
+    monkeypatch.setattr("dm_email_owner_svc.config.OPENAI_MODEL_TIERS", ["fast", "strong"])
+    AsyncOpenAIClient = _reload_with_async_openai(monkeypatch, create)
+
+    async def run():
+        client = AsyncOpenAIClient()
+        try:
+            await client.chat_completion([])
+            await client.chat_completion([], model="strong")
+            return client
+        finally:
+            await client.aclose()
+
+    client = asyncio.run(run())
+    assert client.model_tiers == ["fast", "strong"]
+    assert models == ["fast", "strong"]
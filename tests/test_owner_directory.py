@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from dm_email_owner_svc.core.owner_directory import lookup_owners, record_owners
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from dm_email_owner_svc.models.base import get_db
+from dm_email_owner_svc.models.owner_directory import OwnerDirectoryEntry
+from tests.test_parse import CountingClient
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr("dm_email_owner_svc.dependencies.admin_dependency.ADMIN_TOKEN", "admin-secret")
+
+
+def confidence(db_session, email, owner):
+    return db_session.get(OwnerDirectoryEntry, (email, owner), populate_existing=True).confidence
+
+
+def test_confidence_grows_with_agreeing_answers(db_session):
+    for _ in range(4):
+        record_owners(db_session, {"Ann@Example.com": "Ann Lee", "x@example.com": "unknown"})
+    assert confidence(db_session, "ann@example.com", "Ann Lee") == pytest.approx(0.8)
+    assert db_session.get(OwnerDirectoryEntry, ("x@example.com", "unknown")) is None
+    record_owners(db_session, {"ann@example.com": "A. Lee"})
+    assert confidence(db_session, "ann@example.com", "Ann Lee") == pytest.approx(4 / 6)
+    assert confidence(db_session, "ann@example.com", "A. Lee") == pytest.approx(1 / 6)
+
+
+def test_lookup_uses_one_query_and_threshold(db_session):
+    for _ in range(9):
+        record_owners(db_session, {"ann@example.com": "Ann Lee", "bob@example.com": "Bob Roe"})
+    record_owners(db_session, {"cy@example.com": "Cy Poe"})
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        found = lookup_owners(db_session, ["ANN@example.com", "bob@example.com", "cy@example.com", "no@example.com"], 0.8)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert found == {"ann@example.com": "Ann Lee", "bob@example.com": "Bob Roe"}
+    assert len(statements) == 1 and " IN " in statements[0]
+
+
+def test_parse_learns_owners_and_skips_the_model(client):
+    counting = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: counting
+    for i in range(5):
+        payload = {"html_content": f"<p>Document {i} mentions test@example.com</p>", "emails": ["test@example.com"]}
+        response = client.post("/parse", json=payload, headers={"X-Test-Disable-RateLimit": "true"})
+        assert response.status_code == 200
+    # Four agreeing answers reach the default 0.8 threshold, so the fifth document is answered locally
+    assert len(counting.calls) == 4
+    assert response.json() == [{"email": "test@example.com", "owner": "Owner A", "source": "directory"}]
+    client.app.dependency_overrides = {}
+
+
+def test_admin_endpoints_require_token(client, admin_token):
+    assert client.get("/admin/owner-directory").status_code == 403
+    assert client.get("/admin/owner-directory", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_directory_import_and_export(client, admin_token):
+    counting = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: counting
+    body = "\n".join([
+        json.dumps({"email": "test@example.com", "owner": "Imported Owner", "confidence": 0.95, "observations": 20}),
+        json.dumps({"email": "bad", "owner": "Nobody"}),
+        json.dumps({"email": "low@example.com", "owner": "Maybe", "confidence": 0.3}),
+    ])
+    result = client.post("/admin/owner-directory", content=body, headers=ADMIN).json()
+    assert result["imported"] == 2 and result["rejected"] == 1
+    assert result["errors"][0].startswith("line 2:")
+    payload = {"html_content": "<p>Ask test@example.com</p>", "emails": ["test@example.com"]}
+    assert client.post("/parse", json=payload).json()[0] == {
+        "email": "test@example.com", "owner": "Imported Owner", "source": "directory",
+    }
+    assert counting.calls == []
+    exported = [json.loads(line) for line in client.get("/admin/owner-directory", headers=ADMIN).text.splitlines()]
+    assert exported == [
+        {"email": "low@example.com", "owner": "Maybe", "confidence": 0.3, "observations": 1},
+        {"email": "test@example.com", "owner": "Imported Owner", "confidence": 0.95, "observations": 20},
+    ]
+    client.app.dependency_overrides = {}
+
+
+def test_directory_export_closes_its_session(client, admin_token, session_local):
+    events = []
+
+    def tracked_session():
+        session = session_local()
+        events.append("open")
+        try:
+            yield session
+        finally:
+            session.close()
+            events.append("close")
+
+    client.app.dependency_overrides[get_db] = tracked_session
+    body = json.dumps({"email": "ann@example.com", "owner": "Ann Lee", "confidence": 0.9, "observations": 3})
+    client.post("/admin/owner-directory", content=body, headers=ADMIN)
+    events.clear()
+    exported = client.get("/admin/owner-directory", headers=ADMIN).text.splitlines()
+    assert [json.loads(line)["email"] for line in exported] == ["ann@example.com"]
+    assert events == ["open", "close"]
+    client.app.dependency_overrides = {}
@@ -1,3 +1,5 @@
+import logging
+
 import pytest
 from fastapi import status
 
@@ -5,7 +7,7 @@ from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
 
 
 class FakeOpenAIClient:
-    def chat_completion(self, messages):
+    async def chat_completion(self, messages):
         # Return a synthetic valid response for testing
         return {
             "choices": [
@@ -14,19 +16,19 @@ class FakeOpenAIClient:
         }
 
 class FakeErrorClient:
-    def chat_completion(self, messages):
+    async def chat_completion(self, messages):
         return {"error": "OpenAI API error"}
 
 
 def test_parse_valid_request(client):
     # Override the dependency to use a fake OpenAI client with a valid response
     client.app.dependency_overrides[get_openai_client] = lambda: FakeOpenAIClient()
-    payload = {"html_content": "<p>Hello</p>", "emails": ["test@example.com", "foo@bar.com"]}
+    payload = {"html_content": "<p>Hello test@example.com and foo@bar.com</p>", "emails": ["test@example.com", "foo@bar.com"]}
     response = client.post("/parse", json=payload)
     assert response.status_code == status.HTTP_200_OK
     expected = [
-        {"email": "test@example.com", "owner": "Owner A"},
-        {"email": "foo@bar.com", "owner": "Owner B"}
+        {"email": "test@example.com", "owner": "Owner A", "source": "llm"},
+        {"email": "foo@bar.com", "owner": "Owner B", "source": "llm"}
     ]
     assert response.json() == expected
     client.app.dependency_overrides = {}
@@ -35,12 +37,178 @@ def test_parse_valid_request(client):
 def test_parse_downstream_error(client):
     # Override the dependency to simulate a downstream API error
     client.app.dependency_overrides[get_openai_client] = lambda: FakeErrorClient()
-    payload = {"html_content": "<p>Hello</p>", "emails": ["test@example.com"]}
+    payload = {"html_content": "<p>Hello test@example.com</p>", "emails": ["test@example.com"]}
     response = client.post("/parse", json=payload)
     assert response.status_code == 502
     client.app.dependency_overrides = {}
 
 
+class CountingClient(FakeOpenAIClient):
+    def __init__(self):
+        self.calls = []
+
+    async def chat_completion(self, messages):
+        self.calls.append(messages)
+        return await super().chat_completion(messages)
+
+
+def test_parse_all_resolved_locally_skips_llm(client):
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = '<div>Jane Roe <test@example.com></div><a href="mailto:foo@bar.com">Foo Bar</a>'
+    payload = {"html_content": html, "emails": ["test@example.com", "foo@bar.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {"email": "test@example.com", "owner": "Jane Roe", "source": "local"},
+        {"email": "foo@bar.com", "owner": "Foo Bar", "source": "local"},
+    ]
+    assert fake.calls == []
+    client.app.dependency_overrides = {}
+
+
+def test_parse_only_unresolved_emails_sent_to_llm(client):
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = '<div>Jane Roe <test@example.com></div><p>Write to foo@bar.com</p>'
+    payload = {"html_content": html, "emails": ["test@example.com", "foo@bar.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {"email": "test@example.com", "owner": "Jane Roe", "source": "local"},
+        {"email": "foo@bar.com", "owner": "Owner B", "source": "llm"},
+    ]
+    assert len(fake.calls) == 1
+    user_prompt = fake.calls[0][1]["content"]
+    assert "Emails: foo@bar.com\n" in user_prompt
+    client.app.dependency_overrides = {}
+
+
+def test_parse_absent_emails_skip_llm(client):
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    payload = {"html_content": "<p>Hello</p>", "emails": ["test@example.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"email": "test@example.com", "owner": "unknown", "source": "local"}]
+    assert fake.calls == []
+    client.app.dependency_overrides = {}
+
+
+def test_parse_asks_about_emails_only_in_attributes(client):
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = '<form><input type="hidden" value="test@example.com"></form><script>mail("foo@bar.com")</script>'
+    payload = {"html_content": html, "emails": ["test@example.com", "foo@bar.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.json() == [
+        {"email": "test@example.com", "owner": "Owner A", "source": "llm"},
+        {"email": "foo@bar.com", "owner": "Owner B", "source": "llm"},
+    ]
+    # The script is dropped by normalization, so the model sees the raw HTML
+    assert 'mail("foo@bar.com")' in fake.calls[0][1]["content"]
+    client.app.dependency_overrides = {}
+
+
+def test_parse_sends_only_email_neighbourhood(client):
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = "<div>" + "x" * 5000 + "</div><footer>Reach foo@bar.com</footer>"
+    payload = {"html_content": html, "emails": ["foo@bar.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    user_prompt = fake.calls[0][1]["content"]
+    assert "Reach foo@bar.com" in user_prompt
+    assert "x" * 1000 not in user_prompt
+    client.app.dependency_overrides = {}
+
+
+def test_parse_normalizes_html_for_prompt(client, caplog):
+    caplog.set_level(logging.INFO)
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = '<style>p{color:red}</style><p style="margin:0" data-track="abc">Ask foo@bar.com</p><script>track()</script>'
+    payload = {"html_content": html, "emails": ["foo@bar.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    user_prompt = fake.calls[0][1]["content"]
+    assert "Ask foo@bar.com" in user_prompt
+    for dropped in ("color:red", "data-track", "track()", "<p"):
+        assert dropped not in user_prompt
+    assert any(r.getMessage().startswith("prompt_normalized") for r in caplog.records)
+    client.app.dependency_overrides = {}
+
+
+def test_parse_reuses_cached_results(client):
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    payload = {"html_content": "<p>Hello test@example.com and foo@bar.com</p>", "emails": ["test@example.com", "foo@bar.com"]}
+    first = client.post("/parse", json=payload)
+    assert first.status_code == status.HTTP_200_OK
+    assert [item["source"] for item in first.json()] == ["llm", "llm"]
+    second = client.post("/parse", json={**payload, "emails": ["Foo@Bar.com"]})
+    assert second.status_code == status.HTTP_200_OK
+    assert second.json()[0]["owner"] == "Owner B"
+    assert second.json()[0]["source"] == "cache"
+    assert len(fake.calls) == 1
+    client.app.dependency_overrides = {}
+
+
+def test_parse_identical_requests_hit_request_cache(client):
+    fake = CountingClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    payload = {"html_content": "<p>Hello test@example.com and foo@bar.com</p>", "emails": ["test@example.com", "foo@bar.com"]}
+    first = client.post("/parse", json=payload)
+    second = client.post("/parse", json={**payload, "emails": ["FOO@bar.com", "test@example.com"]})
+    assert first.status_code == second.status_code == status.HTTP_200_OK
+    assert second.json() == [
+        {"email": "FOO@bar.com", "owner": "Owner B", "source": "llm"},
+        {"email": "test@example.com", "owner": "Owner A", "source": "llm"},
+    ]
+    assert len(fake.calls) == 1
+    stats = client.get("/parse/cache").json()
+    assert stats["hits"] >= 1
+    client.app.dependency_overrides = {}
+
+
+class MessyOpenAIClient(CountingClient):
+    async def chat_completion(self, messages):
+        self.calls.append(messages)
+        content = (
+            '[{"email": " Test@Example.COM ", "owner": "Owner A"}, {"email": "foo@bar.com", "owner": null},'
+            ' {"email": "test@example.com", "owner": "Someone Else"}, "noise", {"owner": "No Email"}]'
+        )
+        return {"choices": [{"message": {"content": content}}]}
+
+
+def test_parse_merges_normalized_model_output(client):
+    fake = MessyOpenAIClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = "<p>Hello test@example.com and foo@bar.com</p>"
+    payload = {"html_content": html, "emails": ["test@example.com", "TEST@example.com", "foo@bar.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {"email": "test@example.com", "owner": "Owner A", "source": "llm"},
+        {"email": "TEST@example.com", "owner": "Owner A", "source": "llm"},
+        {"email": "foo@bar.com", "owner": "unknown", "source": "llm"},
+    ]
+    # Duplicate addresses are asked about once
+    assert "Emails: test@example.com, foo@bar.com\n" in fake.calls[0][1]["content"]
+    client.app.dependency_overrides = {}
+
+
+def test_parse_non_array_model_output_is_502(client):
+    class ObjectClient:
+        async def chat_completion(self, messages):
+            return {"choices": [{"message": {"content": '{"email": "test@example.com"}'}}]}
+
+    client.app.dependency_overrides[get_openai_client] = lambda: ObjectClient()
+    payload = {"html_content": "<p>Hello test@example.com</p>", "emails": ["test@example.com"]}
+    assert client.post("/parse", json=payload).status_code == 502
+    client.app.dependency_overrides = {}
+
+
 def test_parse_invalid_empty_html(client):
     payload = {"html_content": "", "emails": ["test@example.com"]}
     response = client.post("/parse", json=payload)
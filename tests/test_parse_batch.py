@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+from fastapi import status
+
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+
+
+class EchoOpenAIClient:
+    """Answers every email in the prompt with an owner derived from its local part."""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def chat_completion(self, messages):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        emails = messages[1]["content"].split("Emails: ", 1)[1].split("\n", 1)[0].split(", ")
+        answer = [{"email": email, "owner": email.split("@")[0].title()} for email in emails]
+        return {"choices": [{"message": {"content": json.dumps(answer)}}]}
+
+
+class FailingOpenAIClient:
+    async def chat_completion(self, messages):
+        if "fail@example.com" in messages[1]["content"]:
+            return {"error": "OpenAI API error"}
+        return await EchoOpenAIClient().chat_completion(messages)
+
+
+def _item(email):
+    return {"html_content": f"<p>Reach {email}</p>", "emails": [email]}
+
+
+def test_batch_returns_results_in_input_order(client):
+    fake = EchoOpenAIClient(delay=0.01)
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    items = [_item(f"user{i}@example.com") for i in range(5)]
+    response = client.post("/parse/batch", json=items)
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert [entry["index"] for entry in body] == list(range(5))
+    for i, entry in enumerate(body):
+        assert entry["status_code"] == 200
+        assert entry["error"] is None
+        assert entry["results"] == [{"email": f"user{i}@example.com", "owner": f"User{i}", "source": "llm"}]
+    assert fake.calls == 5
+    client.app.dependency_overrides = {}
+
+
+def test_batch_item_errors_do_not_fail_the_batch(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: FailingOpenAIClient()
+    items = [
+        _item("ok@example.com"),
+        {"html_content": "", "emails": ["ok@example.com"]},
+        _item("fail@example.com"),
+        {"emails": ["not-an-email"]},
+    ]
+    response = client.post("/parse/batch", json=items)
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert [entry["status_code"] for entry in body] == [200, 422, 502, 422]
+    assert body[0]["results"][0]["owner"] == "Ok"
+    assert "html_content must be a non-empty string" in body[1]["error"]
+    assert body[2]["error"] == "Downstream API error"
+    assert body[3]["results"] is None
+    client.app.dependency_overrides = {}
+
+
+def test_batch_respects_concurrency_cap(client, monkeypatch):
+    monkeypatch.setattr("dm_email_owner_svc.routers.parse.PARSE_BATCH_CONCURRENCY", 2)
+    fake = EchoOpenAIClient(delay=0.02)
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    response = client.post("/parse/batch", json=[_item(f"user{i}@example.com") for i in range(6)])
+    assert response.status_code == status.HTTP_200_OK
+    assert fake.calls == 6
+    assert fake.max_active == 2
+    client.app.dependency_overrides = {}
+
+
+def test_batch_size_limits(client, monkeypatch):
+    monkeypatch.setattr("dm_email_owner_svc.routers.parse.PARSE_BATCH_MAX_ITEMS", 3)
+    client.app.dependency_overrides[get_openai_client] = lambda: EchoOpenAIClient()
+    assert client.post("/parse/batch", json=[]).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = client.post("/parse/batch", json=[_item("a@example.com")] * 4)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    client.app.dependency_overrides = {}
+
+
+def test_batch_is_rate_limited_by_item_count(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: EchoOpenAIClient()
+    headers = {"X-Client-Host": "batch-client"}
+    response = client.post("/parse/batch", json=[_item(f"user{i}@example.com") for i in range(8)], headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    # 8 of 10 units used: a batch of 3 no longer fits
+    response = client.post("/parse/batch", json=[_item(f"user{i}@example.com") for i in range(3)], headers=headers)
+    assert response.status_code == 429
+    # The rejected batch still paid for its request, leaving room for exactly one more call
+    assert client.get("/ping", headers=headers).status_code == 200
+    assert client.get("/ping", headers=headers).status_code == 429
+    client.app.dependency_overrides = {}
+
+
+def test_batch_items_sharing_a_document_use_one_model_call(client):
+    fake = EchoOpenAIClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = "<p>Reach ann@example.com or bob@example.com</p>"
+    items = [
+        {"html_content": html, "emails": ["ann@example.com"]},
+        {"html_content": html, "emails": ["bob@example.com"]},
+    ]
+    response = client.post("/parse/batch", json=items)
+    assert response.status_code == status.HTTP_200_OK
+    owners = [entry["results"][0]["owner"] for entry in response.json()]
+    assert owners == ["Ann", "Bob"]
+    assert fake.calls == 1
+    client.app.dependency_overrides = {}
+
@@ -0,0 +1,37 @@
+from fastapi import status
+
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from tests.test_parse_batch import EchoOpenAIClient
+
+
+def test_chunked_document_fans_out_per_chunk(client, monkeypatch):
+    monkeypatch.setattr("dm_email_owner_svc.core.owner_resolution.PARSE_CHUNK_CHARS", 1000)
+    fake = EchoOpenAIClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    filler = "<div>" + "lorem ipsum " * 400 + "</div>"
+    html = "<p>Reach ann@example.com</p>" + filler * 20 + "<p>Reach bob@example.com</p>"
+    assert len(html) > 50000
+    payload = {"html_content": html, "emails": ["ann@example.com", "bob@example.com", "gone@example.com"]}
+    assert client.post("/parse", json=payload).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = client.post("/parse", json={**payload, "chunked": True})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {"email": "ann@example.com", "owner": "Ann", "source": "llm"},
+        {"email": "bob@example.com", "owner": "Bob", "source": "llm"},
+        {"email": "gone@example.com", "owner": "unknown", "source": "local"},
+    ]
+    # Only the two chunks containing an email are sent, each asking about its own email
+    assert fake.calls == 2
+    client.app.dependency_overrides = {}
+
+
+def test_unchunked_document_is_sent_in_one_prompt(client, monkeypatch):
+    monkeypatch.setattr("dm_email_owner_svc.core.owner_resolution.PARSE_CHUNK_CHARS", 1000)
+    fake = EchoOpenAIClient()
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = "<p>Reach ann@example.com</p>" + "<div>" + "lorem ipsum " * 400 + "</div>" + "<p>Reach bob@example.com</p>"
+    payload = {"html_content": html, "emails": ["ann@example.com", "bob@example.com"]}
+    response = client.post("/parse", json=payload)
+    assert [result["owner"] for result in response.json()] == ["Ann", "Bob"]
+    assert fake.calls == 1
+    client.app.dependency_overrides = {}
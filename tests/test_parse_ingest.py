@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+from dm_email_owner_svc.core.ndjson_ingest import iter_ndjson_lines, resolve_lines
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from dm_email_owner_svc.models.base import get_db
+from dm_email_owner_svc.routers import parse
+from tests.test_parse import FakeOpenAIClient
+
+
+async def chunks_of(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def test_lines_are_split_across_chunks():
+    chunks = chunks_of(b'{"a"', b': 1}\n\n  \n{"b": 2}\n{"c"', b": 3}")
+    assert asyncio.run(collect(iter_ndjson_lines(chunks, 100))) == [
+        (1, b'{"a": 1}'), (4, b'{"b": 2}'), (5, b'{"c": 3}'),
+    ]
+
+
+def test_oversized_lines_are_skipped_without_buffering():
+    chunks = chunks_of(b"x" * 6, b"x" * 6, b"xx\nok\n", b"y" * 20)
+    assert asyncio.run(collect(iter_ndjson_lines(chunks, 10))) == [(1, None), (2, b"ok"), (3, None)]
+
+
+def test_resolve_lines_bounds_work_in_flight():
+    read = 0
+    in_flight = 0
+    peak = 0
+
+    async def lines():
+        nonlocal read
+        for number in range(1, 21):
+            read += 1
+            yield number, b"{}"
+
+    async def resolve(number, line):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * (number % 3))
+        in_flight -= 1
+        return number
+
+    async def scenario():
+        results = []
+        async for number in resolve_lines(lines(), resolve, 4):
+            # Nothing beyond the free slots is read while the consumer is busy
+            assert read - len(results) <= 5
+            results.append(number)
+            await asyncio.sleep(0.002)
+        return results
+
+    results = asyncio.run(scenario())
+    assert sorted(results) == list(range(1, 21))
+    assert peak <= 4
+
+
+def ndjson(*items):
+    return "".join((item if isinstance(item, str) else json.dumps(item)) + "\n" for item in items)
+
+
+def test_parse_stream_tags_results_with_line_numbers(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: FakeOpenAIClient()
+    body = ndjson(
+        {"html_content": "<p>Write to test@example.com</p>", "emails": ["test@example.com"]},
+        "{not json",
+        "",
+        {"html_content": "<div>John Doe <john@example.com></div>", "emails": ["john@example.com"]},
+    )
+    response = client.post("/parse/stream", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda result: result["line"])
+    assert [(result["line"], result["status_code"]) for result in results] == [(1, 200), (2, 422), (4, 200)]
+    assert results[0]["results"] == [{"email": "test@example.com", "owner": "Owner A", "source": "llm"}]
+    assert results[2]["results"][0]["source"] == "local"
+    client.app.dependency_overrides = {}
+
+
+def test_parse_stream_stops_when_quota_is_exhausted(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: FakeOpenAIClient()
+    line = {"html_content": "<div>John Doe <john@example.com></div>", "emails": ["john@example.com"]}
+    response = client.post("/parse/stream", content=ndjson(*[line] * 12), headers={"X-Client-Host": "stream-quota"})
+    outcome = [json.loads(entry) for entry in response.text.splitlines()]
+    assert outcome[-1]["status_code"] == 429
+    assert len([entry for entry in outcome if entry.get("status_code") == 200]) == 10
+    client.app.dependency_overrides = {}
+
+
+def test_parse_stream_shares_one_session_and_closes_it(client, session_local, monkeypatch):
+    events = []
+
+    def tracked_session():
+        session = session_local()
+        events.append("open")
+        try:
+            yield session
+        finally:
+            session.close()
+            events.append("close")
+
+    resolve_batch_item = parse.resolve_batch_item
+
+    async def tracked_resolve(number, req, openai_client, db):
+        events.append("use")
+        return await resolve_batch_item(number, req, openai_client, db)
+
+    monkeypatch.setattr(parse, "resolve_batch_item", tracked_resolve)
+    client.app.dependency_overrides[get_db] = tracked_session
+    client.app.dependency_overrides[get_openai_client] = lambda: FakeOpenAIClient()
+    line = {"html_content": "<div>John Doe <john@example.com></div>", "emails": ["john@example.com"]}
+    response = client.post("/parse/stream", content=ndjson(line, line))
+    assert [json.loads(entry)["status_code"] for entry in response.text.splitlines()] == [200, 200]
+    assert events == ["open", "use", "use", "close"]
+    client.app.dependency_overrides = {}
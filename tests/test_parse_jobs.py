@@ -0,0 +1,133 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from dm_email_owner_svc.core.jobs import (
+    COMPLETED,
+    JobWorkerPool,
+    QUEUED,
+    RUNNING,
+    _utcnow,
+    claim_item,
+    complete_item,
+    create_job,
+    load_job,
+)
+from dm_email_owner_svc.models.parse_job import ParseJobItem
+from dm_email_owner_svc.models.schema import ParseBatchItemResult, ParseRequest
+from dm_email_owner_svc.routers.parse import get_job_pool
+from tests.test_parse import FakeOpenAIClient
+
+VALID = {"html_content": "<p>Jobs for test@example.com</p>", "emails": ["test@example.com"]}
+
+
+@pytest.fixture
+def job_pool(client, session_local):
+    # One worker: the test database is a single shared connection, and a second worker's rollback can
+    # undo a claim in flight, leaving the item running until its lease expires
+    pool = JobWorkerPool(session_local, lambda: FakeOpenAIClient(), concurrency=1, poll_interval=0.05)
+    # Workers must run on the test client's event loop
+    client.portal.call(pool.start)
+    client.app.dependency_overrides[get_job_pool] = lambda: pool
+    yield pool
+    client.portal.call(pool.stop)
+    client.app.dependency_overrides.pop(get_job_pool, None)
+
+
+def test_job_results_are_long_polled(client, job_pool):
+    response = client.post("/parse/jobs", json=[VALID, {"html_content": "", "emails": ["a@b.com"]}])
+    assert response.status_code == 202
+    job = response.json()
+    assert job["item_count"] == 2 and job["results"] == []
+    response = client.get(f"/parse/jobs/{job['id']}", params={"wait": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == COMPLETED and body["completed_count"] == 2 and body["finished_at"]
+    assert body["results"][0] == {
+        "index": 0, "status_code": 200, "error": None,
+        "results": [{"email": "test@example.com", "owner": "Owner A", "source": "llm"}],
+    }
+    assert body["results"][1]["status_code"] == 422
+
+
+def test_single_document_job(client, job_pool):
+    job = client.post("/parse/jobs", json=VALID).json()
+    body = client.get(f"/parse/jobs/{job['id']}", params={"wait": 5}).json()
+    assert body["item_count"] == 1 and body["results"][0]["status_code"] == 200
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/parse/jobs/missing").status_code == 404
+
+
+def test_empty_job_is_rejected(client):
+    assert client.post("/parse/jobs", json=[]).status_code == 422
+
+
+def test_expired_lease_is_claimed_again(db_session):
+    job = create_job(db_session, [ParseRequest.model_validate(VALID)])
+    now = _utcnow()
+    first = claim_item(db_session, lease_seconds=60, max_attempts=3, now=now)
+    assert first[:2] == (job.id, 0)
+    # The worker holding the item died; nobody else may take it until the lease runs out
+    assert claim_item(db_session, lease_seconds=60, max_attempts=3, now=now + timedelta(seconds=30)) is None
+    assert load_job(db_session, job.id).status == RUNNING
+    again = claim_item(db_session, lease_seconds=60, max_attempts=3, now=now + timedelta(seconds=61))
+    assert again == first
+    result = ParseBatchItemResult(index=0, status_code=200, results=[])
+    complete_item(db_session, job.id, 0, result)
+    complete_item(db_session, job.id, 0, result)
+    finished = load_job(db_session, job.id)
+    assert finished.status == COMPLETED and finished.completed_count == 1
+
+
+def test_item_is_abandoned_after_max_attempts(db_session):
+    job = create_job(db_session, [ParseRequest.model_validate(VALID)])
+    now = _utcnow()
+    claim_item(db_session, lease_seconds=1, max_attempts=1, now=now)
+    assert claim_item(db_session, lease_seconds=1, max_attempts=1, now=now + timedelta(seconds=2)) is None
+    finished = load_job(db_session, job.id)
+    assert finished.status == COMPLETED
+    assert finished.results[0].status_code == 500
+
+
+def test_stopping_workers_requeues_held_items(session_local):
+    class StuckClient:
+        async def chat_completion(self, messages):
+            await asyncio.sleep(60)
+
+    async def scenario():
+        pool = JobWorkerPool(session_local, lambda: StuckClient(), concurrency=1, poll_interval=0.01)
+        db = session_local()
+        job = create_job(db, [ParseRequest.model_validate(VALID)])
+        pool.start()
+        for _ in range(200):
+            if load_job(db, job.id).status == RUNNING:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+        item = db.get(ParseJobItem, (job.id, 0), populate_existing=True)
+        db.close()
+        return item.status, item.attempts
+
+    assert asyncio.run(scenario()) == (QUEUED, 0)
+
+
+def test_invalid_stored_request_completes_with_422(db_session, session_local):
+    job = create_job(db_session, [ParseRequest.model_validate(VALID)])
+    db_session.get(ParseJobItem, (job.id, 0)).request = '{"html_content": "<p>x</p>"}'
+    db_session.commit()
+    claimed = claim_item(db_session, lease_seconds=60, max_attempts=3)
+    pool = JobWorkerPool(session_local, lambda: FakeOpenAIClient())
+
+    async def process():
+        # Driven directly rather than by running workers, so the result is read only after it is stored
+        pool._progress = asyncio.Event()
+        await pool._process(*claimed)
+
+    asyncio.run(process())
+    finished = load_job(db_session, job.id)
+    assert finished.status == COMPLETED
+    assert finished.results[0].status_code == 422 and finished.results[0].error
+    assert pool._held == set()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import status
+
+from dm_email_owner_svc.core.openai_client import OpenAIStreamError
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from dm_email_owner_svc.models.base import get_db
+from dm_email_owner_svc.models.schema import ParseRequest
+from dm_email_owner_svc.routers import parse
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+class StreamingClient:
+    def __init__(self, deltas, fail=False):
+        self.deltas = deltas
+        self.fail = fail
+        self.prompts = []
+
+    async def chat_completion_stream(self, messages):
+        self.prompts.append(messages)
+        for delta in self.deltas:
+            yield delta
+        if self.fail:
+            raise OpenAIStreamError("OpenAI API error")
+
+
+class NonStreamingClient:
+    async def chat_completion(self, messages):
+        return {"choices": [{"message": {"content": '[{"email": "foo@bar.com", "owner": "Owner B"}]'}}]}
+
+
+@pytest.fixture
+def session_events(client, session_local):
+    events = []
+
+    def tracked_session():
+        session = session_local()
+        events.append("open")
+        try:
+            yield session
+        finally:
+            session.close()
+            events.append("close")
+
+    client.app.dependency_overrides[get_db] = tracked_session
+    return events
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_stream_emits_local_results_before_model_results(client):
+    fake = StreamingClient(['[{"email": "FOO@bar.com", ', '"owner": "Owner B"}', ", ", '{"email": "baz@bar.com", "owner": null}]'])
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    html = "<div>Jane Roe <test@example.com></div><p>foo@bar.com baz@bar.com</p>"
+    payload = {"html_content": html, "emails": ["foo@bar.com", "test@example.com", "gone@example.com", "baz@bar.com"]}
+    response = client.post("/parse", json=payload, headers=NDJSON)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert _lines(response) == [
+        {"email": "test@example.com", "owner": "Jane Roe", "source": "local"},
+        {"email": "gone@example.com", "owner": "unknown", "source": "local"},
+        {"email": "foo@bar.com", "owner": "Owner B", "source": "llm"},
+        {"email": "baz@bar.com", "owner": "unknown", "source": "llm"},
+    ]
+    assert len(fake.prompts) == 1
+    client.app.dependency_overrides = {}
+
+
+def test_stream_reports_emails_the_model_skipped(client):
+    fake = StreamingClient(['[]'])
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    payload = {"html_content": "<p>foo@bar.com</p>", "emails": ["foo@bar.com"]}
+    response = client.post("/parse", json=payload, headers=NDJSON)
+    assert _lines(response) == [{"email": "foo@bar.com", "owner": "unknown", "source": "llm"}]
+    client.app.dependency_overrides = {}
+
+
+def test_stream_reports_downstream_errors_in_band(client):
+    fake = StreamingClient(['[{"email": "foo@bar.com", "owner": "Owner B"}'], fail=True)
+    client.app.dependency_overrides[get_openai_client] = lambda: fake
+    payload = {"html_content": "<p>foo@bar.com baz@bar.com</p>", "emails": ["foo@bar.com", "baz@bar.com"]}
+    response = client.post("/parse", json=payload, headers=NDJSON)
+    assert _lines(response) == [
+        {"email": "foo@bar.com", "owner": "Owner B", "source": "llm"},
+        {"error": "Downstream API error", "status_code": 502},
+    ]
+    client.app.dependency_overrides = {}
+
+
+def test_stream_falls_back_to_single_call(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: NonStreamingClient()
+    payload = {"html_content": "<p>foo@bar.com</p>", "emails": ["foo@bar.com"]}
+    response = client.post("/parse", json=payload, headers=NDJSON)
+    assert _lines(response) == [{"email": "foo@bar.com", "owner": "Owner B", "source": "llm"}]
+    client.app.dependency_overrides = {}
+
+
+def test_stream_results_are_cached(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: StreamingClient(['[{"email": "foo@bar.com", "owner": "Owner B"}]'])
+    payload = {"html_content": "<p>foo@bar.com</p>", "emails": ["foo@bar.com"]}
+    client.post("/parse", json=payload, headers=NDJSON)
+    response = client.post("/parse", json=payload)
+    assert response.json() == [{"email": "foo@bar.com", "owner": "Owner B", "source": "cache"}]
+    client.app.dependency_overrides = {}
+
+
+def test_stream_uses_its_own_session_and_closes_it(client, session_events, monkeypatch):
+    stream_owners = parse.stream_owners
+
+    def tracked_stream_owners(req, openai_client, db):
+        session_events.append("use")
+        return stream_owners(req, openai_client, db)
+
+    monkeypatch.setattr(parse, "stream_owners", tracked_stream_owners)
+    client.app.dependency_overrides[get_openai_client] = lambda: StreamingClient(['[]'])
+    payload = {"html_content": "<p>foo@bar.com</p>", "emails": ["foo@bar.com"]}
+    response = client.post("/parse", json=payload, headers=NDJSON)
+    assert _lines(response) == [{"email": "foo@bar.com", "owner": "unknown", "source": "llm"}]
+    # The handler's session is closed before the body streams, so the stream opens its own
+    assert session_events[-3:] == ["open", "use", "close"]
+    assert session_events.count("open") == session_events.count("close")
+    client.app.dependency_overrides = {}
+
+
+def test_stopping_the_stream_early_closes_the_model_stream(db_session):
+    closed = []
+
+    class ClosingClient:
+        async def chat_completion_stream(self, messages):
+            try:
+                yield '[{"email": "foo@bar.com", "owner": "Owner B"}, '
+                yield '{"email": "baz@bar.com", "owner": "Owner C"}]'
+            finally:
+                closed.append(True)
+
+    async def first_result():
+        req = ParseRequest(html_content="<p>foo@bar.com baz@bar.com</p>", emails=["foo@bar.com", "baz@bar.com"])
+        results = parse.stream_owners(req, ClosingClient(), db_session)
+        first = await results.__anext__()
+        await results.aclose()
+        return first, list(closed)
+
+    first, closed_before_gc = asyncio.run(first_result())
+    assert (first.email, first.owner) == ("foo@bar.com", "Owner B")
+    assert closed_before_gc == [True]
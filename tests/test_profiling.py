@@ -0,0 +1,46 @@
+import os
+import pstats
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from dm_email_owner_svc.app import app as service_app
+from dm_email_owner_svc.middleware import ProfilingMiddleware
+
+
+def profiled_app(directory, **options):
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        return {"total": sum(range(1000))}
+
+    app.add_middleware(ProfilingMiddleware, directory=str(directory), **options)
+    return TestClient(app)
+
+
+def test_admin_header_profiles_request(tmp_path):
+    client = profiled_app(tmp_path, admin_token="secret")
+    response = client.get("/work", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    name = response.headers["x-profile-file"]
+    assert os.listdir(tmp_path) == [name]
+    stats = pstats.Stats(str(tmp_path / name))
+    assert any(function == "work" for _, _, function in stats.stats)
+
+
+def test_wrong_or_missing_token_is_not_profiled(tmp_path):
+    client = profiled_app(tmp_path, admin_token="secret")
+    assert "x-profile-file" not in client.get("/work", headers={"X-Profile": "guess"}).headers
+    assert "x-profile-file" not in client.get("/work").headers
+    assert not tmp_path.exists() or os.listdir(tmp_path) == []
+
+
+def test_sampled_profiles_are_capped(tmp_path):
+    client = profiled_app(tmp_path, sample_rate=1.0, max_files=2)
+    names = [client.get("/work").headers["x-profile-file"] for _ in range(4)]
+    assert sorted(os.listdir(tmp_path)) == names[-2:]
+
+
+def test_profiling_is_not_installed_by_default():
+    assert ProfilingMiddleware not in [middleware.cls for middleware in service_app.user_middleware]
@@ -1,6 +1,6 @@
 import pytest
 
-from dm_email_owner_svc.core.prompts import build_email_owner_prompt
+from dm_email_owner_svc.core.prompts import build_email_owner_prompt, find_email, reduce_html_context, CONTEXT_SEPARATOR
 
 
 def test_build_email_owner_prompt():
@@ -31,3 +31,55 @@ def test_build_email_owner_prompt():
     assert html_content in user_content, "HTML content should be included in the user prompt"
     for email in emails:
         assert email in user_content, f"Email {email} should be included in the user prompt"
+
+
+def test_reduce_html_context_cuts_window_around_emails():
+    html_content = "a" * 100 + " john@example.com " + "b" * 100
+    context, present = reduce_html_context(html_content, ["john@example.com"], window=10)
+    assert context == "a" * 9 + " john@example.com " + "b" * 9
+    assert present == ["john@example.com"]
+
+
+def test_reduce_html_context_merges_overlapping_windows():
+    html_content = "x" * 50 + " a@example.com y b@example.com " + "x" * 50 + " c@example.com " + "x" * 50
+    emails = ["a@example.com", "b@example.com", "c@example.com"]
+    context, present = reduce_html_context(html_content, emails, window=5)
+    excerpts = context.split(CONTEXT_SEPARATOR)
+    assert excerpts == ["xxxx a@example.com y b@example.com xxxx", "xxxx c@example.com xxxx"]
+    assert present == emails
+
+
+def test_reduce_html_context_reports_missing_emails():
+    context, present = reduce_html_context("<p>Hi John@Example.com</p>", ["john@example.com", "gone@example.com"], window=100)
+    assert present == ["john@example.com"]
+    assert context == "<p>Hi John@Example.com</p>"
+    context, present = reduce_html_context("<p>Hi</p>", ["gone@example.com"], window=100)
+    assert (context, present) == ("", [])
+
+
+def test_find_email_matches_whole_addresses_only():
+    assert find_email("mail john@example.com", "n@example.com") == -1
+    assert find_email("n@example.com.au", "n@example.com") == -1
+    assert find_email("x.n@example.com", "n@example.com") == -1
+    assert find_email("john@example.com, <n@example.com>.", "n@example.com") == 19
+    assert find_email("?contact=n@example.com&x", "n@example.com") == 9
+
+
+def test_reduce_html_context_ignores_addresses_inside_longer_ones():
+    html_content = "john@example.com" + "x" * 100 + "Nan n@example.com"
+    context, present = reduce_html_context(html_content, ["n@example.com", "an@example.com"], window=4)
+    assert context == "Nan n@example.com"
+    assert present == ["n@example.com"]
+
+
+def test_reduce_html_context_disabled_keeps_full_document():
+    html_content = "x" * 1000 + " john@example.com"
+    context, present = reduce_html_context(html_content, ["john@example.com"], window=0)
+    assert context == html_content
+
+
+def test_build_email_owner_prompt_can_ask_for_confidence():
+    plain = build_email_owner_prompt("<p>a@example.com</p>", ["a@example.com"])
+    rated = build_email_owner_prompt("<p>a@example.com</p>", ["a@example.com"], with_confidence=True)
+    assert all("confidence" not in message["content"] for message in plain)
+    assert all("'confidence'" in message["content"] for message in rated)
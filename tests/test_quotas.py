@@ -0,0 +1,126 @@
+from fastapi import status
+
+from dm_email_owner_svc.core.quotas import COST, REQUESTS, build_quota_manager, estimate_parse_cost
+from dm_email_owner_svc.core.rate_limit import RateLimiter
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from tests.test_parse_batch import EchoOpenAIClient
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_quotas(clock, tiers=None, clients=None, requests=10, cost=1000):
+    def factory(limit):
+        return RateLimiter(limit=limit, window_size=60.0, algorithm="fixed_window", clock=clock)
+    return build_quota_manager(requests, cost, tiers or {}, clients or {}, factory)
+
+
+def test_parse_cost_counts_the_prompt_excerpts_once():
+    html = "x" * 999 + " a@example.com y b@example.com " + "x" * 999
+    # 10 characters around the addresses plus the list "a@example.com, b@example.com, "
+    assert estimate_parse_cost(html, ["a@example.com"], window=10) == 12
+    assert estimate_parse_cost(html, ["a@example.com", "B@example.com ", "b@example.com"], window=10) == 20
+    assert estimate_parse_cost(html, ["a@example.com"], window=0) == 511
+    # Emails absent from the document are never sent
+    assert estimate_parse_cost("x" * 400, ["gone@example.com"]) == 1
+
+
+def test_charge_reports_remaining_budget_and_reset():
+    clock = FakeClock(100.0)
+    quotas = make_quotas(clock)
+    first = quotas.charge("c", COST, 300)
+    assert (first.allowed, first.limit, first.remaining, first.reset_after) == (True, 1000, 700, 60.0)
+    clock.now = 130.0
+    second = quotas.charge("c", COST, 800)
+    assert (second.allowed, second.remaining, second.reset_after) == (False, 700, 30.0)
+    assert second.headers() == {
+        "X-RateLimit-Limit-Cost": "1000",
+        "X-RateLimit-Remaining-Cost": "700",
+        "X-RateLimit-Reset-Cost": "30",
+    }
+    # Dimensions are counted separately
+    assert quotas.charge("c", REQUESTS, 1).remaining == 9
+
+
+def test_charge_reads_status_from_the_same_storage_call():
+    quotas = make_quotas(FakeClock(100.0))
+
+    def fail(client_id, now):
+        raise AssertionError("status is reported by consume_status")
+
+    for limiter in quotas._limiters.values():
+        limiter.storage.status = fail
+    charged = quotas.charge("c", COST, 300)
+    assert (charged.allowed, charged.remaining, charged.reset_after) == (True, 700, 60.0)
+
+
+def test_clients_use_their_tier_or_own_quota():
+    quotas = make_quotas(
+        FakeClock(),
+        tiers={"premium": {"requests": 100}},
+        clients={"vip": "premium", "solo": {"cost": 5}, "lost": "missing"},
+    )
+    assert quotas.quota_for("vip").requests == 100
+    assert quotas.quota_for("vip").cost == 1000
+    assert quotas.quota_for("solo").cost == 5
+    assert quotas.quota_for("lost") is quotas.default
+    assert quotas.quota_for("anyone") is quotas.default
+    assert quotas.charge("solo", COST, 6).allowed is False
+    assert quotas.charge("anyone", COST, 6).allowed is True
+
+
+def test_responses_carry_rate_limit_headers(client):
+    response = client.get("/ping", headers={"X-Client-Host": "headers-client"})
+    assert response.headers["X-RateLimit-Limit-Requests"] == "10"
+    assert response.headers["X-RateLimit-Remaining-Requests"] == "9"
+    assert 0 < int(response.headers["X-RateLimit-Reset-Requests"]) <= 60
+    assert "X-RateLimit-Remaining-Cost" not in response.headers
+
+
+def test_parse_is_charged_its_estimated_cost(client, monkeypatch):
+    client.app.dependency_overrides[get_openai_client] = lambda: EchoOpenAIClient()
+    quotas = make_quotas(FakeClock(), cost=100)
+    monkeypatch.setattr(client.app.state, "quotas", quotas)
+    headers = {"X-Client-Host": "cost-client"}
+    html = "<p>Reach ann@example.com</p>" + " " * 172
+    response = client.post("/parse", json={"html_content": html, "emails": ["ann@example.com"]}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    # 200 characters of document and 17 of email list
+    assert response.headers["X-RateLimit-Remaining-Cost"] == "45"
+    assert response.headers["X-RateLimit-Remaining-Requests"] == "9"
+    payload = {"html_content": html + "bob@example.com", "emails": ["ann@example.com", "bob@example.com"]}
+    response = client.post("/parse", json=payload, headers=headers)
+    assert response.status_code == 429
+    assert response.json()["detail"] == "Rate limit exceeded. Max 100 cost units per 60 seconds."
+    assert response.headers["X-RateLimit-Remaining-Cost"] == "45"
+    client.app.dependency_overrides = {}
+
+
+def test_requests_over_the_whole_budget_are_413(client, monkeypatch):
+    client.app.dependency_overrides[get_openai_client] = lambda: EchoOpenAIClient()
+    quotas = make_quotas(FakeClock(), cost=100)
+    monkeypatch.setattr(client.app.state, "quotas", quotas)
+    headers = {"X-Client-Host": "huge-client"}
+    # Only the 400 characters after the address count
+    payload = {"html_content": "<p>ann@example.com</p>" + " " * 1000, "emails": ["ann@example.com"]}
+    response = client.post("/parse", json=payload, headers=headers)
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Request costs 109 cost units, more than the quota of 100 per 60 seconds."
+    assert quotas.charge("huge-client", COST, 100).allowed is True
+    client.app.dependency_overrides = {}
+
+
+def test_large_chunked_documents_fit_the_default_budget(client):
+    client.app.dependency_overrides[get_openai_client] = lambda: EchoOpenAIClient()
+    emails = ["a@example.com", "b@example.com", "c@example.com"]
+    html = "".join(f"<p>{'filler text ' * 80}</p>" for _ in range(3200)) + "<p>" + " ".join(emails) + "</p>"
+    assert len(html) > 3_000_000
+    payload = {"html_content": html, "emails": emails, "chunked": True}
+    response = client.post("/parse", json=payload, headers={"X-Client-Host": "chunked-client"})
+    assert response.status_code == status.HTTP_200_OK
+    client.app.dependency_overrides = {}
@@ -39,3 +39,112 @@ def test_multiple_clients(monkeypatch):
     assert rl.is_allowed("A") is False
     # Client B independent
     assert rl.is_allowed("B") is True
+
+def test_cost_weighted_requests(monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 3000.0)
+    rl = RateLimiter(limit=10, window_size=60.0)
+    assert rl.is_allowed("client1", cost=7) is True
+    # Not enough budget left for a cost of 4
+    assert rl.is_allowed("client1", cost=4) is False
+    assert rl.is_allowed("client1", cost=3) is True
+    assert rl.is_allowed("client1") is False
+    # A single request larger than the whole limit is never allowed
+    assert rl.is_allowed("client2", cost=11) is False
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_prevents_edge_bursts():
+    clock = FakeClock(59.0)
+    rl = RateLimiter(limit=10, window_size=60.0, algorithm="sliding_window", clock=clock)
+    for _ in range(10):
+        assert rl.is_allowed("c") is True
+    # Just after the window edge most of the previous window still counts
+    clock.now = 61.0
+    assert rl.is_allowed("c") is False
+    # Half way through the next window half of the old count has slid out
+    clock.now = 90.0
+    assert sum(rl.is_allowed("c") for _ in range(10)) == 5
+
+
+def test_token_bucket_refills_continuously():
+    clock = FakeClock(0.0)
+    rl = RateLimiter(limit=10, window_size=60.0, algorithm="token_bucket", clock=clock)
+    for _ in range(10):
+        assert rl.is_allowed("c") is True
+    assert rl.is_allowed("c") is False
+    # One token every 6 seconds
+    clock.now = 6.0
+    assert rl.is_allowed("c") is True
+    assert rl.is_allowed("c") is False
+    clock.now = 600.0
+    assert sum(rl.is_allowed("c") for _ in range(20)) == 10
+
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(algorithm="leaky")
+
+
+@pytest.mark.parametrize("algorithm", ["fixed_window", "sliding_window", "token_bucket"])
+def test_idle_clients_are_swept(algorithm):
+    clock = FakeClock(0.0)
+    rl = RateLimiter(limit=10, window_size=60.0, algorithm=algorithm, stripes=1, clock=clock)
+    for i in range(1000):
+        rl.is_allowed(f"client{i}")
+    assert rl.client_count() == 1000
+    clock.now = 10_000.0
+    rl.is_allowed("late")
+    assert rl.client_count() == 1
+
+
+def test_memory_is_bounded_by_max_clients():
+    clock = FakeClock(0.0)
+    rl = RateLimiter(limit=1, window_size=60.0, algorithm="sliding_window", stripes=4, max_clients=100, clock=clock)
+    for i in range(10_000):
+        rl.is_allowed(f"10.0.{i // 256}.{i % 256}")
+    assert rl.client_count() <= 100
+
+
+def test_reset_forgets_clients():
+    rl = RateLimiter(limit=1, window_size=60.0, clock=FakeClock(0.0))
+    assert rl.is_allowed("c") is True
+    assert rl.is_allowed("c") is False
+    rl.reset()
+    assert rl.is_allowed("c") is True
+
+
+def test_concurrent_access_never_exceeds_limit():
+    import threading
+    rl = RateLimiter(limit=500, window_size=60.0, algorithm="token_bucket", clock=FakeClock(0.0))
+    allowed = []
+
+    def worker():
+        allowed.append(sum(rl.is_allowed("shared") for _ in range(200)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(allowed) == 500
+
+
+def test_status_reports_remaining_units_and_reset():
+    clock = FakeClock(100.0)
+    fixed = RateLimiter(limit=10, window_size=60.0, clock=clock)
+    assert fixed.status("c") == (10, 60.0)
+    fixed.is_allowed("c", cost=4)
+    clock.now = 115.0
+    assert fixed.status("c") == (6, 45.0)
+    bucket = RateLimiter(limit=10, window_size=60.0, algorithm="token_bucket", clock=clock)
+    bucket.is_allowed("c", cost=10)
+    clock.now = 145.0
+    # Refilled at 10 per minute for 30 seconds; full again in another 30
+    assert bucket.status("c") == (5, 30.0)
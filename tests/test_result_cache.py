@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from dm_email_owner_svc.core.result_cache import (
+    document_hash,
+    get_cached_owners,
+    purge_expired,
+    store_owners,
+)
+from dm_email_owner_svc.models import OwnerCacheEntry
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def test_document_hash_is_sha256():
+    assert document_hash("abc") == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+
+
+def test_store_and_get_round_trip(db_session):
+    doc = document_hash("<p>x</p>")
+    store_owners(db_session, doc, {"A@Example.com": "Ann", "b@example.com": "Bob"}, "m1", "1", 60, now=NOW)
+    owners = get_cached_owners(db_session, doc, ["a@example.com", " B@EXAMPLE.COM", "c@example.com"], "m1", "1", now=NOW)
+    assert owners == {"a@example.com": "Ann", "b@example.com": "Bob"}
+
+
+def test_entries_are_scoped_to_model_and_prompt_version(db_session):
+    doc = document_hash("<p>x</p>")
+    store_owners(db_session, doc, {"a@example.com": "Ann"}, "m1", "1", 60, now=NOW)
+    assert get_cached_owners(db_session, doc, ["a@example.com"], "m2", "1", now=NOW) == {}
+    assert get_cached_owners(db_session, doc, ["a@example.com"], "m1", "2", now=NOW) == {}
+    assert get_cached_owners(db_session, document_hash("<p>y</p>"), ["a@example.com"], "m1", "1", now=NOW) == {}
+
+
+def test_entries_expire_and_are_replaced(db_session):
+    doc = document_hash("<p>x</p>")
+    store_owners(db_session, doc, {"a@example.com": "Ann"}, "m1", "1", 60, now=NOW)
+    later = NOW + timedelta(seconds=61)
+    assert get_cached_owners(db_session, doc, ["a@example.com"], "m1", "1", now=later) == {}
+    store_owners(db_session, doc, {"a@example.com": "Anna"}, "m1", "1", 60, now=later)
+    assert get_cached_owners(db_session, doc, ["a@example.com"], "m1", "1", now=later) == {"a@example.com": "Anna"}
+    assert db_session.query(OwnerCacheEntry).count() == 1
+
+
+def test_purge_expired(db_session):
+    doc = document_hash("<p>x</p>")
+    store_owners(db_session, doc, {"a@example.com": "Ann"}, "m1", "1", 10, now=NOW)
+    store_owners(db_session, doc, {"b@example.com": "Bob"}, "m1", "1", 100, now=NOW)
+    assert purge_expired(db_session, now=NOW + timedelta(seconds=50)) == 1
+    assert db_session.query(OwnerCacheEntry).count() == 1
+
+
+def test_store_overwrites_existing_entries_in_one_statement(db_session):
+    doc = document_hash("<p>x</p>")
+    store_owners(db_session, doc, {"a@example.com": "Ann"}, "m1", "1", 60, now=NOW)
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        store_owners(db_session, doc, {"a@example.com": "Anna", "b@example.com": "Bob"}, "m1", "1", 60, now=NOW)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 1 and "ON CONFLICT" in statements[0]
+    owners = get_cached_owners(db_session, doc, ["a@example.com", "b@example.com"], "m1", "1", now=NOW)
+    assert owners == {"a@example.com": "Anna", "b@example.com": "Bob"}
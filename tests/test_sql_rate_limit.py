@@ -0,0 +1,131 @@
+import multiprocessing
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from dm_email_owner_svc.core import RateLimiter
+from dm_email_owner_svc.core.quotas import Quota, QuotaManager
+from dm_email_owner_svc.core.sql_rate_limit import SQLRateLimitStorage
+from dm_email_owner_svc.models import Base
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def make_limiter(engine, now, algorithm="fixed_window", lease_size=1, limit=10):
+    storage = SQLRateLimitStorage(engine, limit=limit, window_size=60.0, algorithm=algorithm, lease_size=lease_size)
+    return RateLimiter(limit=limit, window_size=60.0, algorithm=algorithm, clock=lambda: now, storage=storage)
+
+
+def test_limits_are_shared_between_limiters(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    first = make_limiter(engine, 1000.0)
+    second = make_limiter(engine, 1000.0)
+    assert sum(first.is_allowed("c") for _ in range(6)) == 6
+    assert sum(second.is_allowed("c") for _ in range(6)) == 4
+    assert first.is_allowed("c") is False
+    assert second.is_allowed("other") is True
+
+
+def test_new_window_resets_the_count(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    assert sum(make_limiter(engine, 1000.0).is_allowed("c") for _ in range(11)) == 10
+    assert make_limiter(engine, 1020.0).is_allowed("c") is True
+
+
+def test_sliding_window_weights_previous_window(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    assert sum(make_limiter(engine, 59.0, "sliding_window").is_allowed("c") for _ in range(10)) == 10
+    assert make_limiter(engine, 61.0, "sliding_window").is_allowed("c") is False
+    assert sum(make_limiter(engine, 90.0, "sliding_window").is_allowed("c") for _ in range(10)) == 5
+
+
+def test_leases_reduce_database_round_trips(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    limiter = make_limiter(engine, 1000.0, lease_size=5)
+    assert sum(limiter.is_allowed("c") for _ in range(12)) == 10
+    # Two full leases; the spent budget is remembered, so denied calls stay off the database
+    assert limiter.storage.round_trips == 2
+
+
+def test_token_bucket_is_not_supported(tmp_path):
+    with pytest.raises(ValueError):
+        SQLRateLimitStorage(make_engine(tmp_path / "rl.db"), limit=10, window_size=60.0, algorithm="token_bucket")
+
+
+def test_reset_and_sweep(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    make_limiter(engine, 1000.0).is_allowed("a")
+    limiter = make_limiter(engine, 1200.0)
+    limiter.is_allowed("b")
+    # The first call of a process sweeps windows nobody can read any more
+    assert limiter.client_count() == 1
+    limiter.reset()
+    assert limiter.client_count() == 0
+
+
+def _worker(path, attempts, results):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+    limiter = make_limiter(engine, 1000.0, limit=25)
+    results.put(sum(limiter.is_allowed("shared") for _ in range(attempts)))
+
+
+def test_limit_holds_across_processes(tmp_path):
+    path = tmp_path / "rl.db"
+    make_engine(path).dispose()
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(str(path), 20, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+    assert sum(results.get(timeout=5) for _ in workers) == 25
+
+
+def test_status_counts_other_processes_and_local_lease(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    leased = make_limiter(engine, 1010.0, lease_size=5)
+    other = make_limiter(engine, 1010.0)
+    leased.is_allowed("c")
+    other.is_allowed("c")
+    # 6 units are reserved in the database, 4 of them still unused in the first limiter's lease
+    assert leased.status("c") == (8, 10.0)
+    assert other.status("c") == (4, 10.0)
+
+
+def test_denied_clients_are_not_sent_to_the_database(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    now = [1000.0]
+    storage = SQLRateLimitStorage(engine, limit=10, window_size=60.0, algorithm="sliding_window")
+    limiter = RateLimiter(limit=10, window_size=60.0, algorithm="sliding_window", clock=lambda: now[0], storage=storage)
+    assert limiter.is_allowed("c", cost=9) is True
+    assert limiter.is_allowed("c", cost=2) is False
+    trips = storage.round_trips
+    assert sum(limiter.is_allowed("c", cost=2) for _ in range(5)) == 0
+    assert storage.round_trips == trips
+    # A smaller request still fits and is reserved as usual
+    assert limiter.is_allowed("c", cost=1) is True
+    # Late in the next window the previous one barely counts and the client is let through again
+    now[0] = 1075.0
+    assert limiter.is_allowed("c", cost=5) is True
+
+
+def test_known_rows_are_not_inserted_again(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    limiter = make_limiter(engine, 1000.0)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    limiter.is_allowed("c")
+    limiter.is_allowed("c")
+    inserts = [statement for statement in statements if statement.lstrip().upper().startswith("INSERT")]
+    assert len(inserts) == 1
+
+
+def test_sql_quotas_are_charged_in_the_threadpool(tmp_path):
+    engine = make_engine(tmp_path / "rl.db")
+    quotas = QuotaManager(Quota("default", 10, 100), lambda limit: make_limiter(engine, 1000.0, limit=limit))
+    assert quotas.blocking is True
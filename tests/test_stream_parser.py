@@ -0,0 +1,23 @@
+from dm_email_owner_svc.core.stream_parser import JSONArrayStreamParser
+
+
+def test_yields_objects_as_they_complete():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"email": "a@example.com", "ow') == []
+    assert parser.feed('ner": "Ann"}, {"email": "b@') == [{"email": "a@example.com", "owner": "Ann"}]
+    assert parser.feed('example.com", "owner": null}]') == [{"email": "b@example.com", "owner": None}]
+
+
+def test_handles_braces_and_escapes_inside_strings():
+    parser = JSONArrayStreamParser()
+    text = '[{"email": "a@example.com", "owner": "A {\\"x\\"} ]"}]'
+    items = []
+    for ch in text:
+        items.extend(parser.feed(ch))
+    assert items == [{"email": "a@example.com", "owner": 'A {"x"} ]'}]
+
+
+def test_ignores_text_around_the_array():
+    parser = JSONArrayStreamParser()
+    items = parser.feed('```json\n[{"email": "a@example.com", "owner": "Ann", "meta": {"k": [1]}}]\n```')
+    assert items == [{"email": "a@example.com", "owner": "Ann", "meta": {"k": [1]}}]
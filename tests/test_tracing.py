@@ -0,0 +1,86 @@
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from dm_email_owner_svc.core.tracing import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    Trace,
+    current_trace,
+    span,
+    use_trace,
+)
+from dm_email_owner_svc.dependencies.openai_dependency import get_openai_client
+from dm_email_owner_svc.middleware import TracingMiddleware
+from tests.test_parse import FakeOpenAIClient
+
+
+def parse_server_timing(header):
+    return {entry.split(";")[0]: float(entry.split("dur=")[1]) for entry in header.split(", ")}
+
+
+def test_parse_reports_stage_timings(client, caplog):
+    caplog.set_level(logging.INFO)
+    client.app.dependency_overrides[get_openai_client] = lambda: FakeOpenAIClient()
+    payload = {"html_content": "<p>Trace test@example.com</p>", "emails": ["test@example.com"]}
+    response = client.post("/parse", json=payload)
+    assert response.status_code == 200
+    timings = parse_server_timing(response.headers["server-timing"])
+    for stage in ("validate", "extract", "cache_lookup", "normalize", "prompt", "openai", "parse_response", "model", "store", "total"):
+        assert stage in timings
+    assert timings["total"] >= timings["model"] >= timings["openai"]
+    access = [r.getMessage() for r in caplog.records if r.getMessage().startswith("POST /parse")]
+    assert "| timings=validate:" in access[-1] and "openai:" in access[-1]
+    client.app.dependency_overrides = {}
+
+
+def test_requests_without_stages_report_total_only(client):
+    response = client.get("/ping")
+    assert list(parse_server_timing(response.headers["server-timing"])) == ["total"]
+
+
+def test_exporter_receives_nested_spans_as_otlp():
+    exporter = InMemorySpanExporter()
+    app = FastAPI()
+
+    @app.get("/work/{item}")
+    async def work(item: str):
+        with span("outer"):
+            with span("inner", item=item):
+                pass
+        return {}
+
+    app.add_middleware(TracingMiddleware, exporter=exporter)
+    with TestClient(app) as test_client:
+        test_client.get("/work/7")
+    root, inner, outer = exporter.spans()
+    assert root["name"] == "GET /work/{item}" and root["kind"] == 2
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+    assert outer["parentSpanId"] == root["spanId"]
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert inner["attributes"] == [{"key": "item", "value": {"stringValue": "7"}}]
+    assert int(root["startTimeUnixNano"]) <= int(outer["startTimeUnixNano"]) <= int(inner["endTimeUnixNano"])
+
+
+def test_file_exporter_writes_one_line_per_trace(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path))
+    for name in ("a", "b"):
+        trace = Trace()
+        with use_trace(trace):
+            with span(name):
+                pass
+        trace.finish(f"GET /{name}")
+        exporter.export(trace)
+    exporter.shutdown()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["resourceSpans"][0]["scopeSpans"][0]["spans"][1]["name"] for line in lines] == ["a", "b"]
+
+
+def test_span_outside_trace_is_noop():
+    assert current_trace() is None
+    with span("orphan"):
+        pass
+    assert current_trace() is None